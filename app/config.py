@@ -21,6 +21,83 @@ class Settings(BaseSettings):
     SENDER_NAME: str = "College Voting System"
     SENDER_EMAIL: str = "your-email@gmail.com"
 
+    # Level for the app's own loggers, and "text" or "json" (one object per line)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"
+    # Requests slower than this are logged as warnings
+    SLOW_REQUEST_SECONDS: float = 1.0
+    # Serve per-route latency and query histograms at /metrics
+    METRICS_ENABLED: bool = True
+    # With TRACE_QUERIES, log statements a single request runs this many
+    # times or more (N+1 loops) with where they came from. Tracing captures a
+    # stack per distinct statement, so it is for development only
+    TRACE_QUERIES: bool = False
+    REPEATED_QUERY_THRESHOLD: int = 5
+    # How long a response to a request sent with an Idempotency-Key is kept
+    # for replay to retries
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 3600
+    # Seconds to wait for queued notifications to send on shutdown
+    SHUTDOWN_DRAIN_SECONDS: float = 20.0
+
+    # Routes this process serves: "all", "api" (everything except the face
+    # endpoints) or "face" (only the face endpoints), so face recognition can
+    # be deployed as its own service
+    APP_ROLE: str = "all"
+
+    # Web workers started by app.launcher (0 = one per CPU). Each is recycled
+    # after MAX_REQUESTS (+ up to MAX_REQUESTS_JITTER) requests and gets
+    # GRACEFUL_TIMEOUT seconds to finish in-flight requests on restart
+    WEB_WORKERS: int = 0
+    MAX_REQUESTS: int = 1000
+    MAX_REQUESTS_JITTER: int = 100
+    GRACEFUL_TIMEOUT: int = 30
+    WORKER_TIMEOUT: int = 120
+
+    # Worker processes for CPU-bound bulk work (0 = one per CPU, split
+    # between web workers under app.launcher)
+    PROCESS_POOL_WORKERS: int = 0
+
+    # Admin dashboard statistics cache: served fresh for TTL seconds, then
+    # served stale for up to STALE seconds while refreshing in the background
+    DASHBOARD_CACHE_TTL_SECONDS: float = 5.0
+    DASHBOARD_CACHE_STALE_SECONDS: float = 30.0
+
+    # Election/candidate catalog responses are served from memory for this
+    # many seconds before being checked against the database again; at most
+    # MAX_ENTRIES responses (per election and fieldset) are kept
+    CATALOG_CACHE_TTL_SECONDS: float = 2.0
+    CATALOG_CACHE_MAX_ENTRIES: int = 512
+
+    # Response compression: bodies of at least COMPRESSION_MINIMUM_SIZE bytes
+    # with one of COMPRESSION_TYPES (comma-separated) are sent as Brotli when
+    # the client accepts it and the brotli package is installed, else gzip
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_TYPES: str = "application/json,text/csv,text/plain,text/html,application/javascript"
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+
+    # Face encoder for new enrollments ("histogram" or "lbp"); existing
+    # templates keep the encoder they were enrolled with. LBP is opt-in: its
+    # match threshold is calibrated on synthetic captures only
+    FACE_ENCODER: str = "histogram"
+
+    # Face identification: templates shortlisted by the cheap signature pass
+    # before exact comparison (0 = compare against every template)
+    FACE_SHORTLIST_K: int = 50
+    # Shortlist index: "ivf" (approximate) or "exact"; galleries smaller than
+    # FACE_INDEX_EXACT_BELOW always use the exact scan
+    FACE_INDEX_BACKEND: str = "ivf"
+    FACE_INDEX_EXACT_BELOW: int = 5000
+    FACE_INDEX_NPROBE: int = 16
+    # Directory to persist the index in (empty = rebuild from the database)
+    FACE_INDEX_DIR: str = ""
+
+    # Uploaded files (campaign posters) are content-addressed blobs; this is
+    # the directory to keep their bytes in (empty = store bytes in the database)
+    BLOB_STORE_DIR: str = ""
+    # Largest poster upload accepted, in bytes of decoded image data
+    POSTER_MAX_BYTES: int = 10 * 1024 * 1024
+
     class Config:
         env_file = ".env"
 
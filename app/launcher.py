@@ -0,0 +1,123 @@
+"""Production launcher: gunicorn managing uvicorn workers.
+
+    python -m app.launcher
+
+The app is imported once in the gunicorn master (``preload_app``), so
+OpenCV, NumPy and the SQLAlchemy models are shared copy-on-write by every
+worker instead of being imported per process. Each forked worker drops the
+connections it inherited; migrations, pool warm-up and cache priming then run
+in the app lifespan (``app.lifespan``) before it accepts requests. Workers are recycled after
+``MAX_REQUESTS`` (plus jitter, so they do not all restart together) and are
+given ``GRACEFUL_TIMEOUT`` seconds to finish in-flight requests.
+
+Gunicorn needs a POSIX host; elsewhere the launcher falls back to
+``uvicorn.run`` with the same worker count.
+"""
+
+import logging
+import os
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+APP = "main:app"
+
+
+def worker_count() -> int:
+    """Web workers to run: WEB_WORKERS, or one per CPU.
+
+    Request handling is dominated by CPU-bound face work rather than I/O
+    waits, so more workers than CPUs only adds memory and contention.
+    """
+    return settings.WEB_WORKERS or os.cpu_count() or 1
+
+
+def worker_class() -> str:
+    try:
+        import uvicorn_worker  # noqa: F401
+        return "uvicorn_worker.UvicornWorker"
+    except ImportError:
+        # Bundled with uvicorn, deprecated in favour of the uvicorn-worker package
+        return "uvicorn.workers.UvicornWorker"
+
+
+def gunicorn_options(bind: str = None) -> dict:
+    workers = worker_count()
+    return {
+        "bind": bind or f"0.0.0.0:{os.getenv('PORT', '8000')}",
+        "workers": workers,
+        "worker_class": worker_class(),
+        "preload_app": True,
+        "max_requests": settings.MAX_REQUESTS,
+        "max_requests_jitter": settings.MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+        "timeout": settings.WORKER_TIMEOUT,
+        "keepalive": 5,
+        "post_fork": post_fork,
+        "accesslog": "-",
+        "errorlog": "-",
+    }
+
+
+def post_fork(server, worker):
+    """Prepare a freshly forked worker before it serves requests"""
+    from app.database import engine
+
+    # The engine and its pool were created when the master imported the app.
+    # Migrations now run in each worker's lifespan, so the master normally
+    # opens no connections; anything it did open belongs to it. Start the
+    # child on a fresh pool and leave those connections open for the master
+    engine.dispose(close=False)
+
+    # Split the CPU-bound process pool between workers instead of every worker
+    # starting one process per CPU
+    if not settings.PROCESS_POOL_WORKERS:
+        settings.PROCESS_POOL_WORKERS = max(1, (os.cpu_count() or 1) // worker_count())
+
+
+def preload_face_modules():
+    """Import the face stack in the master so workers share it copy-on-write.
+
+    The routes import it lazily; under gunicorn that would mean one private
+    copy of OpenCV per worker, loaded on its first face request.
+    """
+    from app.lifespan import serves_faces
+
+    if serves_faces():
+        import app.utils.face_identification  # noqa: F401
+        import app.utils.face_import  # noqa: F401
+
+
+def run(bind: str = None):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+    if BaseApplication is None or os.name != "posix":
+        import uvicorn
+
+        logger.warning("gunicorn is unavailable on this platform; running uvicorn directly")
+        host, _, port = (bind or f"0.0.0.0:{os.getenv('PORT', '8000')}").rpartition(":")
+        uvicorn.run(APP, host=host, port=int(port), workers=worker_count())
+        return
+
+    class Launcher(BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+
+            preload_face_modules()
+            return app
+
+    Launcher(gunicorn_options(bind)).run()
+
+
+if __name__ == "__main__":
+    run()
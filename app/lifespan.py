@@ -0,0 +1,100 @@
+"""Startup and shutdown work for each app process.
+
+Startup brings the schema up to date (serialised between processes, see
+``app.migrations.migrate``), opens the database pool's connections and
+primes the caches the first requests would otherwise fill: dashboard
+statistics, the election and candidate catalog and, for roles that serve
+faces, the face gallery index. Shutdown sends queued notifications, stops the
+process pool and closes the pool's connections. Each step's duration is
+logged.
+"""
+
+import logging
+import time
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.utils import catalog, notifications
+from app.utils.process_pool import shutdown_process_pool
+from app.utils.statistics import get_dashboard_statistics
+
+logger = logging.getLogger(__name__)
+
+
+def serves_faces() -> bool:
+    return settings.APP_ROLE in ("all", "face")
+
+
+def warm_pool():
+    """Open the pool's connections now rather than on the first requests"""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    connections = [engine.connect() for _ in range(size)]
+    for connection in connections:
+        connection.exec_driver_sql("SELECT 1")
+        connection.close()
+
+
+def prime_caches():
+    with SessionLocal() as db:
+        get_dashboard_statistics(db)
+        catalog.elections_catalog(db)
+        catalog.all_candidates_catalog(db)
+        if serves_faces():
+            from app.utils.face_identification import get_face_index
+            from app.utils.face_recognition_util import get_face_detector
+
+            # Per-thread, so this mostly loads the cascade file and modules
+            get_face_detector()
+            get_face_index(db)
+
+
+def _timed(timings: dict, name: str, step, required: bool = False):
+    started = time.perf_counter()
+    try:
+        step()
+    except Exception:
+        if required:
+            raise
+        # A cold cache only costs the first request; never refuse to start over it
+        logger.exception("Startup step %s failed", name)
+    timings[name] = (time.perf_counter() - started) * 1000
+
+
+def startup() -> dict:
+    """Run the startup steps; returns their durations in milliseconds"""
+    timings = {}
+    _timed(timings, "migrations", lambda: migrate(engine), required=True)
+    _timed(timings, "connections", warm_pool)
+    _timed(timings, "caches", prime_caches)
+    return timings
+
+
+def shutdown() -> dict:
+    """Run the shutdown steps; returns their durations in milliseconds"""
+    timings = {}
+
+    def drain_notifications():
+        if not notifications.drain(timeout=settings.SHUTDOWN_DRAIN_SECONDS):
+            logger.warning("%d notification(s) not sent before shutdown", notifications.pending())
+
+    _timed(timings, "notifications", drain_notifications)
+    _timed(timings, "process_pool", shutdown_process_pool)
+    _timed(timings, "connections", engine.dispose)
+    return timings
+
+
+def _summary(timings: dict) -> str:
+    return ", ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items())
+
+
+@asynccontextmanager
+async def lifespan(app):
+    started = time.perf_counter()
+    timings = await run_in_threadpool(startup)
+    logger.info("Startup finished in %.0f ms (%s)", (time.perf_counter() - started) * 1000, _summary(timings))
+    yield
+    started = time.perf_counter()
+    timings = await run_in_threadpool(shutdown)
+    logger.info("Shutdown finished in %.0f ms (%s)", (time.perf_counter() - started) * 1000, _summary(timings))
@@ -0,0 +1,50 @@
+"""Logging setup for the app's own loggers (``app.*``).
+
+Records carry their details twice: in the message for people reading the
+text format, and as ``extra`` fields (``user_id``, ``route``, ``duration_ms``
+...) that LOG_FORMAT=json emits as separate keys for log pipelines.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from app.config import settings
+
+FORMAT = "%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with ``extra`` fields as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    """Send ``app.*`` records at LOG_LEVEL to stderr unless logging is already set up"""
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(settings.LOG_LEVEL.upper())
+    # Defer to a configured root logger (tests, embedding servers); otherwise
+    # these records would be dropped below WARNING
+    if not logging.getLogger().handlers and not app_logger.handlers:
+        handler = logging.StreamHandler()
+        if settings.LOG_FORMAT == "json":
+            handler.setFormatter(JSONFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(FORMAT))
+        app_logger.addHandler(handler)
@@ -0,0 +1,136 @@
+"""Brotli/gzip compression of complete responses.
+
+A response is compressed when it is sent as a single body (streaming
+responses such as NDJSON listings and exports pass through), is at least
+``minimum_size`` bytes, has one of the allowed content types and has no
+Content-Encoding yet. Partial (206) responses are never touched, so byte
+ranges keep referring to the stored bytes.
+
+Compressed responses get ``Vary: Accept-Encoding`` and their ETag is made
+weak: the compressed bytes differ from the identity ones, and weak
+comparison (see ``app.utils.http_cache.etag_matches``) still lets either
+form of the tag revalidate to a 304. Brotli needs the optional ``brotli``
+package; without it gzip is used.
+"""
+
+import gzip
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only with brotli installed
+    brotli = None
+
+# Bodies above this are compressed off the event loop
+INLINE_LIMIT = 64 * 1024
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    """'br', 'gzip' or None for an Accept-Encoding header value"""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *parameters = item.strip().lower().split(";")
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip()] = quality
+    for coding in ("br", "gzip") if brotli is not None else ("gzip",):
+        if accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+def weak_etag(etag: str) -> str:
+    return etag if etag.startswith("W/") else "W/" + etag
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        content_types=("application/json",),
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = frozenset(content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        await _CompressedResponse(self, encoding, send).run(scope, receive)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+class _CompressedResponse:
+    """Rewrites the response of one request"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start = None
+
+    async def run(self, scope, receive):
+        await self.middleware.app(scope, receive, self.on_send)
+
+    def eligible(self, message) -> bool:
+        headers = Headers(raw=message["headers"])
+        media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        return (
+            message["status"] not in (204, 206, 304)
+            and "content-encoding" not in headers
+            and media_type in self.middleware.content_types
+        )
+
+    async def on_send(self, message):
+        if message["type"] == "http.response.start":
+            if self.eligible(message):
+                # Held until the first body message shows whether it streams
+                self.start = message
+            else:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.start is None:
+            await self.send(message)
+            return
+
+        start, self.start = self.start, None
+        body = message.get("body", b"")
+        if message.get("more_body", False) or len(body) < self.middleware.minimum_size:
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(scope=start)
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoding is None:
+            await self.send(start)
+            await self.send(message)
+            return
+        if len(body) > INLINE_LIMIT:
+            body = await run_in_threadpool(self.middleware.compress, body, self.encoding)
+        else:
+            body = self.middleware.compress(body, self.encoding)
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(body))
+        if "etag" in headers:
+            headers["ETag"] = weak_etag(headers["etag"])
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": body})
@@ -0,0 +1,121 @@
+"""Conditional GET handling for routes that declare a cache policy.
+
+For GET/HEAD requests routed to an endpoint decorated with
+``app.utils.http_cache.cache_policy``, the middleware:
+
+- adds the declared Cache-Control header;
+- answers 304 with no body when the response's ETag or Last-Modified show
+  the client's copy is current;
+- for successful responses without an ETag, buffers the body (up to
+  ``max_body`` bytes), hashes it into a strong ETag and applies the same
+  check, so even routes with no cheap validator save the transfer.
+
+Routes without a policy pass through untouched.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from app.utils.http_cache import etag_for, not_modified
+
+VALIDATOR_HEADERS = ("etag", "last-modified", "cache-control", "vary")
+
+
+class ConditionalRequestMiddleware:
+    def __init__(self, app, max_body: int = 1024 * 1024):
+        self.app = app
+        self.max_body = max_body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        await _ConditionalResponse(self, scope, send).run(receive)
+
+
+class _ConditionalResponse:
+    """Rewrites the response of one request"""
+
+    def __init__(self, middleware: ConditionalRequestMiddleware, scope, send):
+        self.middleware = middleware
+        self.scope = scope
+        self.send = send
+        self.request_headers = Headers(scope=scope)
+        self.start = None
+        self.body = []
+        self.size = 0
+        self.mode = "pass"
+
+    async def run(self, receive):
+        await self.middleware.app(self.scope, receive, self.on_send)
+
+    async def on_send(self, message):
+        if message["type"] == "http.response.start":
+            await self.on_start(message)
+        elif message["type"] == "http.response.body":
+            await self.on_body(message)
+        else:
+            await self.send(message)
+
+    async def on_start(self, message):
+        # The router has matched by now and recorded the endpoint in the scope
+        policy = getattr(self.scope.get("endpoint"), "cache_control", None)
+        if policy is None:
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(scope=message)
+        if "cache-control" not in headers:
+            headers["Cache-Control"] = policy
+        if message["status"] != 200:
+            await self.send(message)
+            return
+
+        if "etag" in headers or "last-modified" in headers:
+            if not_modified(self.request_headers, headers.get("etag"), headers.get("last-modified")):
+                self.mode = "not_modified"
+                await self.send_not_modified(headers)
+            else:
+                await self.send(message)
+            return
+        if self.scope["method"] == "HEAD":
+            # No body to hash
+            await self.send(message)
+            return
+        self.start = message
+        self.mode = "buffer"
+
+    async def on_body(self, message):
+        if self.mode == "pass":
+            await self.send(message)
+            return
+        if self.mode == "not_modified":
+            return
+
+        self.body.append(message.get("body", b""))
+        self.size += len(self.body[-1])
+        more_body = message.get("more_body", False)
+        if self.size > self.middleware.max_body:
+            # Too large to hold: send what we have and stream the rest unchanged
+            self.mode = "pass"
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": b"".join(self.body), "more_body": more_body})
+            return
+        if more_body:
+            return
+
+        body = b"".join(self.body)
+        headers = MutableHeaders(scope=self.start)
+        headers["ETag"] = etag_for(body)
+        if not_modified(self.request_headers, headers["etag"]):
+            await self.send_not_modified(headers)
+            return
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": body})
+
+    async def send_not_modified(self, headers: MutableHeaders):
+        kept = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers.items()
+            if name in VALIDATOR_HEADERS
+        ]
+        await self.send({"type": "http.response.start", "status": 304, "headers": kept})
+        await self.send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,165 @@
+"""Replay stored responses to retried POSTs (see ``app.utils.idempotency``).
+
+Only POSTs that carry an ``Idempotency-Key`` header and are routed to an
+endpoint marked ``idempotent`` are handled; the endpoint is found by matching
+the app's routes as the router will. The body is read up front to
+fingerprint it, then handed to the app unchanged. The response is stored
+once sent unless it is a 5xx (or the app raised), in which case the key is
+released so a retry runs the handler again.
+
+Retries get the stored status and body with ``Idempotent-Replayed: true``;
+a retry while the first request is still running gets 409, and a key reused
+with a different body gets 422.
+"""
+
+import json
+from contextlib import contextmanager
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.routing import Match
+from app.database import get_db
+from app.utils import idempotency
+
+MAX_KEY_LENGTH = 255
+
+
+def matched_route(scope, routes=None):
+    """The endpoint route the router will pick for this request, or None"""
+    for route in scope["app"].router.routes if routes is None else routes:
+        match, child_scope = route.matches(scope)
+        if match != Match.FULL:
+            continue
+        if hasattr(route, "endpoint"):
+            return route
+        # A mount or included router: look among its own routes
+        nested = getattr(getattr(route, "original_router", route), "routes", None)
+        return matched_route({**scope, **child_scope}, nested) if nested else None
+    return None
+
+
+def _json(detail: str) -> bytes:
+    return json.dumps({"detail": detail}).encode()
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, max_body: int = 64 * 1024):
+        self.app = app
+        self.max_body = max_body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        client_key = Headers(scope=scope).get("idempotency-key")
+        route = matched_route(scope) if client_key is not None else None
+        if not getattr(getattr(route, "endpoint", None), "idempotent", False):
+            await self.app(scope, receive, send)
+            return
+        # Label replies that never reach the router with the route in /metrics
+        scope["route"] = route
+
+        if not 0 < len(client_key) <= MAX_KEY_LENGTH:
+            await self.reply(send, 400, _json(f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"))
+            return
+        body = await self.read_body(receive)
+        if body is None:
+            await self.reply(send, 413, _json("Request body too large for an idempotent request"))
+            return
+
+        key = idempotency.scoped_key(
+            "POST", scope["path"], Headers(scope=scope).get("authorization", ""), client_key
+        )
+        request_fingerprint = idempotency.fingerprint(body)
+
+        def claim(db):
+            row = idempotency.claim(db, key, request_fingerprint)
+            return None if row is None else (row.fingerprint, row.status_code, row.content_type, row.body)
+
+        stored = await run_in_threadpool(self.with_session, scope, claim)
+        if stored is not None:
+            stored_fingerprint, status_code, content_type, stored_body = stored
+            if stored_fingerprint != request_fingerprint:
+                await self.reply(send, 422, _json("Idempotency-Key was already used for a different request"))
+            elif status_code is None:
+                await self.reply(
+                    send, 409, _json("A request with this Idempotency-Key is still being processed"),
+                    headers=[(b"retry-after", b"1")],
+                )
+            else:
+                await self.reply(
+                    send, status_code, stored_body, content_type, headers=[(b"idempotent-replayed", b"true")]
+                )
+            return
+
+        await self.run_once(scope, receive, send, key, body)
+
+    async def run_once(self, scope, receive, send, key: str, body: bytes):
+        """Run the handler for a newly claimed key and store what it returns"""
+        response = {"status": None, "content_type": None, "parts": [], "size": 0, "complete": False}
+        delivered = False
+
+        async def receive_body():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response["size"] += len(chunk)
+                if response["size"] <= self.max_body:
+                    response["parts"].append(chunk)
+                response["complete"] = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, capture)
+        except BaseException:
+            await run_in_threadpool(self.with_session, scope, lambda db: idempotency.release(db, key))
+            raise
+
+        if response["complete"] and response["status"] < 500 and response["size"] <= self.max_body:
+            stored = b"".join(response["parts"])
+            await run_in_threadpool(
+                self.with_session, scope,
+                lambda db: idempotency.complete(db, key, response["status"], response["content_type"], stored),
+            )
+        else:
+            await run_in_threadpool(self.with_session, scope, lambda db: idempotency.release(db, key))
+
+    async def read_body(self, receive):
+        """The whole request body, or None past ``max_body``"""
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return b"".join(chunks)
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    def with_session(scope, work):
+        # Through get_db, so dependency overrides (tests, benchmarks) apply here too
+        provider = scope["app"].dependency_overrides.get(get_db, get_db)
+        with contextmanager(provider)() as db:
+            return work(db)
+
+    @staticmethod
+    async def reply(send, status_code: int, body: bytes, content_type: str = "application/json", headers=()):
+        raw = [
+            (b"content-type", (content_type or "application/json").encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            *headers,
+        ]
+        await send({"type": "http.response.start", "status": status_code, "headers": raw})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,88 @@
+"""Per-request timing: latency and database work, by route.
+
+Each HTTP request gets a fresh ``RequestStats`` in ``current_request`` that
+the SQLAlchemy hooks in ``app.utils.metrics`` add to. When the response is
+finished its latency, query count and query time are recorded under the
+matched route's path template (``/api/votes/election/{election_id}``), so
+label cardinality stays bounded; unmatched paths share one label. Requests
+slower than ``slow_seconds`` are logged as a warning, and every request at
+DEBUG.
+
+With ``trace_queries`` (TRACE_QUERIES, off by default) any statement a
+request runs ``repeated_query_threshold`` times or more is logged as a likely
+N+1, with the project frames that first issued it.
+"""
+
+import logging
+import time
+from app.utils.metrics import (
+    RequestStats,
+    current_request,
+    request_db_duration,
+    request_db_queries,
+    request_duration,
+)
+
+logger = logging.getLogger("app.requests")
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app, slow_seconds: float = 1.0, trace_queries: bool = False, repeated_query_threshold: int = 5):
+        self.app = app
+        self.slow_seconds = slow_seconds
+        self.trace_queries = trace_queries and repeated_query_threshold > 0
+        self.repeated_query_threshold = repeated_query_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(trace=self.trace_queries)
+        token = current_request.set(stats)
+        status = 500
+
+        async def on_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, on_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = route_label(scope)
+            request_duration.observe(elapsed, method=scope["method"], route=route, status=str(status))
+            request_db_queries.observe(stats.queries, route=route)
+            request_db_duration.observe(stats.query_seconds, route=route)
+
+            slow = elapsed >= self.slow_seconds
+            if slow or logger.isEnabledFor(logging.DEBUG):
+                logger.log(
+                    logging.WARNING if slow else logging.DEBUG,
+                    "%s %s %d in %.1f ms (%d queries, %.1f ms)",
+                    scope["method"], route, status, elapsed * 1000, stats.queries, stats.query_seconds * 1000,
+                    extra={
+                        "method": scope["method"],
+                        "route": route,
+                        "status": status,
+                        "duration_ms": round(elapsed * 1000, 1),
+                        "db_queries": stats.queries,
+                        "db_ms": round(stats.query_seconds * 1000, 1),
+                    },
+                )
+            for statement, count, origin in stats.repeated(self.repeated_query_threshold):
+                logger.warning(
+                    "%s %s ran the same query %d times (likely N+1): %s\n  first run from:\n    %s",
+                    scope["method"], route, count, " ".join(statement.split()),
+                    "\n    ".join(origin) or "(no project frames)",
+                    extra={"method": scope["method"], "route": route, "repeated_query": statement, "count": count},
+                )
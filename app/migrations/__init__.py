@@ -0,0 +1,140 @@
+"""Versioned schema migrations.
+
+Each module in ``app/migrations/versions`` is named ``NNNN_description.py`` and
+defines ``revision`` (int), ``description`` (str) and ``upgrade(connection)``.
+Applied revisions are recorded in the ``schema_migrations`` table so every
+script runs exactly once per database.
+
+Revision 1 builds the schema from the current models, so later scripts must be
+idempotent (``IF NOT EXISTS`` / ``add_column_if_missing``): on a fresh database
+their changes already exist by the time they run.
+"""
+
+import hashlib
+import importlib
+import logging
+import pkgutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+from app.utils.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("revision", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def discover_migrations() -> list:
+    """Return migration modules from app.migrations.versions ordered by revision"""
+    from app.migrations import versions
+
+    modules = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        if info.name[:4].isdigit():
+            modules.append(importlib.import_module(f"{versions.__name__}.{info.name}"))
+
+    modules.sort(key=lambda module: module.revision)
+    revisions = [module.revision for module in modules]
+    if len(revisions) != len(set(revisions)):
+        raise RuntimeError(f"Duplicate migration revisions: {revisions}")
+    return modules
+
+
+def applied_revisions(connection: Connection) -> set:
+    """Return the set of revisions already applied to this database.
+
+    Read-only: a database without ``schema_migrations`` has applied nothing.
+    """
+    if not inspect(connection).has_table(schema_migrations.name):
+        return set()
+    return set(connection.execute(select(schema_migrations.c.revision)).scalars())
+
+
+def current_revision(engine: Engine) -> int:
+    """Return the highest applied revision, or 0 for an unmigrated database"""
+    with engine.begin() as connection:
+        return max(applied_revisions(connection), default=0)
+
+
+def run_migrations(engine: Engine, target: int = None) -> list:
+    """Apply pending migrations up to ``target`` (default: latest).
+
+    Returns the list of revisions applied by this call. Callers sharing a
+    database with other processes should go through ``migrate``.
+    """
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+    applied = []
+    for module in discover_migrations():
+        if target is not None and module.revision > target:
+            break
+        with engine.begin() as connection:
+            if module.revision in applied_revisions(connection):
+                continue
+            logger.info("Applying migration %04d: %s", module.revision, module.description)
+            module.upgrade(connection)
+            connection.execute(
+                schema_migrations.insert().values(
+                    revision=module.revision,
+                    description=module.description,
+                    applied_at=datetime.utcnow(),
+                )
+            )
+        applied.append(module.revision)
+    return applied
+
+
+def migration_lock_path(engine: Engine) -> Path:
+    """Lock file shared by every process on this host migrating ``engine``'s database"""
+    digest = hashlib.sha1(engine.url.render_as_string(hide_password=False).encode()).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / f"college-voting-migrate-{digest}.lock"
+
+
+def migrate(engine: Engine, target: int = None) -> list:
+    """run_migrations, serialised between processes on this host.
+
+    An up-to-date database is detected by a read-only check without the lock,
+    so workers starting together only queue up behind each other when there is
+    work. All DDL, including creating ``schema_migrations``, happens under the
+    lock.
+    """
+    modules = discover_migrations()
+    latest = modules[-1].revision if modules else 0
+    if current_revision(engine) >= (latest if target is None else min(target, latest)):
+        return []
+    with file_lock(migration_lock_path(engine)):
+        return run_migrations(engine, target=target)
+
+
+def add_column_if_missing(connection: Connection, table: str, column: str, column_type, ddl_suffix: str = "") -> bool:
+    """Add ``column`` to ``table`` unless it exists.
+
+    ``column_type`` is a SQLAlchemy type, compiled for the connection's
+    dialect (e.g. LargeBinary becomes BLOB on SQLite and BYTEA on PostgreSQL).
+    """
+    existing = {info["name"] for info in inspect(connection).get_columns(table)}
+    if column in existing:
+        return False
+    type_ddl = column_type.compile(dialect=connection.dialect)
+    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {type_ddl} {ddl_suffix}".rstrip()))
+    return True
@@ -0,0 +1,30 @@
+"""Command line entry point: python -m app.migrations [upgrade|current|history]"""
+
+import argparse
+import logging
+from app.database import engine
+from app.migrations import current_revision, discover_migrations, migrate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "current", "history"])
+    parser.add_argument("--target", type=int, default=None, help="Stop after this revision")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "upgrade":
+        applied = migrate(engine, target=args.target)
+        print(f"Applied {len(applied)} migration(s); now at revision {current_revision(engine)}")
+    elif args.command == "current":
+        print(current_revision(engine))
+    else:
+        current = current_revision(engine)
+        for module in discover_migrations():
+            marker = "*" if module.revision <= current else " "
+            print(f"{marker} {module.revision:04d}  {module.description}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""Create the base schema from the ORM models.
+
+Existing databases that were built by ``create_all`` before migrations existed
+already have these tables, in which case this revision only records itself.
+"""
+
+from app.database import Base
+from app.models import admin, candidate, election, face, login_token, otp, user, vote  # noqa: F401
+
+revision = 1
+description = "initial schema"
+
+
+def upgrade(connection):
+    Base.metadata.create_all(bind=connection)
@@ -0,0 +1,24 @@
+"""Indexes for hot-path predicates in the routers."""
+
+from sqlalchemy import text
+
+revision = 2
+description = "hot query indexes"
+
+INDEXES = [
+    # get_election_results: outer join on (candidate_id, election_id)
+    "CREATE INDEX IF NOT EXISTS ix_votes_election_candidate ON votes (election_id, candidate_id)",
+    # per-user vote lookups that do not filter on election
+    "CREATE INDEX IF NOT EXISTS ix_votes_user_id ON votes (user_id)",
+    # admin_add_candidate duplicate-name check
+    "CREATE INDEX IF NOT EXISTS ix_candidates_election_name ON candidates (election_id, name)",
+    # verify_face gallery scan of verified encodings
+    "CREATE INDEX IF NOT EXISTS ix_face_encodings_is_verified ON face_encodings (is_verified)",
+    # verify_otp code lookup
+    "CREATE INDEX IF NOT EXISTS ix_otps_user_code ON otps (user_id, otp_code)",
+]
+
+
+def upgrade(connection):
+    for statement in INDEXES:
+        connection.execute(text(statement))
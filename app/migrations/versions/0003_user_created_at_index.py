@@ -0,0 +1,10 @@
+"""Index users.created_at for the admin user listing date filters."""
+
+from sqlalchemy import text
+
+revision = 3
+description = "users created_at index"
+
+
+def upgrade(connection):
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_users_created_at ON users (created_at)"))
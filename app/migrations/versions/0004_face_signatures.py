@@ -0,0 +1,43 @@
+"""Add face_encodings.face_signature and backfill it for existing templates."""
+
+from sqlalchemy import LargeBinary, text
+from app.migrations import add_column_if_missing
+
+revision = 4
+description = "face shortlist signatures"
+
+BATCH_SIZE = 500
+
+
+def upgrade(connection):
+    from app.utils.face_recognition_util import (
+        compute_face_signature,
+        deserialize_face_encoding,
+        serialize_face_signature,
+    )
+
+    add_column_if_missing(connection, "face_encodings", "face_signature", LargeBinary())
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text(
+                "SELECT id, face_encoding FROM face_encodings "
+                "WHERE face_signature IS NULL AND id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            try:
+                signature = compute_face_signature(deserialize_face_encoding(row.face_encoding))
+            except Exception:
+                continue  # Left NULL; identification always shortlists such rows
+            updates.append({"id": row.id, "signature": serialize_face_signature(signature)})
+        if updates:
+            connection.execute(
+                text("UPDATE face_encodings SET face_signature = :signature WHERE id = :id"), updates
+            )
+        last_id = rows[-1].id
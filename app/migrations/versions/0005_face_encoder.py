@@ -0,0 +1,14 @@
+"""Record which encoder produced each face template."""
+
+from sqlalchemy import String
+from app.migrations import add_column_if_missing
+
+revision = 5
+description = "face encoder column"
+
+
+def upgrade(connection):
+    # Every template enrolled so far is a pickled crop for the histogram encoder
+    add_column_if_missing(
+        connection, "face_encodings", "encoder", String(), "NOT NULL DEFAULT 'histogram'"
+    )
@@ -0,0 +1,48 @@
+"""Move candidate posters out of candidates.poster into the blob store."""
+
+from sqlalchemy import String, inspect, text
+from sqlalchemy.orm import Session
+from app.migrations import add_column_if_missing
+
+revision = 6
+description = "candidate poster blobs"
+
+BATCH_SIZE = 50
+
+
+def upgrade(connection):
+    from app.models.poster import Blob, CandidatePoster
+    from app.utils import posters
+
+    Blob.__table__.create(connection, checkfirst=True)
+    CandidatePoster.__table__.create(connection, checkfirst=True)
+    add_column_if_missing(connection, "candidates", "poster_key", String())
+
+    columns = {column["name"] for column in inspect(connection).get_columns("candidates")}
+    if "poster" not in columns:
+        return
+
+    # Data URLs are converted and cleared; anything undecodable is left in place
+    session = Session(bind=connection)
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text(
+                "SELECT id, poster FROM candidates "
+                "WHERE poster IS NOT NULL AND poster != '' AND id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            try:
+                key = posters.store_poster(session, row.id, posters.decode_upload(row.poster))
+            except ValueError:
+                continue
+            connection.execute(
+                text("UPDATE candidates SET poster = NULL, poster_key = :key WHERE id = :id"),
+                {"key": key, "id": row.id},
+            )
+        last_id = rows[-1].id
+    session.close()
@@ -0,0 +1,10 @@
+"""Store the outcome of requests sent with an Idempotency-Key."""
+
+revision = 7
+description = "idempotency keys"
+
+
+def upgrade(connection):
+    from app.models.idempotency import IdempotencyKey
+
+    IdempotencyKey.__table__.create(connection, checkfirst=True)
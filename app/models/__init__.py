@@ -4,5 +4,7 @@ from app.models.candidate import Candidate
 from app.models.vote import Vote
 from app.models.otp import OTP
 from app.models.face import FaceEncoding
+from app.models.poster import Blob, CandidatePoster
+from app.models.idempotency import IdempotencyKey
 
-__all__ = ["User", "Election", "Candidate", "Vote", "OTP", "FaceEncoding"]
+__all__ = ["User", "Election", "Candidate", "Vote", "OTP", "FaceEncoding", "Blob", "CandidatePoster", "IdempotencyKey"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -16,12 +16,33 @@ class Candidate(Base):
     hashed_password = Column(String, nullable=True)
     campaign_message = Column(Text, nullable=True)
     about = Column(Text, nullable=True)
-    poster = Column(Text, nullable=True)
+    poster_key = Column(String, nullable=True)  # Blob key of the original poster upload
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     election = relationship("Election", back_populates="candidates")
     votes = relationship("Vote", back_populates="candidate")
+    posters = relationship("CandidatePoster", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Serves the duplicate-name check in admin_add_candidate
+        Index("ix_candidates_election_name", "election_id", "name"),
+    )
+
+    @property
+    def poster(self):
+        """URL of the poster sized for display, or None"""
+        return self._poster_url("large")
+
+    @property
+    def poster_thumbnail(self):
+        return self._poster_url("thumb")
+
+    def _poster_url(self, size: str):
+        if not self.poster_key:
+            return None
+        # The version parameter changes with every upload, so the URL can be cached forever
+        return f"/api/candidates/{self.id}/poster?size={size}&v={self.poster_key[:16]}"
 
     def __repr__(self):
         return f"<Candidate(id={self.id}, name={self.name}, election_id={self.election_id})>"
@@ -11,8 +11,10 @@ class FaceEncoding(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)
     face_encoding = Column(LargeBinary, nullable=False)  # Serialized numpy array
     face_image = Column(LargeBinary, nullable=True)  # Optional original image
+    face_signature = Column(LargeBinary, nullable=True)  # float32 shortlist signature
+    encoder = Column(String, nullable=False, default="histogram", server_default="histogram")  # Encoder that produced face_encoding
     confidence_score = Column(Float, default=0.0)  # Face detection confidence
-    is_verified = Column(String, default="pending")  # pending, verified, failed
+    is_verified = Column(String, default="pending", index=True)  # pending, verified, failed
     created_at = Column(DateTime, default=datetime.utcnow)
     verified_at = Column(DateTime, nullable=True)
     last_used_at = Column(DateTime, nullable=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """Outcome of a request sent with an Idempotency-Key (see app.utils.idempotency)"""
+
+    __tablename__ = "idempotency_keys"
+
+    # SHA-256 of the route, the caller's credentials and the client's key
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 of the request body
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is in flight
+    content_type = Column(String, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key={self.key[:12]}, status={self.status_code})>"
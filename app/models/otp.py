@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 from app.database import Base
@@ -17,6 +17,11 @@ class OTP(Base):
 
     user = relationship("User")
 
+    __table_args__ = (
+        # Serves the code lookup in verify_otp
+        Index("ix_otps_user_code", "user_id", "otp_code"),
+    )
+
     def is_expired(self) -> bool:
         return datetime.utcnow() > self.expires_at
 
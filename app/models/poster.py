@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import deferred, relationship
+from datetime import datetime
+from app.database import Base
+
+
+class Blob(Base):
+    """Uploaded bytes keyed by their SHA-256 (see app.utils.blob_store)"""
+
+    __tablename__ = "blobs"
+
+    key = Column(String(64), primary_key=True)
+    content_type = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    data = deferred(Column(LargeBinary, nullable=True))  # NULL when kept in BLOB_STORE_DIR
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Blob(key={self.key[:12]}, type={self.content_type}, size={self.size})>"
+
+
+class CandidatePoster(Base):
+    """One rendition of a candidate's campaign poster"""
+
+    __tablename__ = "candidate_posters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False, index=True)
+    variant = Column(String, nullable=False)  # original, large.jpeg, large.webp, thumb.jpeg, thumb.webp
+    blob_key = Column(String(64), ForeignKey("blobs.key"), nullable=False, index=True)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    blob = relationship("Blob")
+
+    __table_args__ = (
+        UniqueConstraint("candidate_id", "variant", name="unique_candidate_poster_variant"),
+    )
+
+    def __repr__(self):
+        return f"<CandidatePoster(candidate_id={self.candidate_id}, variant={self.variant})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -8,7 +8,7 @@ class Vote(Base):
     __tablename__ = "votes"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     election_id = Column(Integer, ForeignKey("elections.id"), nullable=False)
     candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -19,6 +19,8 @@ class Vote(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "election_id", name="unique_user_election_vote"),
+        # Serves the per-election tally join in get_election_results
+        Index("ix_votes_election_candidate", "election_id", "candidate_id"),
     )
 
     def __repr__(self):
@@ -1,22 +1,47 @@
 """Admin routes for authentication and management"""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import jwt
 from app.database import get_db
 from app.models.admin import Admin
 from app.models.candidate import Candidate
 from app.models.election import Election
+from app.models.user import User
 from app.schemas.admin import AdminCreate, AdminLogin, AdminResponse, AdminToken
 from app.schemas.candidate import CandidateCreate, CandidateResponse
 from app.utils.security import get_password_hash, verify_password
+from app.utils import catalog
+from app.utils.fast_json import dumps, json_response
+from app.utils.http_cache import cache_policy
+from app.utils.statistics import get_dashboard_statistics as cached_dashboard_statistics
+from app.utils.exports import FORMATS as EXPORT_FORMATS, ExportUnavailable, export_election, export_filename
+from app.utils.uploads import spool_request_body
+from app.utils.voter_import import import_voter_roll
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    check_prefix,
+    decode_cursor,
+    encode_cursor,
+    prefix_upper_bound,
+)
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Rows fetched per round trip when streaming NDJSON listings
+NDJSON_BATCH_SIZE = 500
+
 
 def get_current_admin(
     token: str = Depends(oauth2_scheme),
@@ -59,14 +84,10 @@ def register_admin(
     db: Session = Depends(get_db)
 ):
     """Register a new admin account"""
-    print(f"\n{'='*60}")
-    print(f"[ADMIN REGISTER] Registering admin: {admin.email}")
-    print(f"{'='*60}")
-    
     # Check if admin already exists
     existing_admin = db.query(Admin).filter(Admin.email == admin.email).first()
     if existing_admin:
-        print(f"[ERROR] Admin already exists: {admin.email}")
+        logger.info("Admin registration refused: %s already exists", admin.email, extra={"email": admin.email})
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Admin with this email already exists"
@@ -84,8 +105,7 @@ def register_admin(
     db.commit()
     db.refresh(db_admin)
     
-    print(f"[OK] Admin registered successfully: {db_admin.email}")
-    print(f"{'='*60}\n")
+    logger.info("Admin registered: %s", db_admin.email, extra={"admin_id": db_admin.id, "email": db_admin.email})
     
     return db_admin
 
@@ -96,14 +116,10 @@ def login_admin(
     db: Session = Depends(get_db)
 ):
     """Admin login endpoint"""
-    print(f"\n{'='*60}")
-    print(f"[ADMIN LOGIN] Login attempt for: {admin_login.email}")
-    print(f"{'='*60}")
-    
     # Find admin by email
     admin = db.query(Admin).filter(Admin.email == admin_login.email).first()
     if not admin:
-        print(f"[ERROR] Admin not found: {admin_login.email}")
+        logger.warning("Admin login failed: unknown email %s", admin_login.email, extra={"email": admin_login.email})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -111,14 +127,14 @@ def login_admin(
     
     # Verify password
     if not verify_password(admin_login.password, admin.hashed_password):
-        print(f"[ERROR] Invalid password for admin: {admin_login.email}")
+        logger.warning("Admin login failed: wrong password for %s", admin_login.email, extra={"admin_id": admin.id})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
     if not admin.is_active:
-        print(f"[ERROR] Admin account is inactive: {admin_login.email}")
+        logger.warning("Admin login failed: %s is inactive", admin_login.email, extra={"admin_id": admin.id})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Admin account is inactive"
@@ -141,9 +157,7 @@ def login_admin(
         algorithm=settings.ALGORITHM
     )
     
-    print(f"[OK] Admin logged in successfully: {admin.email}")
-    print(f"[OK] Token generated for admin ID: {admin.id}")
-    print(f"{'='*60}\n")
+    logger.info("Admin logged in: %s", admin.email, extra={"admin_id": admin.id})
     
     return {
         "access_token": encoded_jwt,
@@ -159,50 +173,193 @@ async def get_admin_profile(token: str = Depends(oauth2_scheme), db: Session = D
     return current_admin
 
 
+USER_LISTING_COLUMNS = ("id", "email", "full_name", "roll_number", "created_at")
+
+
+def _user_listing_query(
+    db: Session,
+    after_id: Optional[int],
+    roll_prefix: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+):
+    """Column-only user query ordered by id for keyset pagination"""
+    query = db.query(*(getattr(User, column) for column in USER_LISTING_COLUMNS))
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+    if roll_prefix:
+        # Range predicate so the roll_number index serves the prefix match
+        query = query.filter(User.roll_number >= check_prefix(roll_prefix))
+        upper_bound = prefix_upper_bound(roll_prefix)
+        if upper_bound is not None:
+            query = query.filter(User.roll_number < upper_bound)
+    if created_from is not None:
+        query = query.filter(User.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(User.created_at < created_to)
+    return query.order_by(User.id)
+
+
+def _user_listing_row(row) -> dict:
+    return {
+        "id": row.id,
+        "email": row.email,
+        "full_name": row.full_name,
+        "roll_number": row.roll_number,
+        "created_at": row.created_at.isoformat() if row.created_at else None
+    }
+
+
 @router.get("/users")
-async def get_all_users(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get all users (Admin only)"""
+async def get_all_users(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    roll_prefix: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """List users with keyset pagination (Admin only)
+
+    JSON mode returns one page of at most ``limit`` users ordered by id; the
+    cursor for the next page is sent in the ``X-Next-Cursor`` header and is
+    absent on the last page. NDJSON mode streams every matching user after
+    ``cursor`` from a server-side cursor without building the list in memory.
+    """
     current_admin = get_current_admin(token=token, db=db)
-    
-    from app.models.user import User
-    
-    # Get all users from database
-    users = db.query(User).all()
-    
-    return [
-        {
-            "id": user.id,
-            "email": user.email,
-            "full_name": user.full_name,
-            "roll_number": user.roll_number,
-            "created_at": user.created_at.isoformat() if user.created_at else None
-        }
-        for user in users
-    ]
+
+    query = _user_listing_query(db, decode_cursor(cursor), roll_prefix, created_from, created_to)
+
+    if format == "ndjson":
+        rows = query.execution_options(stream_results=True, yield_per=NDJSON_BATCH_SIZE)
+
+        def stream_users():
+            for row in rows:
+                yield dumps(_user_listing_row(row)) + b"\n"
+
+        return StreamingResponse(stream_users(), media_type="application/x-ndjson")
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.limit(limit + 1).all()
+    page = rows[:limit]
+
+    response = json_response([_user_listing_row(row) for row in page])
+    if len(rows) > limit:
+        next_cursor = encode_cursor(page[-1].id)
+        response.headers["X-Next-Cursor"] = next_cursor
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
+
+
+@router.post("/users/import")
+async def import_users(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    notify: bool = True,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """Bulk-import students from a CSV or NDJSON body (Admin only)
+
+    Columns/keys: roll_number, email, full_name and optional password. The
+    format comes from ``format`` or the Content-Type header. Invalid or
+    duplicate rows are listed in the report; the rest are imported and, if
+    ``notify`` is set, sent a login link in the background.
+    """
+    current_admin = get_current_admin(token=token, db=db)
+
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "json" in content_type else "csv"
+
+    spool = await spool_request_body(request)
+    try:
+        report = await run_in_threadpool(import_voter_roll, db, spool, format, notify)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        spool.close()
+
+    return report
+
+
+@router.post("/faces/import")
+async def import_face_photos(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(zip|tar)$"),
+    store_images: bool = True,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """Enroll students' faces from a zip or tar of photos named by roll number (Admin only)
+
+    Streams one NDJSON status line per image (enrolled, updated or failed),
+    then a summary line. Existing face registrations are replaced. The format
+    is detected from the archive when ``format`` is omitted; tar may be
+    gzip/bz2/xz compressed.
+    """
+    current_admin = get_current_admin(token=token, db=db)
+    # Loads OpenCV; kept out of module import like the face routes
+    from app.utils.face_import import import_faces
+
+    spool = await spool_request_body(request)
+    try:
+        lines = await run_in_threadpool(import_faces, db, spool, format, None, store_images)
+    except ValueError as e:
+        spool.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    def report():
+        try:
+            yield from lines
+        finally:
+            spool.close()
+
+    return StreamingResponse(report(), media_type="application/x-ndjson")
+
+
+@router.get("/elections/{election_id}/export")
+async def export_election_data(
+    election_id: int,
+    dataset: str = Query("votes", pattern="^(votes|tallies)$"),
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet|arrow)$"),
+    gzip: bool = False,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """Stream raw votes or per-candidate tallies for an election (Admin only)"""
+    current_admin = get_current_admin(token=token, db=db)
+
+    election = db.query(Election).filter(Election.id == election_id).first()
+    if not election:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Election not found"
+        )
+
+    try:
+        chunks = export_election(db, election_id, dataset, format, gzip=gzip)
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+
+    filename = export_filename(election_id, dataset, format, gzip=gzip)
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format][0],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/statistics/dashboard")
+@cache_policy("private, no-cache")
 async def get_dashboard_statistics(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get dashboard statistics - users, elections, candidates, votes (admin only)"""
+    """Get dashboard statistics - users, elections, candidates, votes and per-election turnout (admin only)"""
     current_admin = get_current_admin(token=token, db=db)
-    
-    from app.models.user import User
-    from app.models.election import Election
-    from app.models.candidate import Candidate
-    from app.models.vote import Vote
-    
-    # Get counts from database
-    total_users = db.query(User).count()
-    total_elections = db.query(Election).count()
-    total_candidates = db.query(Candidate).count()
-    total_votes = db.query(Vote).count()
-    
-    return {
-        "total_users": total_users,
-        "total_elections": total_elections,
-        "total_candidates": total_candidates,
-        "total_votes": total_votes
-    }
+    return json_response(await run_in_threadpool(cached_dashboard_statistics, db))
 
 
 @router.get("/{admin_id}", response_model=AdminResponse)
@@ -227,29 +384,21 @@ async def admin_add_candidate(
     """Add a candidate to an election (Admin only)"""
     current_admin = get_current_admin(token=token, db=db)
     
-    print(f"\n{'='*60}")
-    print(f"[ADMIN ADD CANDIDATE] Admin {current_admin.email} adding candidate")
-    print(f"[ADMIN ADD CANDIDATE] Election ID: {candidate.election_id}")
-    print(f"[ADMIN ADD CANDIDATE] Candidate: {candidate.name}")
-    print(f"{'='*60}")
-    
     # Verify election exists
     election = db.query(Election).filter(Election.id == candidate.election_id).first()
     if not election:
-        print(f"[ERROR] Election not found: {candidate.election_id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Election with ID {candidate.election_id} not found"
         )
     
     # Check if candidate with same name already exists in this election
-    existing_candidate = db.query(Candidate).filter(
+    existing_candidate = db.query(Candidate.id).filter(
         Candidate.election_id == candidate.election_id,
         Candidate.name == candidate.name
     ).first()
     
     if existing_candidate:
-        print(f"[ERROR] Candidate already exists in this election: {candidate.name}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Candidate '{candidate.name}' already exists in this election"
@@ -266,12 +415,14 @@ async def admin_add_candidate(
     
     db.add(db_candidate)
     db.commit()
+    catalog.invalidate()
     db.refresh(db_candidate)
     
-    print(f"[OK] Candidate added successfully: {db_candidate.name} (ID: {db_candidate.id})")
-    print(f"[OK] Election ID: {db_candidate.election_id}")
-    print(f"[OK] Symbol Number: {db_candidate.symbol_number}")
-    print(f"{'='*60}\n")
+    logger.info(
+        "Admin %s added candidate %s to election %d",
+        current_admin.email, db_candidate.name, db_candidate.election_id,
+        extra={"admin_id": current_admin.id, "candidate_id": db_candidate.id, "election_id": db_candidate.election_id},
+    )
     
     return db_candidate
 
@@ -285,11 +436,6 @@ async def create_election(
     """Create a new election (Admin only)"""
     current_admin = get_current_admin(token=token, db=db)
     
-    print(f"\n{'='*60}")
-    print(f"[ADMIN CREATE ELECTION] Admin {current_admin.email} creating election")
-    print(f"[ADMIN CREATE ELECTION] Election data: {election_data}")
-    print(f"{'='*60}")
-    
     # Extract name/title and description from the request
     election_title = election_data.get("name") or election_data.get("title")
     election_description = election_data.get("description", "")
@@ -313,10 +459,13 @@ async def create_election(
     
     db.add(db_election)
     db.commit()
+    catalog.invalidate()
     db.refresh(db_election)
     
-    print(f"[OK] Election created successfully: {db_election.title} (ID: {db_election.id})")
-    print(f"{'='*60}\n")
+    logger.info(
+        "Admin %s created election %s", current_admin.email, db_election.title,
+        extra={"admin_id": current_admin.id, "election_id": db_election.id},
+    )
     
     return {
         "id": db_election.id,
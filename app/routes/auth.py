@@ -1,6 +1,8 @@
+import logging
 from datetime import timedelta, datetime
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload
 import secrets
 from app.database import get_db
 from app.models.user import User
@@ -13,26 +15,29 @@ from app.utils.security import (
 )
 from app.utils.email import send_welcome_email, send_login_link_email
 from app.config import settings
+from app.utils.idempotency import idempotent
 from app.utils.otp import create_otp_for_user
 from app.utils.email import send_otp_email
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserResponse)
+@idempotent
 def register(user: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     try:
-        # Check if email already exists
-        db_user = db.query(User).filter(User.email == user.email).first()
-        if db_user:
+        # Check if email or roll number already exists (one query for both)
+        taken = db.query(User.email, User.roll_number).filter(
+            or_(User.email == user.email, User.roll_number == user.roll_number)
+        ).all()
+        if any(email == user.email for email, _ in taken):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
             )
-
-        # Check if roll number already exists
-        db_user = db.query(User).filter(User.roll_number == user.roll_number).first()
-        if db_user:
+        if taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Roll number already registered",
@@ -47,83 +52,57 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
             hashed_password=hashed_password,
         )
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        db.flush()
+        # Every column has a Python-side default, so the flushed row is complete;
+        # reading it now saves reloading it after each commit below
+        registered = UserResponse.model_validate(db_user)
         
-        print(f"\n{'='*60}")
-        print(f"[REGISTRATION] User created successfully")
-        print(f"  Email: {db_user.email}")
-        print(f"  User ID: {db_user.id}")
-        print(f"{'='*60}\n")
-        
-        # Generate login token
+        # Generate login token (committed together with the user)
         login_token = secrets.token_urlsafe(32)
         login_link_record = LoginToken(
-            user_id=db_user.id,
+            user_id=registered.id,
             token=login_token,
             expires_at=datetime.utcnow() + timedelta(hours=24)
         )
         db.add(login_link_record)
         db.commit()
+        logger.info("Registered %s", registered.email, extra={"user_id": registered.id})
         
         # Send welcome email with login link
         try:
-            print(f"\n{'='*60}")
-            print(f"[WELCOME EMAIL] Sending welcome email to {db_user.email}...")
             login_url = f"{settings.FRONTEND_URL}/login?token={login_token}"
-            send_login_link_email(db_user.email, db_user.full_name, login_url)
-            print(f"[WELCOME EMAIL] ✓ Email sent successfully")
-            print(f"{'='*60}\n")
-        except Exception as email_error:
-            print(f"[WELCOME EMAIL] ✗ Error sending welcome email: {str(email_error)}")
-            print(f"{'='*60}\n")
+            send_login_link_email(registered.email, registered.full_name, login_url)
+        except Exception:
+            logger.exception("Could not send the login link to %s", registered.email, extra={"user_id": registered.id})
         
         # Generate and send OTP for email verification
         otp_code = None
         try:
-            print(f"\n{'='*60}")
-            print(f"[OTP GENERATION] Generating OTP for {db_user.email}...")
-            otp_code = create_otp_for_user(db, db_user.id)
-            print(f"[OTP GENERATION] ✓ OTP generated: {otp_code}")
-            print(f"[OTP GENERATION] OTP will expire in 10 minutes")
-            print(f"{'='*60}\n")
-            
+            otp_code = create_otp_for_user(db, registered.id)
+
             # Send OTP via email
             try:
-                print(f"\n{'='*60}")
-                print(f"[OTP EMAIL] Sending OTP email to {db_user.email}...")
-                email_sent = send_otp_email(db_user.email, otp_code, db_user.full_name)
-                
-                if email_sent:
-                    print(f"[OTP EMAIL] ✓ OTP email sent successfully!")
-                    print(f"[OTP EMAIL] User can now verify their email")
-                else:
-                    print(f"[OTP EMAIL] ✗ Failed to send OTP email")
-                    print(f"[OTP EMAIL] User registration is complete but email verification pending")
-                print(f"{'='*60}\n")
-            except Exception as otp_email_error:
-                print(f"[OTP EMAIL] ✗ Error sending OTP email: {str(otp_email_error)}")
-                print(f"{'='*60}\n")
-                
-        except Exception as otp_error:
-            print(f"[OTP GENERATION] ✗ Error generating OTP: {str(otp_error)}")
-            print(f"[OTP GENERATION] Registration successful but OTP verification unavailable")
-            print(f"{'='*60}\n")
-            import traceback
-            traceback.print_exc()
+                if not send_otp_email(registered.email, otp_code, registered.full_name):
+                    logger.warning(
+                        "OTP email to %s not sent; verification is pending", registered.email,
+                        extra={"user_id": registered.id},
+                    )
+            except Exception:
+                logger.exception("Could not send the OTP email to %s", registered.email, extra={"user_id": registered.id})
+
+        except Exception:
+            logger.exception(
+                "Could not generate an OTP for %s; registered without verification", registered.email,
+                extra={"user_id": registered.id},
+            )
         
-        return db_user
+        return registered
         
     except HTTPException:
         # Re-raise HTTP exceptions (validation errors)
         raise
-    except Exception as e:
-        print(f"\n{'='*60}")
-        print(f"[REGISTRATION ERROR] Unexpected error during registration")
-        print(f"  Error: {str(e)}")
-        print(f"{'='*60}\n")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Registration failed for %s", user.email)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Registration failed. Please try again."
@@ -160,7 +139,9 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
 @router.post("/login-with-token", response_model=TokenResponse)
 def login_with_token(token: str, db: Session = Depends(get_db)):
     """Login user using email verification token"""
-    login_token = db.query(LoginToken).filter(LoginToken.token == token).first()
+    login_token = db.query(LoginToken).options(joinedload(LoginToken.user)).filter(
+        LoginToken.token == token
+    ).first()
     
     if not login_token:
         raise HTTPException(
@@ -174,7 +155,7 @@ def login_with_token(token: str, db: Session = Depends(get_db)):
             detail="Login link has expired. Please register again or request a new link."
         )
     
-    db_user = db.query(User).filter(User.id == login_token.user_id).first()
+    db_user = login_token.user
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -187,6 +168,9 @@ def login_with_token(token: str, db: Session = Depends(get_db)):
             detail="User account is inactive"
         )
     
+    # Read before committing, which expires the row
+    user_response = UserResponse.model_validate(db_user)
+
     # Mark token as used
     login_token.is_used = True
     login_token.used_at = datetime.utcnow()
@@ -197,11 +181,11 @@ def login_with_token(token: str, db: Session = Depends(get_db)):
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
     access_token = create_access_token(
-        data={"sub": db_user.email}, expires_delta=access_token_expires
+        data={"sub": user_response.email}, expires_delta=access_token_expires
     )
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": db_user,
+        "user": user_response,
     }
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.database import get_db
 from app.models.candidate import Candidate
+from app.utils import catalog, posters
+from app.utils.http_cache import cache_policy, conditional, stamp_etag
 from app.utils.security import verify_password, get_password_hash, create_access_token
 from datetime import timedelta
 
@@ -69,15 +71,19 @@ def candidate_login(credentials: CandidateLoginRequest, db: Session = Depends(ge
 
 
 @router.get("/profile/{candidate_id}", response_model=CandidateProfileResponse)
-def get_candidate_profile(candidate_id: int, db: Session = Depends(get_db)):
+@cache_policy("public, no-cache")
+def get_candidate_profile(candidate_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get candidate profile"""
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    # Check the client's copy before loading the row and its poster
+    updated_at = db.query(Candidate.updated_at).filter(Candidate.id == candidate_id).first()
     
-    if not candidate:
+    if not updated_at:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Candidate not found"
         )
+    conditional(request, response, stamp_etag("profile", candidate_id, updated_at[0]), updated_at[0])
+    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
     
     return {
         "id": candidate.id,
@@ -108,9 +114,20 @@ def update_candidate_profile(
     
     candidate.campaign_message = update_data.campaign_message
     candidate.about = update_data.about
-    if update_data.poster:
-        candidate.poster = update_data.poster
+    # The current poster comes back as its URL; only new image data is stored
+    if posters.is_upload(update_data.poster):
+        try:
+            data = posters.decode_upload(update_data.poster)
+            candidate.poster_key = posters.store_poster(db, candidate.id, data)
+        except ValueError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
     db.commit()
+    catalog.invalidate()
+    posters.collect_garbage(db)
     db.refresh(candidate)
     
     return {
@@ -1,36 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.candidate import Candidate
 from app.models.election import Election
 from app.models.user import User, UserRole
 from app.models.admin import Admin
+from app.models.poster import CandidatePoster
 from app.schemas.candidate import CandidateCreate, CandidateResponse
+from app.utils import blob_store, catalog, posters
+from app.utils.fieldsets import requested_fields
+from app.utils.http_cache import byte_range, cache_policy, cached_json_response, conditional, stamp_etag
 from app.utils.security import get_current_user
 
 router = APIRouter(prefix="/api/candidates", tags=["candidates"])
 
-
 @router.get("/all")
-def get_all_candidates(db: Session = Depends(get_db)):
+@cache_policy("public, no-cache")
+def get_all_candidates(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,symbol_number"),
+    db: Session = Depends(get_db),
+):
     """Get all candidates"""
+    fieldset = requested_fields(fields, catalog.CANDIDATE_SUMMARY_FIELDS)
     try:
-        candidates = db.query(Candidate).all()
-        result = []
-        for c in candidates:
-            result.append({
-                "id": c.id,
-                "name": c.name,
-                "election_id": c.election_id,
-                "symbol_number": c.symbol_number,
-                "description": c.description if c.description else ""
-            })
-        return result
+        entry = catalog.all_candidates_catalog(db, fieldset)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching candidates: {str(e)}"
         )
+    return cached_json_response(entry.body, entry.etag)
 
 
 @router.post("/", response_model=CandidateResponse)
@@ -53,28 +53,87 @@ def create_candidate(
     db_candidate = Candidate(**candidate.dict())
     db.add(db_candidate)
     db.commit()
+    catalog.invalidate()
     db.refresh(db_candidate)
     return db_candidate
 
 
 @router.get("/election/{election_id}", response_model=list[CandidateResponse])
-def get_election_candidates(election_id: int, db: Session = Depends(get_db)):
+@cache_policy("public, no-cache")
+def get_election_candidates(
+    election_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,symbol_number"),
+    db: Session = Depends(get_db),
+):
     """Get all candidates for an election"""
-    candidates = db.query(Candidate).filter(
-        Candidate.election_id == election_id
-    ).all()
-    return candidates
+    fieldset = requested_fields(fields, catalog.CANDIDATE_FIELDS)
+    try:
+        entry = catalog.election_candidates_catalog(db, election_id, fieldset)
+    except catalog.ElectionNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Election not found"
+        )
+    return cached_json_response(entry.body, entry.etag)
 
 
 @router.get("/{candidate_id}", response_model=CandidateResponse)
-def get_candidate(candidate_id: int, db: Session = Depends(get_db)):
+@cache_policy("public, no-cache")
+def get_candidate(candidate_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get candidate by ID"""
-    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
-    if not candidate:
+    # Check the client's copy before loading the row and its poster
+    updated_at = db.query(Candidate.updated_at).filter(Candidate.id == candidate_id).first()
+    if not updated_at:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found"
         )
-    return candidate
+    conditional(request, response, stamp_etag("candidate", candidate_id, updated_at[0]), updated_at[0])
+    return db.query(Candidate).filter(Candidate.id == candidate_id).first()
+
+
+@router.get("/{candidate_id}/poster")
+@cache_policy("public, no-cache")
+def get_candidate_poster(
+    candidate_id: int,
+    request: Request,
+    size: Literal["original", "large", "thumb"] = "large",
+    format: Optional[Literal["jpeg", "webp"]] = None,
+    v: Optional[str] = Query(None, description="Poster version from the candidate's poster URL"),
+    db: Session = Depends(get_db),
+):
+    """Serve a candidate's campaign poster (supports Range and conditional requests)"""
+    poster_key = db.query(Candidate.poster_key).filter(Candidate.id == candidate_id).scalar()
+    variant = "original"
+    if size != "original":
+        variant = f"{size}.{format or posters.negotiate_format(request.headers.get('accept'))}"
+    poster = None
+    if poster_key:
+        poster = db.query(CandidatePoster).filter(
+            CandidatePoster.candidate_id == candidate_id, CandidatePoster.variant == variant
+        ).first()
+    if poster is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Poster not found"
+        )
+
+    blob = poster.blob
+    etag = f'"{blob.key}"'
+    headers = {"Accept-Ranges": "bytes", "Vary": "Accept"}
+    if v and poster_key.startswith(v):
+        # Versioned URLs name one upload, whose bytes never change
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    response = Response(media_type=blob.content_type, headers=headers)
+    conditional(request, response, etag)
+
+    requested = byte_range(request, blob.size, etag)
+    if requested is None:
+        response.body = blob_store.read(db, blob)
+    else:
+        start, end = requested
+        response.status_code = status.HTTP_206_PARTIAL_CONTENT
+        response.headers["Content-Range"] = f"bytes {start}-{end - 1}/{blob.size}"
+        response.body = blob_store.read(db, blob, start, end)
+    response.headers["Content-Length"] = str(len(response.body))
+    return response
 
 
 @router.put("/{candidate_id}", response_model=CandidateResponse)
@@ -100,6 +159,7 @@ def update_candidate(
         setattr(db_candidate, key, value)
 
     db.commit()
+    catalog.invalidate()
     db.refresh(db_candidate)
     return db_candidate
 
@@ -124,3 +184,5 @@ def delete_candidate(
 
     db.delete(db_candidate)
     db.commit()
+    catalog.invalidate()
+    posters.collect_garbage(db)
@@ -1,12 +1,15 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.election import Election
-from app.models.candidate import Candidate
 from app.models.user import User, UserRole
 from app.schemas.election import ElectionCreate, ElectionUpdate, ElectionResponse
 from app.schemas.candidate import CandidateResponse
+from app.utils import catalog, posters
+from app.utils.fieldsets import requested_fields
+from app.utils.http_cache import cache_policy, cached_json_response, conditional, stamp_etag
 from app.utils.security import get_current_user
 
 router = APIRouter(prefix="/api/elections", tags=["elections"])
@@ -27,37 +30,29 @@ def create_election(
     db_election = Election(**election.dict())
     db.add(db_election)
     db.commit()
+    catalog.invalidate()
     db.refresh(db_election)
     return db_election
 
 
 @router.get("/", response_model=list)
+@cache_policy("public, no-cache")
 def get_elections(db: Session = Depends(get_db)):
     """Get all elections"""
-    elections = db.query(Election).all()
-    # Return a simple dict list that includes id, title, description, and other fields
-    result = []
-    for election in elections:
-        result.append({
-            "id": election.id,
-            "name": election.title,
-            "title": election.title,
-            "description": election.description,
-            "status": election.status if election.status else None,
-            "is_active": election.is_active,
-            "created_at": election.created_at.isoformat() if election.created_at else None
-        })
-    return result
+    entry = catalog.elections_catalog(db)
+    return cached_json_response(entry.body, entry.etag)
 
 
 @router.get("/{election_id}", response_model=ElectionResponse)
-def get_election(election_id: int, db: Session = Depends(get_db)):
+@cache_policy("public, no-cache")
+def get_election(election_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get election by ID"""
     election = db.query(Election).filter(Election.id == election_id).first()
     if not election:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Election not found"
         )
+    conditional(request, response, stamp_etag("election", election.id, election.updated_at), election.updated_at)
     return election
 
 
@@ -86,6 +81,7 @@ def update_election(
 
     db_election.updated_at = datetime.utcnow()
     db.commit()
+    catalog.invalidate()
     db.refresh(db_election)
     return db_election
 
@@ -110,12 +106,23 @@ def delete_election(
 
     db.delete(db_election)
     db.commit()
+    catalog.invalidate()
+    posters.collect_garbage(db)
 
 
 @router.get("/{election_id}/candidates", response_model=list[CandidateResponse])
-def get_election_candidates(election_id: int, db: Session = Depends(get_db)):
+@cache_policy("public, no-cache")
+def get_election_candidates(
+    election_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,symbol_number"),
+    db: Session = Depends(get_db),
+):
     """Get all candidates for an election"""
-    candidates = db.query(Candidate).filter(
-        Candidate.election_id == election_id
-    ).all()
-    return candidates
+    fieldset = requested_fields(fields, catalog.CANDIDATE_FIELDS)
+    try:
+        entry = catalog.election_candidates_catalog(db, election_id, fieldset)
+    except catalog.ElectionNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Election not found"
+        )
+    return cached_json_response(entry.body, entry.etag)
@@ -2,39 +2,64 @@ from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
 from sqlalchemy.orm import Session
 from datetime import datetime
 import base64
+from app.config import settings
 from app.database import get_db
 from app.models.user import User
 from app.models.face import FaceEncoding
 from app.schemas.face import FaceRegisterRequest, FaceVerifyRequest, FaceStatusResponse
+from app.utils.http_cache import cache_policy
+from app.utils.metrics import timed
 from app.utils.security import get_current_user
-from app.utils.face_recognition_util import (
-    encode_face_from_image,
-    serialize_face_encoding,
-    deserialize_face_encoding,
-    verify_face_from_stored_encoding
-)
+
+# The face utilities (OpenCV, NumPy, PIL) are imported inside the handlers, so
+# importing the app, CLI scripts and workers that never serve face requests do
+# not pay for them; the first face request loads them once per process.
 
 router = APIRouter(prefix="/api/face", tags=["face-recognition"])
 
 
-@router.post("/register")
-def register_face(
-    request: FaceRegisterRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Register user's face for authentication"""
+def decode_face_request(request) -> tuple:
+    """Decode the uploaded image of a register/verify request.
+
+    Returns (image_bytes, options) where options are the face_box /
+    pre_cropped keyword arguments for extract_face.
+    """
+    pre_cropped = bool(request.face_image_data)
     try:
         # Decode base64 image
-        image_data = base64.b64decode(request.image_data)
+        image_data = base64.b64decode(request.face_image_data if pre_cropped else request.image_data)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid image data"
         )
+
+    face_box = None
+    if not pre_cropped and request.face_box is not None:
+        face_box = request.face_box.as_tuple()
+    return image_data, {"face_box": face_box, "pre_cropped": pre_cropped}
+
+
+@router.post("/register")
+def register_face(
+    request: FaceRegisterRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Register user's face for authentication"""
+    from app.utils.face_identification import record_enrollment
+    from app.utils.face_recognition_util import (
+        compute_face_signature,
+        extract_face,
+        get_encoder,
+        serialize_face_signature,
+    )
+
+    image_data, face_options = decode_face_request(request)
     
-    # Encode face from image
-    face_encoding, confidence_score, success = encode_face_from_image(image_data)
+    # Detect the face; it is encoded below once its quality is acceptable
+    with timed("face_detect"):
+        face_crop, confidence_score, success = extract_face(image_data, **face_options)
     
     if not success:
         raise HTTPException(
@@ -48,28 +73,42 @@ def register_face(
             detail="Face quality too low. Please provide a clearer image."
         )
     
+    encoder = get_encoder(settings.FACE_ENCODER)
+    with timed("face_encode"):
+        face_encoding = encoder.serialize(encoder.encode(face_crop))
+    face_signature = serialize_face_signature(compute_face_signature(face_crop))
+    
+    # Read before committing: committing expires the loaded rows
+    user_id = current_user.id
+
     # Check if user already has face registered
     existing_face = db.query(FaceEncoding).filter(
-        FaceEncoding.user_id == current_user.id
+        FaceEncoding.user_id == user_id
     ).first()
     
     if existing_face:
         # Update existing face
-        existing_face.face_encoding = serialize_face_encoding(face_encoding)
+        existing_face.face_encoding = face_encoding
+        existing_face.encoder = encoder.name
+        existing_face.face_signature = face_signature
         existing_face.confidence_score = confidence_score
         existing_face.is_verified = "verified"
         existing_face.verified_at = datetime.utcnow()
+        face_id = existing_face.id
         db.commit()
+        record_enrollment(db, face_id, face_signature)
         return {
             "message": "Face updated successfully",
-            "user_id": current_user.id,
+            "user_id": user_id,
             "status": "verified"
         }
     
     # Create new face encoding
     face_record = FaceEncoding(
-        user_id=current_user.id,
-        face_encoding=serialize_face_encoding(face_encoding),
+        user_id=user_id,
+        face_encoding=face_encoding,
+        encoder=encoder.name,
+        face_signature=face_signature,
         face_image=image_data,
         confidence_score=confidence_score,
         is_verified="verified",
@@ -77,12 +116,14 @@ def register_face(
     )
     
     db.add(face_record)
+    db.flush()
+    face_id = face_record.id
     db.commit()
-    db.refresh(face_record)
+    record_enrollment(db, face_id, face_signature)
     
     return {
         "message": "Face registered successfully",
-        "user_id": current_user.id,
+        "user_id": user_id,
         "status": "verified"
     }
 
@@ -93,17 +134,14 @@ def verify_face(
     db: Session = Depends(get_db)
 ):
     """Verify user's face for voting"""
-    try:
-        # Decode base64 image
-        image_data = base64.b64decode(request.image_data)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid image data"
-        )
+    from app.utils.face_identification import identify_face
+    from app.utils.face_recognition_util import extract_face
+
+    image_data, face_options = decode_face_request(request)
     
-    # First, encode the provided face
-    provided_encoding, confidence, success = encode_face_from_image(image_data)
+    # First, detect the provided face; it is encoded once per encoder in the gallery
+    with timed("face_detect"):
+        provided_face, confidence, success = extract_face(image_data, **face_options)
     
     if not success:
         raise HTTPException(
@@ -111,41 +149,17 @@ def verify_face(
             detail="No face detected in image"
         )
     
-    # Try to find matching user by face
-    all_face_encodings = db.query(FaceEncoding).filter(
-        FaceEncoding.is_verified == "verified"
-    ).all()
-    
-    matched_user = None
-    matched_distance = 1.0
-    
-    for face_record in all_face_encodings:
-        stored_encoding = deserialize_face_encoding(face_record.face_encoding)
-        is_match, distance = verify_face_from_stored_encoding(
-            image_data, 
-            stored_encoding
-        )
-        
-        if is_match and distance < matched_distance:
-            matched_user = face_record.user
-            matched_distance = distance
+    # Shortlist by signature, then compare exactly against the shortlist only
+    with timed("face_identify"):
+        face_record, matched_distance = identify_face(db, provided_face)
     
-    if not matched_user:
+    if not face_record:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Face not recognized. Please register your face first."
         )
-    
-    # Update last used time
-    face_record = db.query(FaceEncoding).filter(
-        FaceEncoding.user_id == matched_user.id
-    ).first()
-    
-    if face_record:
-        face_record.last_used_at = datetime.utcnow()
-        db.commit()
-    
-    return {
+    matched_user = face_record.user
+    result = {
         "is_match": True,
         "user_id": matched_user.id,
         "user_email": matched_user.email,
@@ -153,6 +167,12 @@ def verify_face(
         "message": "Face verified successfully",
         "verified": True
     }
+    
+    # Update last used time
+    face_record.last_used_at = datetime.utcnow()
+    db.commit()
+    
+    return result
 
 
 @router.post("/verify-for-voting")
@@ -162,14 +182,9 @@ def verify_face_for_voting(
     db: Session = Depends(get_db)
 ):
     """Verify user's face before casting vote - ensures it's the same person who registered"""
-    try:
-        # Decode base64 image
-        image_data = base64.b64decode(request.image_data)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid image data"
-        )
+    from app.utils.face_recognition_util import get_encoder, verify_face_from_stored_encoding
+
+    image_data, face_options = decode_face_request(request)
     
     # Get the current user's registered face encoding
     face_record = db.query(FaceEncoding).filter(
@@ -184,11 +199,15 @@ def verify_face_for_voting(
         )
     
     # Verify the provided face against the stored face
-    stored_encoding = deserialize_face_encoding(face_record.face_encoding)
-    is_match, distance = verify_face_from_stored_encoding(
-        image_data, 
-        stored_encoding
-    )
+    encoder = get_encoder(face_record.encoder)
+    stored_encoding = encoder.deserialize(face_record.face_encoding)
+    with timed("face_verify"):
+        is_match, distance = verify_face_from_stored_encoding(
+            image_data,
+            stored_encoding,
+            encoder=encoder,
+            **face_options
+        )
     
     if not is_match:
         raise HTTPException(
@@ -196,20 +215,23 @@ def verify_face_for_voting(
             detail="Face verification failed. The face does not match your registered face."
         )
     
-    # Update last used time
-    face_record.last_used_at = datetime.utcnow()
-    db.commit()
-    
-    return {
+    result = {
         "verified": True,
         "is_match": True,
         "user_id": current_user.id,
         "confidence_distance": float(distance),
         "message": "Face verified successfully for voting"
     }
+    
+    # Update last used time
+    face_record.last_used_at = datetime.utcnow()
+    db.commit()
+    
+    return result
 
 
 @router.get("/status")
+@cache_policy("private, no-cache")
 def check_face_status(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -241,6 +263,8 @@ def remove_face(
     db: Session = Depends(get_db)
 ):
     """Remove user's registered face"""
+    from app.utils.face_identification import record_removal
+
     face_record = db.query(FaceEncoding).filter(
         FaceEncoding.user_id == current_user.id
     ).first()
@@ -251,7 +275,9 @@ def remove_face(
             detail="No face registered"
         )
     
+    face_id = face_record.id
     db.delete(face_record)
     db.commit()
+    record_removal(db, face_id)
     
     return {"message": "Face removed successfully"}
@@ -1,3 +1,4 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
@@ -5,49 +6,43 @@ from app.models.user import User
 from app.schemas.otp import OTPRequest, OTPVerify, OTPResponse
 from app.utils.otp import create_otp_for_user, verify_otp, get_latest_otp
 from app.utils.email import send_otp_email
+from app.utils.http_cache import cache_policy
 from app.utils.security import get_current_user
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/otp", tags=["otp"])
 
 
 @router.post("/request")
 def request_otp(request: OTPRequest, db: Session = Depends(get_db)):
     """Request OTP for email verification"""
-    print(f"\n{'='*60}")
-    print(f"[OTP REQUEST] Received request for email: {request.email}")
-    print(f"{'='*60}")
-    
     user = db.query(User).filter(User.email == request.email).first()
     if not user:
-        print(f"[ERROR] User not found for email: {request.email}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    print(f"[OK] User found: {user.full_name} ({user.email})")
-    
+    # Read before create_otp_for_user commits, which expires the row
+    user_id, email, full_name = user.id, user.email, user.full_name
+
     # Generate and store OTP
-    otp_code = create_otp_for_user(db, user.id)
-    print(f"[OK] OTP code generated: {otp_code}")
-    
+    otp_code = create_otp_for_user(db, user_id)
+
     # Send OTP via email
-    print(f"[INFO] Attempting to send OTP email to {user.email}...")
-    email_sent = send_otp_email(user.email, otp_code, user.full_name)
+    email_sent = send_otp_email(email, otp_code, full_name)
     
     if not email_sent:
-        print(f"[ERROR] Failed to send OTP email!")
+        logger.warning("OTP email to %s not sent", email, extra={"user_id": user_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to send OTP email"
         )
-    
-    print(f"[OK] OTP request completed successfully")
-    print(f"{'='*60}\n")
-    
+
     return {
         "message": "OTP sent to your email",
-        "email": user.email,
+        "email": email,
         "expires_in_minutes": 10
     }
 
@@ -72,6 +67,7 @@ def verify_user_otp(data: OTPVerify, current_user: User = Depends(get_current_us
 
 
 @router.get("/status")
+@cache_policy("private, no-cache")
 def check_otp_status(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
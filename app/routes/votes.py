@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from app.database import get_db
 from app.models.vote import Vote
 from app.models.user import User
@@ -8,12 +9,16 @@ from app.models.election import Election
 from app.models.candidate import Candidate
 from app.models.face import FaceEncoding
 from app.schemas.vote import VoteCreate, VoteResponse
+from app.utils.fast_json import json_response
+from app.utils.http_cache import cache_policy, conditional, stamp_etag
+from app.utils.idempotency import idempotent
 from app.utils.security import get_current_user
 
 router = APIRouter(prefix="/api/votes", tags=["votes"])
 
 
 @router.post("/", response_model=VoteResponse)
+@idempotent
 def cast_vote(
     vote: VoteCreate,
     current_user: User = Depends(get_current_user),
@@ -40,36 +45,38 @@ def cast_vote(
             status_code=status.HTTP_403_FORBIDDEN, detail="Election is not active"
         )
 
-    # Check if candidate exists
-    candidate = db.query(Candidate).filter(Candidate.id == vote.candidate_id).first()
+    # Check if candidate exists (the id is enough; skip the profile text)
+    candidate = db.query(Candidate.id).filter(Candidate.id == vote.candidate_id).first()
     if not candidate:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found"
         )
 
-    # Check if user already voted in this election
-    existing_vote = db.query(Vote).filter(
-        Vote.user_id == current_user.id, Vote.election_id == vote.election_id
-    ).first()
-    if existing_vote:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User already voted in this election",
-        )
-
     db_vote = Vote(
         user_id=current_user.id,
         election_id=vote.election_id,
         candidate_id=vote.candidate_id,
     )
     db.add(db_vote)
+    # unique_user_election_vote rejects a second vote, without a lookup first
+    # and without a window between the check and the insert
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User already voted in this election",
+        )
+    # Every column has a Python-side default; no reload after the commit
+    cast = VoteResponse.model_validate(db_vote)
     db.commit()
-    db.refresh(db_vote)
-    return db_vote
+    return cast
 
 
 @router.get("/election/{election_id}")
-def get_election_results(election_id: int, db: Session = Depends(get_db)):
+@cache_policy("public, no-cache")
+def get_election_results(election_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get voting results for an election"""
     election = db.query(Election).filter(Election.id == election_id).first()
     if not election:
@@ -77,6 +84,16 @@ def get_election_results(election_id: int, db: Session = Depends(get_db)):
             status_code=status.HTTP_404_NOT_FOUND, detail="Election not found"
         )
 
+    # Tally version: votes are only ever added, so their count and highest id
+    # change with every vote; polling clients get a 304 without the tally query
+    vote_stamp = db.query(func.count(Vote.id), func.max(Vote.id)).filter(
+        Vote.election_id == election_id
+    ).one()
+    candidate_stamp = db.query(func.count(Candidate.id), func.max(Candidate.updated_at)).filter(
+        Candidate.election_id == election_id
+    ).one()
+    conditional(request, response, stamp_etag("results", election_id, *vote_stamp, *candidate_stamp))
+
     # Get all candidates with their vote counts (including 0 votes)
     results = db.query(
         Candidate.id,
@@ -92,13 +109,14 @@ def get_election_results(election_id: int, db: Session = Depends(get_db)):
         func.count(Vote.id).desc()
     ).all()
 
-    return [
+    return json_response([
         {"candidate_id": r[0], "candidate_name": r[1], "vote_count": r[2]}
         for r in results
-    ]
+    ], response)
 
 
 @router.get("/user/{election_id}")
+@cache_policy("private, no-cache")
 def check_user_voted(
     election_id: int,
     current_user: User = Depends(get_current_user),
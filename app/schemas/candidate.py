@@ -21,6 +21,7 @@ class CandidateResponse(BaseModel):
     campaign_message: Optional[str]
     about: Optional[str]
     poster: Optional[str]
+    poster_thumbnail: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
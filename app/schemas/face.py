@@ -1,17 +1,45 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from datetime import datetime
 from typing import Optional
 
 
-class FaceRegisterRequest(BaseModel):
+class FaceBox(BaseModel):
+    """Face bounding box from client-side detection, in image pixel coordinates"""
+    x: float
+    y: float
+    width: float
+    height: float
+
+    def as_tuple(self) -> tuple:
+        return self.x, self.y, self.width, self.height
+
+
+class FaceImageRequest(BaseModel):
+    """Face image fields shared by register and verify requests.
+
+    Send either ``image_data`` (optionally with the client-detected
+    ``face_box``) or ``face_image_data``, an image already cropped around the
+    face. Both let the server confirm the face in a small search window
+    instead of scanning the whole frame.
+    """
+    image_data: Optional[str] = None  # Base64 encoded image
+    face_box: Optional[FaceBox] = None
+    face_image_data: Optional[str] = None  # Base64 encoded pre-cropped face
+
+    @model_validator(mode="after")
+    def require_image(self):
+        if not self.image_data and not self.face_image_data:
+            raise ValueError("image_data or face_image_data is required")
+        return self
+
+
+class FaceRegisterRequest(FaceImageRequest):
     """Request body for registering user face"""
-    image_data: str  # Base64 encoded image
 
 
-class FaceVerifyRequest(BaseModel):
+class FaceVerifyRequest(FaceImageRequest):
     """Request body for verifying face"""
-    image_data: str  # Base64 encoded image
-    election_id: int  # For voting context
+    election_id: Optional[int] = None  # For voting context
 
 
 class FaceVerifyResponse(BaseModel):
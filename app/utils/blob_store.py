@@ -0,0 +1,61 @@
+"""Content-addressed storage for uploaded files (campaign posters).
+
+Blobs are keyed by the SHA-256 of their bytes, so identical uploads are
+stored once and a key doubles as a strong ETag. Metadata always lives in the
+``blobs`` table. The bytes live there too unless BLOB_STORE_DIR is set, in
+which case they are written to ``<dir>/<key[:2]>/<key>`` and ranged reads
+only touch the requested slice.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from sqlalchemy import delete as delete_statement, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.poster import Blob
+
+
+def _path(key: str) -> Path:
+    return Path(settings.BLOB_STORE_DIR) / key[:2] / key
+
+
+def put(db: Session, data: bytes, content_type: str) -> Blob:
+    """Store ``data`` (a no-op if identical bytes are stored) and return its Blob"""
+    key = hashlib.sha256(data).hexdigest()
+    blob = db.get(Blob, key)
+    if blob is not None:
+        return blob
+    blob = Blob(key=key, content_type=content_type, size=len(data))
+    if settings.BLOB_STORE_DIR:
+        path = _path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+    else:
+        blob.data = data
+    db.add(blob)
+    return blob
+
+
+def read(db: Session, blob: Blob, start: int = 0, end: int = None) -> bytes:
+    """Bytes ``start``..``end`` (exclusive, default to the end) of ``blob``"""
+    end = blob.size if end is None else end
+    if settings.BLOB_STORE_DIR and _path(blob.key).exists():
+        with open(_path(blob.key), "rb") as handle:
+            handle.seek(start)
+            return handle.read(end - start)
+    data = db.execute(select(Blob.data).where(Blob.key == blob.key)).scalar_one()
+    return data[start:end]
+
+
+def delete(db: Session, keys) -> int:
+    """Delete blob rows by key; call remove_files(keys) once that is committed"""
+    return db.execute(delete_statement(Blob).where(Blob.key.in_(list(keys)))).rowcount
+
+
+def remove_files(keys):
+    if settings.BLOB_STORE_DIR:
+        for key in keys:
+            _path(key).unlink(missing_ok=True)
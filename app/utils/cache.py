@@ -0,0 +1,135 @@
+"""In-process TTL cache with stale-while-revalidate.
+
+Within ``ttl`` seconds of loading, an entry is returned as is. For the next
+``stale_ttl`` seconds the old value is still returned immediately while one
+background thread reloads it. After that, the caller reloads synchronously.
+Concurrent misses for the same key share a single load.
+
+With ``max_entries`` the cache holds at most that many keys: expired entries
+are dropped first, then the least recently used.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "fresh_until", "stale_until", "refreshing")
+
+    def __init__(self, value, ttl: float, stale_ttl: float):
+        now = time.monotonic()
+        self.value = value
+        self.fresh_until = now + ttl
+        self.stale_until = now + ttl + stale_ttl
+        self.refreshing = False
+
+
+class TTLCache:
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, max_entries: int = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> [lock, callers using it]; only present while a load is pending
+        self._key_locks = {}
+
+    def get(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader()`` when needed"""
+        entry = self._lookup(key)
+        now = time.monotonic()
+        if entry is not None:
+            if now < entry.fresh_until:
+                return entry.value
+            if now < entry.stale_until:
+                self._refresh_in_background(key, entry, loader)
+                return entry.value
+
+        with self._key_lock(key):
+            # Another caller may have loaded it while we waited
+            entry = self._lookup(key)
+            if entry is not None and time.monotonic() < entry.fresh_until:
+                return entry.value
+            try:
+                value = loader()
+            except BaseException:
+                self._discard(key, entry)
+                raise
+            self._store(key, value)
+            return value
+
+    def peek(self, key):
+        """The cached value for ``key`` however old it is, or None"""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def invalidate(self, key=None):
+        """Drop one key, or every key when ``key`` is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = _Entry(value, self.ttl, self.stale_ttl)
+            self._entries.move_to_end(key)
+            if self.max_entries is None or len(self._entries) <= self.max_entries:
+                return
+            now = time.monotonic()
+            for expired in [k for k, entry in self._entries.items() if entry.stale_until <= now]:
+                del self._entries[expired]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _discard(self, key, entry):
+        """Drop ``entry`` after its reload failed, unless it was replaced meanwhile"""
+        with self._lock:
+            if entry is not None and self._entries.get(key) is entry:
+                del self._entries[key]
+
+    @contextmanager
+    def _key_lock(self, key):
+        with self._lock:
+            holder = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            holder[1] += 1
+        try:
+            with holder[0]:
+                yield
+        finally:
+            with self._lock:
+                holder[1] -= 1
+                if not holder[1]:
+                    del self._key_locks[key]
+
+    def _refresh_in_background(self, key, entry, loader):
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+
+        def refresh():
+            try:
+                value = loader()
+                self._store(key, value)
+            except Exception:
+                logger.exception("Background refresh of %r failed", key)
+                entry.refreshing = False
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{key}", daemon=True).start()
@@ -0,0 +1,143 @@
+"""Read-through cache for the public election and candidate catalog.
+
+The catalog endpoints return the same data until an admin edits an election
+or candidate, so each response is kept here as serialized JSON bytes with an
+ETag, per database, per election and per requested fieldset (see
+``app.utils.fieldsets``). An entry is served without touching the
+database for CATALOG_CACHE_TTL_SECONDS; after that a single aggregate query
+(row count, highest id, latest updated_at) decides whether it is still
+current, so edits made by other workers or by scripts show up within that
+window. Write paths call invalidate() so the worker that made an edit serves
+it immediately. Lookups for elections that do not exist raise
+ElectionNotFound and are not cached.
+"""
+
+from functools import lru_cache
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.candidate import Candidate
+from app.models.election import Election
+from app.schemas.candidate import CandidateResponse
+from app.utils.cache import TTLCache
+from app.utils.fast_json import dumps
+from app.utils.fieldsets import column_loader, sparse_model
+from app.utils.http_cache import etag_for
+
+catalog_cache = TTLCache(ttl=settings.CATALOG_CACHE_TTL_SECONDS, max_entries=settings.CATALOG_CACHE_MAX_ENTRIES)
+
+# Fields of GET /api/candidates/all, and the columns the response properties read
+CANDIDATE_SUMMARY_FIELDS = ("id", "name", "election_id", "symbol_number", "description")
+CANDIDATE_FIELDS = tuple(CandidateResponse.model_fields)
+CANDIDATE_DERIVED_COLUMNS = {"poster": ("poster_key",), "poster_thumbnail": ("poster_key",)}
+
+
+class ElectionNotFound(LookupError):
+    """Raised for the candidates of an election id that does not exist"""
+
+
+class CatalogEntry:
+    __slots__ = ("stamp", "body", "etag")
+
+    def __init__(self, stamp: tuple, body: bytes):
+        self.stamp = stamp
+        self.body = body
+        self.etag = etag_for(body)
+
+
+def _stamp(db: Session, model, *criteria, columns=()) -> tuple:
+    """Changes whenever a row of ``model`` matching ``criteria`` is added, removed or updated"""
+    statement = select(
+        func.count(model.id), func.max(model.id), func.max(model.updated_at), *columns
+    ).where(*criteria)
+    return tuple(db.execute(statement).one())
+
+
+def _cached(db: Session, key: tuple, stamp, render) -> CatalogEntry:
+    cache_key = (str(db.get_bind().url),) + key
+
+    def load():
+        current = stamp()
+        previous = catalog_cache.peek(cache_key)
+        if previous is not None and previous.stamp == current:
+            return previous
+        return CatalogEntry(current, render())
+
+    return catalog_cache.get(cache_key, load)
+
+
+def elections_catalog(db: Session) -> CatalogEntry:
+    """Body of GET /api/elections/"""
+
+    def render():
+        return dumps([
+            {
+                "id": election.id,
+                "name": election.title,
+                "title": election.title,
+                "description": election.description,
+                "status": election.status if election.status else None,
+                "is_active": election.is_active,
+                "created_at": election.created_at.isoformat() if election.created_at else None,
+            }
+            for election in db.query(Election).all()
+        ])
+
+    return _cached(db, ("elections",), lambda: _stamp(db, Election), render)
+
+
+def all_candidates_catalog(db: Session, fields: tuple = None) -> CatalogEntry:
+    """Body of GET /api/candidates/all, optionally limited to ``fields``"""
+    fields = fields or CANDIDATE_SUMMARY_FIELDS
+
+    def render():
+        candidates = db.query(Candidate).options(column_loader(Candidate, fields)).all()
+        return dumps([
+            {
+                field: (candidate.description or "") if field == "description" else getattr(candidate, field)
+                for field in fields
+            }
+            for candidate in candidates
+        ])
+
+    return _cached(db, ("candidates", fields), lambda: _stamp(db, Candidate), render)
+
+
+def election_candidates_catalog(db: Session, election_id: int, fields: tuple = None) -> CatalogEntry:
+    """Body of GET /api/elections/{id}/candidates and /api/candidates/election/{id}
+
+    Raises ElectionNotFound if there is no such election.
+    """
+    fields = fields or CANDIDATE_FIELDS
+
+    def render():
+        candidates = (
+            db.query(Candidate)
+            .options(column_loader(Candidate, fields, CANDIDATE_DERIVED_COLUMNS))
+            .filter(Candidate.election_id == election_id)
+            .all()
+        )
+        adapter = _list_adapter(fields)
+        return adapter.dump_json(adapter.validate_python(candidates, from_attributes=True))
+
+    def stamp():
+        # Existence rides along in the same query; a missing election is never cached
+        exists = select(Election.id).where(Election.id == election_id).exists()
+        current = _stamp(db, Candidate, Candidate.election_id == election_id, columns=(exists,))
+        if not current[-1]:
+            raise ElectionNotFound(election_id)
+        return current
+
+    return _cached(db, ("candidates", election_id, fields), stamp, render)
+
+
+@lru_cache(maxsize=256)
+def _list_adapter(fields: tuple) -> TypeAdapter:
+    model = CandidateResponse if fields == CANDIDATE_FIELDS else sparse_model(CandidateResponse, fields)
+    return TypeAdapter(list[model])
+
+
+def invalidate():
+    """Drop every cached catalog; call after committing an election or candidate change"""
+    catalog_cache.invalidate()
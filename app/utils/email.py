@@ -1,7 +1,19 @@
+import logging
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.config import settings
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+def _send(message):
+    """Deliver a message through the configured SMTP server"""
+    with timed("smtp_send"), smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
+        server.starttls()  # Start TLS encryption
+        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        server.send_message(message)
 
 
 def send_otp_email(recipient_email: str, otp_code: str, recipient_name: str = "User") -> bool:
@@ -93,31 +105,23 @@ def send_otp_email(recipient_email: str, otp_code: str, recipient_name: str = "U
         message.attach(MIMEText(html_body, "html"))
         
         # Send email via SMTP
-        with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
-            server.starttls()  # Start TLS encryption
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(message)
+        _send(message)
         
-        print(f"\n{'='*60}")
-        print(f"[OK] OTP EMAIL SENT SUCCESSFULLY")
-        print(f"{'='*60}")
-        print(f"To: {recipient_email}")
-        print(f"OTP Code: {otp_code}")
-        print(f"Valid for: 10 minutes")
-        print(f"{'='*60}\n")
+        logger.info("Sent OTP email to %s", recipient_email)
         
         return True
         
     except smtplib.SMTPAuthenticationError:
-        print(f"[ERROR] SMTP Authentication Failed!")
-        print(f"Check your SMTP_USER and SMTP_PASSWORD in .env file")
-        print(f"For Gmail, use App Password (not regular password)")
+        logger.error(
+            "SMTP authentication failed; check SMTP_USER and SMTP_PASSWORD "
+            "(Gmail needs an App Password, not the account password)"
+        )
         return False
-    except smtplib.SMTPException as e:
-        print(f"[ERROR] SMTP Error: {str(e)}")
+    except smtplib.SMTPException:
+        logger.exception("SMTP error sending the OTP email to %s", recipient_email)
         return False
-    except Exception as e:
-        print(f"[ERROR] Error sending email: {str(e)}")
+    except Exception:
+        logger.exception("Could not send the OTP email to %s", recipient_email)
         return False
 
 
@@ -232,22 +236,14 @@ def send_welcome_email(recipient_email: str, recipient_name: str = "User") -> bo
         message.attach(MIMEText(html_body, "html"))
         
         # Send email via SMTP
-        with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(message)
+        _send(message)
         
-        print(f"\n{'='*60}")
-        print(f"[OK] WELCOME EMAIL SENT SUCCESSFULLY")
-        print(f"{'='*60}")
-        print(f"To: {recipient_email}")
-        print(f"Recipient: {recipient_name}")
-        print(f"{'='*60}\n")
+        logger.info("Sent welcome email to %s", recipient_email)
         
         return True
         
-    except Exception as e:
-        print(f"[ERROR] Error sending welcome email: {str(e)}")
+    except Exception:
+        logger.exception("Could not send the welcome email to %s", recipient_email)
         return False
 
 
@@ -342,20 +338,12 @@ def send_login_link_email(recipient_email: str, recipient_name: str, login_url:
         message.attach(MIMEText(html_body, "html"))
         
         # Send email via SMTP
-        with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(message)
+        _send(message)
         
-        print(f"\n{'='*60}")
-        print(f"[OK] LOGIN LINK EMAIL SENT SUCCESSFULLY")
-        print(f"{'='*60}")
-        print(f"To: {recipient_email}")
-        print(f"Recipient: {recipient_name}")
-        print(f"{'='*60}\n")
+        logger.info("Sent login link email to %s", recipient_email)
         
         return True
         
-    except Exception as e:
-        print(f"[ERROR] Error sending login link email: {str(e)}")
+    except Exception:
+        logger.exception("Could not send the login link email to %s", recipient_email)
         return False
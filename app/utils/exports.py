@@ -0,0 +1,187 @@
+"""Streaming exports of election data for audit.
+
+Rows are read through a server-side cursor in batches of EXPORT_BATCH_SIZE and
+encoded batch by batch, so memory stays flat however large the election is.
+Parquet and Arrow output need the optional ``pyarrow`` package.
+"""
+
+import csv
+import io
+import zlib
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.candidate import Candidate
+from app.models.vote import Vote
+from app.utils.fast_json import dumps
+
+EXPORT_BATCH_SIZE = 5000
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+COLUMNS = {
+    "votes": ("id", "user_id", "election_id", "candidate_id", "created_at"),
+    "tallies": ("candidate_id", "candidate_name", "symbol_number", "vote_count"),
+}
+
+
+class ExportUnavailable(Exception):
+    """Raised when the requested format needs a package that is not installed"""
+
+
+def _statement(dataset: str, election_id: int):
+    if dataset == "votes":
+        return (
+            select(Vote.id, Vote.user_id, Vote.election_id, Vote.candidate_id, Vote.created_at)
+            .where(Vote.election_id == election_id)
+            .order_by(Vote.id)
+        )
+    return (
+        select(
+            Candidate.id.label("candidate_id"),
+            Candidate.name.label("candidate_name"),
+            Candidate.symbol_number,
+            func.count(Vote.id).label("vote_count"),
+        )
+        .outerjoin(Vote, (Candidate.id == Vote.candidate_id) & (Vote.election_id == election_id))
+        .where(Candidate.election_id == election_id)
+        .group_by(Candidate.id, Candidate.name, Candidate.symbol_number)
+        .order_by(func.count(Vote.id).desc(), Candidate.id)
+    )
+
+
+def _batches(db: Session, dataset: str, election_id: int):
+    """Yield lists of row tuples fetched from a server-side cursor"""
+    statement = _statement(dataset, election_id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for partition in db.execute(statement).partitions():
+        yield [tuple(row) for row in partition]
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode_csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([[_plain(value) for value in row] for row in batch])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _encode_ndjson(columns, batches):
+    for batch in batches:
+        yield b"".join(dumps(dict(zip(columns, map(_plain, row)))) + b"\n" for row in batch)
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_schema(pa, dataset: str):
+    if dataset == "votes":
+        return pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("election_id", pa.int64()),
+            ("candidate_id", pa.int64()),
+            ("created_at", pa.timestamp("us")),
+        ])
+    return pa.schema([
+        ("candidate_id", pa.int64()),
+        ("candidate_name", pa.string()),
+        ("symbol_number", pa.int64()),
+        ("vote_count", pa.int64()),
+    ])
+
+
+def _encode_arrow(dataset, batches, fmt):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportUnavailable(f"{fmt} export requires the pyarrow package")
+
+    schema = _arrow_schema(pa, dataset)
+
+    def generate():
+        sink = _ChunkSink()
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(sink, schema)
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+        for batch in batches:
+            # One row group / record batch per cursor batch
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+    return generate()
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_election(db: Session, election_id: int, dataset: str, fmt: str, gzip: bool = False):
+    """Return an iterator of encoded byte chunks for ``dataset`` in ``fmt``"""
+    columns = COLUMNS[dataset]
+    batches = _batches(db, dataset, election_id)
+    if fmt == "csv":
+        chunks = _encode_csv(columns, batches)
+    elif fmt == "ndjson":
+        chunks = _encode_ndjson(columns, batches)
+    else:
+        chunks = _encode_arrow(dataset, batches, fmt)
+    return _gzip(chunks) if gzip else chunks
+
+
+def export_filename(election_id: int, dataset: str, fmt: str, gzip: bool = False) -> str:
+    name = f"election-{election_id}-{dataset}.{FORMATS[fmt][1]}"
+    return name + ".gz" if gzip else name
@@ -0,0 +1,188 @@
+"""On-disk face gallery shared by every worker on a host.
+
+The gallery directory holds:
+
+- ``snapshot-<epoch>.bin``: a FaceIndex in one file. A 64-byte header
+  (magic, format, index kind, epoch, row count, dimensions, lists, nprobe)
+  followed by the centroids, list offsets, face ids and the fixed-width
+  float32 descriptor matrix, each 64-byte aligned. Workers np.memmap it
+  read-only, so every worker shares one copy through the page cache.
+- ``delta-<epoch>.log``: fixed-size records (add or remove, face id,
+  descriptor) appended since that snapshot. Workers replay the records they
+  have not seen yet on each lookup.
+- ``CURRENT``: the epoch in use, replaced atomically when a worker folds the
+  log into a new snapshot.
+- ``lock``: serialises appends and snapshot publication between workers.
+"""
+
+import os
+from pathlib import Path
+import numpy as np
+from app.utils.face_index import BACKENDS, FaceIndex
+from app.utils.file_lock import file_lock
+
+MAGIC = b"FGALLERY"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+OP_ADD = 1
+OP_REMOVE = 2
+
+HEADER = np.dtype([
+    ("magic", "S8"),
+    ("format", "<u4"),
+    ("kind", "<u4"),
+    ("epoch", "<u8"),
+    ("count", "<u8"),
+    ("dim", "<u4"),
+    ("nlist", "<u4"),
+    ("nprobe", "<u4"),
+    ("reserved", "V20"),
+])
+KINDS = ("exact", "ivf")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _layout(count: int, dim: int, nlist: int) -> dict:
+    """Byte offset, dtype and shape of each section after the header"""
+    sections = {}
+    offset = ALIGNMENT
+    for name, dtype, shape in (
+        ("centroids", np.float32, (nlist, dim)),
+        ("offsets", np.int64, (nlist + 1,)),
+        ("ids", np.int64, (count,)),
+        ("vectors", np.float32, (count, dim)),
+    ):
+        sections[name] = (offset, dtype, shape)
+        offset = _aligned(offset + int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    return sections
+
+
+def write_snapshot(path: Path, index: FaceIndex, epoch: int):
+    """Write a compacted ``index`` to ``path`` atomically"""
+    index = index.compact()
+    count, dim, nlist = len(index.ids), index.dim, len(index.centroids)
+    header = np.zeros(1, HEADER)
+    header[0] = (MAGIC, FORMAT_VERSION, KINDS.index(index.kind), epoch, count, dim, nlist,
+                 index.options().get("nprobe", 0), b"")
+
+    temporary = Path(f"{path}.tmp")
+    with open(temporary, "wb") as handle:
+        handle.write(header.tobytes())
+        for name, (offset, dtype, _) in _layout(count, dim, nlist).items():
+            handle.seek(offset)
+            handle.write(np.ascontiguousarray(getattr(index, name), dtype=dtype).tobytes())
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+    return index
+
+
+def open_snapshot(path: Path) -> tuple:
+    """Memory-map a snapshot; returns (index, epoch)"""
+    header = np.fromfile(path, dtype=HEADER, count=1)[0]
+    if header["magic"] != MAGIC or header["format"] != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a face gallery snapshot")
+    count, dim, nlist = int(header["count"]), int(header["dim"]), int(header["nlist"])
+    arrays = {
+        name: np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+        if np.prod(shape) else np.empty(shape, dtype)
+        for name, (offset, dtype, shape) in _layout(count, dim, nlist).items()
+    }
+    kind = KINDS[header["kind"]]
+    options = {"nprobe": int(header["nprobe"])} if kind == "ivf" else {}
+    return BACKENDS[kind](**arrays, **options), int(header["epoch"])
+
+
+def delta_record(dim: int) -> np.dtype:
+    return np.dtype([("op", "u1"), ("reserved", "V7"), ("face_id", "<i8"), ("vector", "<f4", (dim,))])
+
+
+class GalleryStore:
+    """The snapshot, delta log and epoch pointer in one directory"""
+
+    def __init__(self, directory, dim: int):
+        self.directory = Path(directory)
+        self.dim = dim
+        self.record = delta_record(dim)
+
+    def lock(self):
+        return file_lock(self.directory / "lock")
+
+    def snapshot_path(self, epoch: int) -> Path:
+        return self.directory / f"snapshot-{epoch}.bin"
+
+    def log_path(self, epoch: int) -> Path:
+        return self.directory / f"delta-{epoch}.log"
+
+    def current_epoch(self):
+        """The published epoch, or None when nothing has been published"""
+        try:
+            return int((self.directory / "CURRENT").read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def open(self) -> tuple:
+        """(index, epoch, log offset) of the published snapshot, with no log applied"""
+        epoch = self.current_epoch()
+        index, _ = open_snapshot(self.snapshot_path(epoch))
+        return index, epoch, 0
+
+    def replay(self, index: FaceIndex, epoch: int, offset: int) -> int:
+        """Apply log records past ``offset`` to ``index``; returns the new offset"""
+        path = self.log_path(epoch)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return offset
+        # A record still being appended is picked up on the next call
+        complete = offset + (size - offset) // self.record.itemsize * self.record.itemsize
+        if complete == offset:
+            return offset
+        with open(path, "rb") as handle:
+            handle.seek(offset)
+            records = np.frombuffer(handle.read(complete - offset), dtype=self.record)
+        for record in records:
+            if record["op"] == OP_ADD:
+                index.add(int(record["face_id"]), record["vector"])
+            else:
+                index.remove(int(record["face_id"]))
+        return complete
+
+    def append(self, epoch: int, op: int, face_id: int, vector=None):
+        """Append one record to the log of ``epoch`` (call with the lock held)"""
+        record = np.zeros(1, self.record)
+        record["op"], record["face_id"] = op, face_id
+        if vector is not None:
+            record["vector"] = vector
+        descriptor = os.open(self.log_path(epoch), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(descriptor, record.tobytes())
+        finally:
+            os.close(descriptor)
+
+    def publish(self, index: FaceIndex) -> tuple:
+        """Write ``index`` as the next epoch (call with the lock held).
+
+        Returns (compacted index, epoch). Files two epochs old are removed;
+        workers still mapping them keep their pages until they move on.
+        """
+        previous = self.current_epoch()
+        epoch = 1 if previous is None else previous + 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index = write_snapshot(self.snapshot_path(epoch), index, epoch)
+        self.log_path(epoch).touch()
+        temporary = self.directory / "CURRENT.tmp"
+        temporary.write_text(str(epoch))
+        os.replace(temporary, self.directory / "CURRENT")
+
+        if previous is not None:
+            for path in (self.snapshot_path(previous - 1), self.log_path(previous - 1)):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        return index, epoch
@@ -0,0 +1,271 @@
+"""Two-stage one-to-many face identification.
+
+Stage 1 looks the probe's small float32 signature up in an in-memory
+nearest-neighbour index (app.utils.face_index) of every verified template,
+keeping the top K, plus any verified template stored without a signature
+(one the migration 0004 backfill could not decode), which can only be found
+by an exact comparison. Stage 2 loads the full templates of that shortlist and
+compares them with the encoder each was enrolled with, encoding the probe
+once per encoder present.
+
+The index is built once per database and then kept in step with register and
+remove via record_enrollment/record_removal. How other workers' changes reach
+it depends on settings.FACE_INDEX_DIR:
+
+- unset: every lookup compares a cheap stamp of the gallery (count, max id,
+  max verified_at) with the one the index was built at and rebuilds on change.
+- set: workers share a memory-mapped snapshot and an append-only delta log
+  there (app.utils.face_gallery). Each lookup replays new log records, so
+  starting a worker costs one mmap and no per-worker copy of the gallery.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+from app.config import settings
+from app.models.face import FaceEncoding
+from app.utils.face_gallery import OP_ADD, OP_REMOVE, GalleryStore
+from app.utils.face_index import BACKENDS, FaceIndex
+from app.utils.face_recognition_util import (
+    FACE_SIGNATURE_BINS,
+    compute_face_signature,
+    deserialize_face_signature,
+    get_encoder,
+)
+
+
+class _Gallery:
+    __slots__ = ("index", "unsigned", "stamp", "lock", "store", "epoch", "log_offset")
+
+    def __init__(self, store: Optional[GalleryStore] = None):
+        self.index = None
+        self.unsigned = ()
+        self.stamp = None
+        self.lock = threading.Lock()
+        self.store = store
+        self.epoch = None
+        self.log_offset = 0
+
+
+_galleries = {}
+_galleries_lock = threading.Lock()
+
+
+def _gallery(db: Session) -> _Gallery:
+    key = str(db.get_bind().url)
+    with _galleries_lock:
+        if key not in _galleries:
+            store = None
+            if settings.FACE_INDEX_DIR:
+                directory = Path(settings.FACE_INDEX_DIR) / hashlib.sha1(key.encode()).hexdigest()[:12]
+                store = GalleryStore(directory, FACE_SIGNATURE_BINS)
+            _galleries[key] = _Gallery(store)
+        return _galleries[key]
+
+
+def gallery_stamp(db: Session) -> str:
+    count, last_id, last_verified = db.query(
+        func.count(FaceEncoding.id), func.max(FaceEncoding.id), func.max(FaceEncoding.verified_at)
+    ).filter(FaceEncoding.is_verified == "verified").one()
+    return f"{count}:{last_id}:{last_verified}"
+
+
+def load_gallery(db: Session) -> tuple:
+    """(ids, signatures) of every verified template that has a signature"""
+    rows = db.query(FaceEncoding.id, FaceEncoding.face_signature).filter(
+        FaceEncoding.is_verified == "verified",
+        FaceEncoding.face_signature.isnot(None),
+    ).all()
+    ids = np.fromiter((face_id for face_id, _ in rows), dtype=np.int64, count=len(rows))
+    signatures = np.frombuffer(b"".join(signature for _, signature in rows), dtype=np.float32)
+    return ids, signatures.reshape(len(rows), FACE_SIGNATURE_BINS)
+
+
+def load_unsigned(db: Session) -> tuple:
+    """Ids of verified templates without a signature, which the index cannot rank"""
+    rows = db.query(FaceEncoding.id).filter(
+        FaceEncoding.is_verified == "verified",
+        FaceEncoding.face_signature.is_(None),
+    ).all()
+    return tuple(face_id for face_id, in rows)
+
+
+def index_backend(size: int) -> str:
+    """The index kind to use for a gallery of ``size`` templates"""
+    if size < max(1, settings.FACE_INDEX_EXACT_BELOW):
+        return "exact"
+    return settings.FACE_INDEX_BACKEND
+
+
+def build_index(ids: np.ndarray, signatures: np.ndarray) -> FaceIndex:
+    kind = index_backend(len(ids))
+    options = {"nprobe": settings.FACE_INDEX_NPROBE} if kind == "ivf" else {}
+    return BACKENDS[kind].build(ids, signatures, **options)
+
+
+def _needs_rebuild(index: FaceIndex) -> tuple:
+    """(compact, retrain) once incremental changes pile up"""
+    size = len(index)
+    retrain = index.kind != index_backend(size) or (
+        index.kind == "ivf" and size > 4 * len(index.centroids) ** 2
+    )
+    return retrain or index.pending > max(256, size // 10), retrain
+
+
+def _rebuilt(index: FaceIndex, retrain: bool) -> FaceIndex:
+    index = index.compact()
+    return build_index(index.ids, index.vectors) if retrain else index
+
+
+# Shared mode: snapshot plus delta log in settings.FACE_INDEX_DIR
+
+def _publish(gallery: _Gallery, index: FaceIndex):
+    gallery.index, gallery.epoch = gallery.store.publish(index)
+    gallery.log_offset = 0
+
+
+def _open_shared(db: Session, gallery: _Gallery):
+    """Map the published snapshot, or build and publish one from the database"""
+    store = gallery.store
+    gallery.unsigned = load_unsigned(db)
+    with store.lock():
+        if store.current_epoch() is None:
+            _publish(gallery, build_index(*load_gallery(db)))
+            return
+        gallery.index, gallery.epoch, _ = store.open()
+        gallery.log_offset = store.replay(gallery.index, gallery.epoch, 0)
+        # Rows written without the log (bulk imports, restores) show up as a
+        # count mismatch; the rebuilt snapshot includes them
+        verified = db.query(func.count(FaceEncoding.id)).filter(
+            FaceEncoding.is_verified == "verified",
+            FaceEncoding.face_signature.isnot(None),
+        ).scalar()
+        if verified != len(gallery.index):
+            _publish(gallery, build_index(*load_gallery(db)))
+
+
+def _catch_up(gallery: _Gallery):
+    store = gallery.store
+    epoch = store.current_epoch()
+    if epoch != gallery.epoch:
+        gallery.index, gallery.epoch, gallery.log_offset = store.open()
+    gallery.log_offset = store.replay(gallery.index, gallery.epoch, gallery.log_offset)
+
+
+def _record_shared(db: Session, gallery: _Gallery, changes: list):
+    if gallery.index is None:
+        _open_shared(db, gallery)
+    with gallery.store.lock():
+        _catch_up(gallery)
+        for op, face_id, vector in changes:
+            gallery.store.append(gallery.epoch, op, face_id, vector)
+        _catch_up(gallery)
+        compact, retrain = _needs_rebuild(gallery.index)
+        if compact:
+            _publish(gallery, _rebuilt(gallery.index, retrain))
+
+
+# Local mode: per-process index checked against a gallery stamp
+
+def _record_local(db: Session, gallery: _Gallery, changes: list):
+    if gallery.index is None:
+        return  # Built on first lookup, which will include these changes
+    for op, face_id, vector in changes:
+        if op == OP_ADD:
+            gallery.index.add(face_id, vector)
+        else:
+            gallery.index.remove(face_id)
+    gallery.stamp = gallery_stamp(db)
+    compact, retrain = _needs_rebuild(gallery.index)
+    if compact:
+        gallery.index = _rebuilt(gallery.index, retrain)
+
+
+def get_face_index(db: Session) -> FaceIndex:
+    """The shortlist index for the database ``db`` is bound to, current as of now"""
+    gallery = _gallery(db)
+    with gallery.lock:
+        if gallery.store is not None:
+            if gallery.index is None:
+                _open_shared(db, gallery)
+            else:
+                _catch_up(gallery)
+            return gallery.index
+
+        stamp = gallery_stamp(db)
+        if gallery.index is None or gallery.stamp != stamp:
+            gallery.index = build_index(*load_gallery(db))
+            gallery.unsigned = load_unsigned(db)
+            gallery.stamp = stamp
+        return gallery.index
+
+
+def shortlist(db: Session, probe_signature: np.ndarray, k: int) -> list:
+    """Ids worth an exact comparison: the ``k`` nearest signatures, then every unsigned template"""
+    candidate_ids = get_face_index(db).search(probe_signature, k)
+    return list(candidate_ids) + list(_gallery(db).unsigned)
+
+
+def _record(db: Session, changes: list):
+    gallery = _gallery(db)
+    with gallery.lock:
+        if gallery.store is not None:
+            _record_shared(db, gallery, changes)
+        else:
+            _record_local(db, gallery, changes)
+
+
+def record_enrollment(db: Session, face_id: int, face_signature: bytes):
+    """Apply a committed registration to the index"""
+    record_enrollments(db, [(face_id, face_signature)])
+
+
+def record_enrollments(db: Session, enrollments: list):
+    """Apply committed (face id, signature bytes) registrations to the index at once"""
+    _record(db, [
+        (OP_ADD, face_id, deserialize_face_signature(signature)) for face_id, signature in enrollments
+    ])
+
+
+def record_removal(db: Session, face_id: int):
+    """Apply a committed face removal to the index"""
+    _record(db, [(OP_REMOVE, face_id, None)])
+
+
+def identify_face(db: Session, probe_face: np.ndarray, k: Optional[int] = None) -> tuple:
+    """Find the enrolled face that best matches the face crop ``probe_face``.
+
+    ``k`` defaults to settings.FACE_SHORTLIST_K; ``k <= 0`` skips the
+    prefilter and compares against every verified template.
+    Returns (FaceEncoding or None, distance). The user relationship of the
+    returned record is already loaded.
+    """
+    k = settings.FACE_SHORTLIST_K if k is None else k
+    query = db.query(FaceEncoding).options(joinedload(FaceEncoding.user))
+    if k > 0:
+        candidate_ids = shortlist(db, compute_face_signature(probe_face), k)
+        if not candidate_ids:
+            return None, 1.0
+        query = query.filter(FaceEncoding.id.in_(candidate_ids))
+    query = query.filter(FaceEncoding.is_verified == "verified")
+
+    by_encoder = {}
+    for face_record in query.all():
+        by_encoder.setdefault(face_record.encoder, []).append(face_record)
+
+    matched_record = None
+    matched_distance = 1.0
+    for name, records in by_encoder.items():
+        encoder = get_encoder(name)
+        stored = [encoder.deserialize(face_record.face_encoding) for face_record in records]
+        comparisons = encoder.compare_many(stored, encoder.encode(probe_face))
+        for face_record, (is_match, distance) in zip(records, comparisons):
+            if is_match and distance < matched_distance:
+                matched_record = face_record
+                matched_distance = distance
+
+    return matched_record, matched_distance
@@ -0,0 +1,227 @@
+"""Bulk face enrollment from a zip or tar archive of ID-card photos.
+
+Each image is named by the student's roll number (``CS001.jpg``, folders are
+ignored). Members are read one at a time from the spooled archive and
+detected/encoded on the shared process pool with a bounded number in flight,
+so memory stays flat however many photos the archive holds. Results are
+upserted into face_encodings in batched transactions and reported per image
+as NDJSON once their batch has been committed.
+"""
+
+import itertools
+import json
+import tarfile
+import zipfile
+from collections import deque
+from datetime import datetime
+from pathlib import PurePosixPath
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.face import FaceEncoding
+from app.models.user import User
+from app.utils.face_identification import record_enrollments
+from app.utils.face_recognition_util import (
+    compute_face_signature,
+    extract_face,
+    get_encoder,
+    serialize_face_signature,
+)
+from app.utils.process_pool import get_process_pool, process_pool_size
+
+BATCH_SIZE = 200
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+# Same floor as /api/face/register
+MIN_CONFIDENCE = 0.4
+
+
+def detect_archive_format(stream) -> str:
+    """'zip' or 'tar' from the first bytes of a rewindable stream"""
+    magic = stream.read(4)
+    stream.seek(0)
+    return "zip" if magic == b"PK\x03\x04" else "tar"
+
+
+def iter_archive(stream, fmt: str):
+    """Yield ``(member name, image bytes or None, error or None)`` one member at a time"""
+    if fmt == "zip":
+        try:
+            archive = zipfile.ZipFile(stream)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"Invalid zip archive: {e}")
+        with archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_image(info.filename):
+                    continue
+                if info.file_size > MAX_IMAGE_BYTES:
+                    yield info.filename, None, "Image is larger than 10 MB"
+                    continue
+                yield info.filename, archive.read(info), None
+    else:
+        try:
+            # "r|*" reads the tar (optionally compressed) as a stream, without seeking
+            archive = tarfile.open(fileobj=stream, mode="r|*")
+        except tarfile.TarError as e:
+            raise ValueError(f"Invalid tar archive: {e}")
+        with archive:
+            try:
+                for member in archive:
+                    if not member.isfile() or not _is_image(member.name):
+                        continue
+                    if member.size > MAX_IMAGE_BYTES:
+                        yield member.name, None, "Image is larger than 10 MB"
+                        continue
+                    yield member.name, archive.extractfile(member).read(), None
+            except (tarfile.TarError, EOFError, OSError) as e:
+                # Everything before the damage has been reported already
+                yield "", None, f"Archive is truncated or corrupt: {e}"
+
+
+def _is_image(name: str) -> bool:
+    path = PurePosixPath(name)
+    hidden = any(part.startswith(".") or part == "__MACOSX" for part in path.parts)
+    return not hidden and path.suffix.lower() in IMAGE_EXTENSIONS
+
+
+def encode_photo(image_data: bytes, encoder_name: str) -> dict:
+    """Detect and encode one photo (runs in a pool process)"""
+    face_crop, confidence_score, success = extract_face(image_data)
+    if not success:
+        return {"error": "No face detected in image"}
+    if confidence_score < MIN_CONFIDENCE:
+        return {"error": "Face quality too low"}
+    encoder = get_encoder(encoder_name)
+    return {
+        "face_encoding": encoder.serialize(encoder.encode(face_crop)),
+        "face_signature": serialize_face_signature(compute_face_signature(face_crop)),
+        "confidence_score": confidence_score,
+    }
+
+
+class FaceImport:
+    """Accumulates state for one bulk enrollment run"""
+
+    def __init__(self, db: Session, encoder_name: str = None, store_images: bool = True):
+        self.db = db
+        self.encoder_name = encoder_name or settings.FACE_ENCODER
+        self.store_images = store_images
+        self.counts = {"total": 0, "enrolled": 0, "updated": 0, "failed": 0}
+        self.seen_rolls = set()
+
+    def run(self, members):
+        """Yield one NDJSON line per image, then a summary line"""
+        pool = get_process_pool()
+        # Enough work queued to keep every pool process busy, but never the archive
+        window = 4 * process_pool_size()
+        in_flight = deque()
+        batch = []
+
+        for name, image_data, error in members:
+            self.counts["total"] += 1
+            roll_number = PurePosixPath(name).stem.strip()
+            if error is None and roll_number in self.seen_rolls:
+                error = "Duplicate roll number in archive"
+            self.seen_rolls.add(roll_number)
+            future = None if error else pool.submit(encode_photo, image_data, self.encoder_name)
+            in_flight.append((name, roll_number, image_data if self.store_images else None, future, error))
+
+            while len(in_flight) >= window:
+                batch.append(self._collect(in_flight.popleft()))
+                if len(batch) >= BATCH_SIZE:
+                    yield from self._flush(batch)
+                    batch = []
+
+        while in_flight:
+            batch.append(self._collect(in_flight.popleft()))
+        if batch:
+            yield from self._flush(batch)
+        yield self._line({"summary": self.counts})
+
+    def _collect(self, item) -> dict:
+        name, roll_number, image_data, future, error = item
+        entry = {"file": name, "roll_number": roll_number, "image": image_data}
+        if error is None:
+            try:
+                entry.update(future.result())
+            except Exception as e:
+                entry["error"] = f"Could not read image: {e}"
+        else:
+            entry["error"] = error
+        return entry
+
+    def _flush(self, batch: list):
+        """Upsert one batch in a single transaction and yield its report lines"""
+        encoded = [entry for entry in batch if "error" not in entry]
+        rolls = [entry["roll_number"] for entry in encoded]
+        user_ids = dict(self.db.execute(
+            select(User.roll_number, User.id).where(User.roll_number.in_(rolls))
+        ).all()) if rolls else {}
+        existing = dict(self.db.execute(
+            select(FaceEncoding.user_id, FaceEncoding.id).where(FaceEncoding.user_id.in_(list(user_ids.values())))
+        ).all()) if user_ids else {}
+
+        now = datetime.utcnow()
+        inserts, updates = [], []
+        for entry in encoded:
+            user_id = user_ids.get(entry["roll_number"])
+            if user_id is None:
+                entry["error"] = "No student with this roll number"
+                continue
+            values = {
+                "face_encoding": entry["face_encoding"],
+                "face_signature": entry["face_signature"],
+                "encoder": self.encoder_name,
+                "confidence_score": entry["confidence_score"],
+                "is_verified": "verified",
+                "verified_at": now,
+            }
+            if entry["image"] is not None:
+                values["face_image"] = entry["image"]
+            if user_id in existing:
+                entry["face_id"], entry["status"] = existing[user_id], "updated"
+                updates.append({"id": existing[user_id], **values})
+            else:
+                entry["status"] = "enrolled"
+                inserts.append((entry, {"user_id": user_id, **values}))
+
+        if updates:
+            self.db.execute(update(FaceEncoding), updates)
+        if inserts:
+            created = self.db.execute(
+                insert(FaceEncoding).returning(FaceEncoding.id, sort_by_parameter_order=True),
+                [values for _, values in inserts],
+            ).scalars().all()
+            for (entry, _), face_id in zip(inserts, created):
+                entry["face_id"] = face_id
+        self.db.commit()
+        record_enrollments(self.db, [
+            (entry["face_id"], entry["face_signature"]) for entry in encoded if "face_id" in entry
+        ])
+
+        for entry in batch:
+            report = {"file": entry["file"], "roll_number": entry["roll_number"]}
+            if "error" in entry:
+                self.counts["failed"] += 1
+                report.update({"status": "failed", "error": entry["error"]})
+            else:
+                self.counts[entry["status"]] += 1
+                report["status"] = entry["status"]
+            yield self._line(report)
+
+    @staticmethod
+    def _line(record: dict) -> bytes:
+        return (json.dumps(record) + "\n").encode()
+
+
+def import_faces(db: Session, stream, fmt: str = None, encoder_name: str = None, store_images: bool = True):
+    """Iterator of NDJSON report lines for enrolling every photo in ``stream``.
+
+    Raises ValueError before yielding anything if the archive is unreadable.
+    """
+    fmt = fmt or detect_archive_format(stream)
+    members = iter_archive(stream, fmt)
+    # Open the archive now so a corrupt upload is a 400, not a broken stream
+    first = next(members, None)
+    head = [first] if first is not None else []
+    return FaceImport(db, encoder_name, store_images).run(itertools.chain(head, members))
@@ -0,0 +1,193 @@
+"""Nearest-neighbour indexes over fixed-length face descriptors.
+
+Both backends store vectors in an inverted-list (CSR) layout: rows grouped by
+list, with ``offsets[l]:offsets[l + 1]`` being list ``l``. ExactIndex has a
+single list and scans it all; IVFIndex clusters the gallery with k-means and
+scans only the ``nprobe`` lists whose centroids are nearest the probe.
+
+The CSR arrays are immutable so they can be memory-mapped from disk (see
+app.utils.face_gallery). Registrations since the last compaction live in a
+small in-memory tail and removals are tombstones; ``compact()`` folds both
+back into the arrays.
+"""
+
+import math
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+def squared_distances(vectors: np.ndarray, probe: np.ndarray) -> np.ndarray:
+    difference = vectors - probe
+    return np.einsum("ij,ij->i", difference, difference)
+
+
+def kmeans(vectors: np.ndarray, clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means on a sample of at most 256 points per cluster"""
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > 256 * clusters:
+        sample = vectors[rng.choice(len(vectors), 256 * clusters, replace=False)]
+    centroids = sample[rng.choice(len(sample), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        # |x - c|^2 without |x|^2, which does not change the argmin
+        scores = (centroids ** 2).sum(axis=1) - 2 * sample @ centroids.T
+        labels = scores.argmin(axis=1)
+        for cluster in range(clusters):
+            members = sample[labels == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+    return centroids.astype(np.float32)
+
+
+class FaceIndex(ABC):
+    """Common storage; subclasses choose the centroids and which lists to scan"""
+
+    kind = None
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, ids: np.ndarray, offsets: np.ndarray):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.dim = centroids.shape[1]
+        self._tail = {}  # face id -> vector added since the last compaction
+        self._removed = set()  # stored face ids no longer in the gallery
+
+    @classmethod
+    def build(cls, ids, vectors: np.ndarray, **options):
+        """Index ``vectors`` (one row per id)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        centroids = cls.train(vectors, **options)
+        return cls._from_rows(centroids, np.asarray(ids, dtype=np.int64), vectors, **options)
+
+    @classmethod
+    @abstractmethod
+    def train(cls, vectors: np.ndarray, **options) -> np.ndarray:
+        """Centroids of the inverted lists for ``vectors``"""
+
+    @classmethod
+    def _from_rows(cls, centroids, ids, vectors, **options):
+        lists = cls._assign(centroids, vectors)
+        order = np.argsort(lists, kind="stable")
+        offsets = np.searchsorted(lists[order], np.arange(len(centroids) + 1)).astype(np.int64)
+        return cls(centroids, vectors[order], ids[order], offsets, **options)
+
+    @staticmethod
+    def _assign(centroids: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        if len(centroids) == 1 or not len(vectors):
+            return np.zeros(len(vectors), dtype=np.int64)
+        scores = (centroids ** 2).sum(axis=1) - 2 * vectors @ centroids.T
+        return scores.argmin(axis=1)
+
+    @abstractmethod
+    def probe_lists(self, probe: np.ndarray) -> np.ndarray:
+        """Indices of the lists to scan for ``probe``"""
+
+    def __len__(self):
+        return len(self.ids) - len(self._removed) + len(self._tail)
+
+    def _is_stored(self, face_id: int) -> bool:
+        # A vectorised scan instead of a per-worker set keeps mapped ids shared
+        return face_id not in self._removed and bool((self.ids == face_id).any())
+
+    @property
+    def pending(self) -> int:
+        """Changes held outside the CSR arrays"""
+        return len(self._tail) + len(self._removed)
+
+    def add(self, face_id: int, vector: np.ndarray):
+        """Insert or replace the descriptor for ``face_id``"""
+        if self._is_stored(face_id):
+            self._removed.add(face_id)
+        self._tail[face_id] = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+
+    def remove(self, face_id: int):
+        self._tail.pop(face_id, None)
+        if self._is_stored(face_id):
+            self._removed.add(face_id)
+
+    def search(self, probe: np.ndarray, k: int) -> list:
+        """Face ids of the (approximately) ``k`` nearest descriptors, nearest first"""
+        probe = np.asarray(probe, dtype=np.float32).reshape(self.dim)
+        rows = [np.arange(self.offsets[l], self.offsets[l + 1]) for l in self.probe_lists(probe)]
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        ids, vectors = self.ids[rows], self.vectors[rows]
+        if self._removed:
+            keep = ~np.isin(ids, np.fromiter(self._removed, dtype=np.int64))
+            ids, vectors = ids[keep], vectors[keep]
+        if self._tail:
+            # The tail is small, so it is scanned whole rather than by list
+            ids = np.concatenate([ids, np.fromiter(self._tail, dtype=np.int64)])
+            vectors = np.vstack([vectors, np.stack(list(self._tail.values()))])
+        if not len(ids):
+            return []
+
+        distances = squared_distances(vectors, probe)
+        if k < len(distances):
+            nearest = np.argpartition(distances, k)[:k]
+            nearest = nearest[np.argsort(distances[nearest])]
+        else:
+            nearest = np.argsort(distances)
+        return ids[nearest].tolist()
+
+    def compact(self):
+        """Fold the tail and tombstones into new CSR arrays (centroids are kept)"""
+        if not self.pending:
+            return self
+        keep = ~np.isin(self.ids, np.fromiter(self._removed, dtype=np.int64))
+        ids = np.concatenate([self.ids[keep], np.fromiter(self._tail, dtype=np.int64)])
+        tail = np.stack(list(self._tail.values())) if self._tail else np.empty((0, self.dim), np.float32)
+        vectors = np.vstack([self.vectors[keep], tail])
+        return self._from_rows(self.centroids, ids, vectors, **self.options())
+
+    def options(self) -> dict:
+        return {}
+
+
+class ExactIndex(FaceIndex):
+    """Brute-force scan of every descriptor"""
+
+    kind = "exact"
+
+    @classmethod
+    def train(cls, vectors, **options):
+        return np.zeros((1, vectors.shape[1]), dtype=np.float32)
+
+    def probe_lists(self, probe):
+        return [0]
+
+
+class IVFIndex(FaceIndex):
+    """Inverted-file index: k-means lists, scanning the ``nprobe`` nearest"""
+
+    kind = "ivf"
+
+    def __init__(self, centroids, vectors, ids, offsets, nprobe: int = 8, nlist: int = None):
+        super().__init__(centroids, vectors, ids, offsets)
+        self.nprobe = nprobe
+
+    @classmethod
+    def train(cls, vectors, nlist: int = None, nprobe: int = 8):
+        nlist = min(len(vectors), nlist or max(1, int(math.sqrt(len(vectors)))))
+        return kmeans(vectors, max(1, nlist))
+
+    def probe_lists(self, probe):
+        distances = squared_distances(self.centroids, probe)
+        nprobe = min(self.nprobe, len(distances))
+        return np.argpartition(distances, nprobe - 1)[:nprobe]
+
+    def options(self):
+        return {"nprobe": self.nprobe}
+
+
+BACKENDS = {backend.kind: backend for backend in (ExactIndex, IVFIndex)}
+
+
+def recall(index: FaceIndex, exact: FaceIndex, probes: np.ndarray, k: int) -> float:
+    """Share of the exact top ``k`` neighbours that ``index`` also returns"""
+    found = total = 0
+    for probe in probes:
+        expected = exact.search(probe, k)
+        found += len(set(expected) & set(index.search(probe, k)))
+        total += len(expected)
+    return found / total if total else 1.0
@@ -5,62 +5,171 @@ from PIL import Image
 import pickle
 import logging
 import base64
+import threading
+from abc import ABC, abstractmethod
 
 logger = logging.getLogger(__name__)
 
 
-def encode_face_from_image(image_data: bytes) -> tuple:
-    """
-    Encode face from image bytes using OpenCV Haar Cascade.
-    Returns: (face_encoding, confidence_score, success)
+# Client boxes are searched within this fraction of their size on each side
+FACE_BOX_SEARCH_MARGIN = 0.3
+# Reject client boxes smaller than this (pixels) or with implausible aspect ratios
+FACE_BOX_MIN_SIZE = 20
+FACE_BOX_MAX_ASPECT = 2.0
+
+_detectors = threading.local()
+
+
+def get_face_detector():
+    """Return this thread's Haar cascade, loading it on first use.
+
+    Loading the cascade XML costs tens of milliseconds, and a classifier
+    instance must not be shared across threads.
     """
-    try:
-        # Load pre-trained face detector
-        face_cascade = cv2.CascadeClassifier(
+    detector = getattr(_detectors, "face", None)
+    if detector is None:
+        detector = cv2.CascadeClassifier(
             cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         )
-        
+        _detectors.face = detector
+    return detector
+
+
+def _to_gray(image_array: np.ndarray) -> np.ndarray:
+    if len(image_array.shape) == 3:
+        return cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
+    return image_array
+
+
+def _detect_full_frame(gray: np.ndarray):
+    """Exhaustive full-frame scan, used when no usable client box is available"""
+    face_cascade = get_face_detector()
+    # Detect faces with more lenient parameters
+    # Lower minNeighbors = more lenient (default is 5, we use 2 for better phone detection)
+    # Lower scaleFactor = more thorough search
+    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.01, minNeighbors=2, minSize=(15, 15))
+
+    if len(faces) == 0:
+        # Try even more lenient detection if first attempt fails
+        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=1, minSize=(10, 10))
+    return faces
+
+
+def _sanitize_face_box(face_box, image_shape):
+    """Clip a client (x, y, width, height) box to the image; None if implausible"""
+    try:
+        x, y, w, h = (float(value) for value in face_box)
+    except (TypeError, ValueError):
+        return None
+    if not all(np.isfinite([x, y, w, h])) or w <= 0 or h <= 0:
+        return None
+
+    image_h, image_w = image_shape[:2]
+    x0, y0 = max(0.0, x), max(0.0, y)
+    x1, y1 = min(float(image_w), x + w), min(float(image_h), y + h)
+    w, h = x1 - x0, y1 - y0
+    if min(w, h) < FACE_BOX_MIN_SIZE or max(w / h, h / w) > FACE_BOX_MAX_ASPECT:
+        return None
+    return int(x0), int(y0), int(w), int(h)
+
+
+def _refine_face_box(gray: np.ndarray, box):
+    """Search for a face only in a window around ``box`` at scales close to it.
+
+    Returns the detected (x, y, w, h) in full-image coordinates, or None.
+    """
+    x, y, w, h = box
+    margin_x, margin_y = int(w * FACE_BOX_SEARCH_MARGIN), int(h * FACE_BOX_SEARCH_MARGIN)
+    wx0, wy0 = max(0, x - margin_x), max(0, y - margin_y)
+    wx1 = min(gray.shape[1], x + w + margin_x)
+    wy1 = min(gray.shape[0], y + h + margin_y)
+    window = gray[wy0:wy1, wx0:wx1]
+
+    side = min(w, h)
+    faces = get_face_detector().detectMultiScale(
+        window,
+        scaleFactor=1.05,
+        minNeighbors=2,
+        minSize=(max(10, int(side * 0.6)), max(10, int(side * 0.6))),
+        maxSize=(int(max(w, h) * 1.5), int(max(w, h) * 1.5)),
+    )
+    if len(faces) == 0:
+        return None
+
+    # Prefer the detection whose centre is closest to the client box centre
+    cx, cy = x + w / 2 - wx0, y + h / 2 - wy0
+    fx, fy, fw, fh = min(faces, key=lambda f: (f[0] + f[2] / 2 - cx) ** 2 + (f[1] + f[3] / 2 - cy) ** 2)
+    return wx0 + int(fx), wy0 + int(fy), int(fw), int(fh)
+
+
+def locate_face(image_array: np.ndarray, face_box=None, pre_cropped: bool = False):
+    """Return the (x, y, w, h) of the face to encode, or None if there is none.
+
+    ``face_box`` is a client-side detection in image coordinates and
+    ``pre_cropped`` means the image is already a crop around the face. Either
+    way the server only confirms the face inside a small search window; the
+    exhaustive full-frame scan runs only if that confirmation fails.
+    """
+    gray = _to_gray(image_array)
+
+    if pre_cropped:
+        face_box = (0, 0, gray.shape[1], gray.shape[0])
+    if face_box is not None:
+        box = _sanitize_face_box(face_box, gray.shape)
+        if box is not None:
+            refined = _refine_face_box(gray, box)
+            if refined is not None:
+                return refined
+
+    faces = _detect_full_frame(gray)
+    if len(faces) == 0:
+        return None
+
+    # Get the largest face
+    x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+    return int(x), int(y), int(w), int(h)
+
+
+def extract_face(image_data: bytes, face_box=None, pre_cropped: bool = False) -> tuple:
+    """
+    Detect the face in image bytes and return it as a 100x100 crop.
+    ``face_box``/``pre_cropped`` narrow the search, see locate_face().
+    Returns: (face_crop, confidence_score, success)
+    """
+    try:
         # Convert bytes to image
         image = Image.open(BytesIO(image_data))
         image_array = np.array(image)
-        
-        # Convert to grayscale if needed
-        if len(image_array.shape) == 3:
-            gray = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = image_array
-        
-        # Detect faces with more lenient parameters
-        # Lower minNeighbors = more lenient (default is 5, we use 2 for better phone detection)
-        # Lower scaleFactor = more thorough search
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.01, minNeighbors=2, minSize=(15, 15))
-        
-        if len(faces) == 0:
-            # Try even more lenient detection if first attempt fails
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=1, minSize=(10, 10))
-        
-        if len(faces) == 0:
+
+        location = locate_face(image_array, face_box=face_box, pre_cropped=pre_cropped)
+        if location is None:
             return None, 0.0, False
-        
-        # Get the largest face
-        largest_face = max(faces, key=lambda f: f[2] * f[3])
-        x, y, w, h = largest_face
-        
+        x, y, w, h = location
+
         # Extract face region
         face_region = image_array[y:y+h, x:x+w]
-        
-        # Create a simple encoding by converting face region to a hash
-        face_encoding = cv2.resize(face_region, (100, 100))
-        face_hash = pickle.dumps(face_encoding)
-        
+        face_crop = cv2.resize(face_region, (100, 100))
+
         # Confidence score based on face size (more lenient, minimum 0.4 instead of 0.5)
         confidence_score = min(1.0, max(0.4, (w * h) / (image_array.shape[0] * image_array.shape[1]) * 80))
-        
-        return face_encoding, confidence_score, True
-        
+
+        return face_crop, confidence_score, True
+
     except Exception as e:
-        logger.error(f"Error encoding face: {str(e)}")
+        logger.error(f"Error extracting face: {str(e)}")
+        return None, 0.0, False
+
+
+def encode_face_from_image(image_data: bytes, face_box=None, pre_cropped: bool = False, encoder=None) -> tuple:
+    """
+    Encode face from image bytes using OpenCV Haar Cascade and ``encoder``
+    (default: the histogram encoder, whose encoding is the face crop itself).
+    Returns: (face_encoding, confidence_score, success)
+    """
+    face_crop, confidence_score, success = extract_face(image_data, face_box=face_box, pre_cropped=pre_cropped)
+    if not success:
         return None, 0.0, False
+    return (encoder or get_encoder("histogram")).encode(face_crop), confidence_score, True
 
 
 def serialize_face_encoding(face_encoding: np.ndarray) -> bytes:
@@ -73,6 +182,35 @@ def deserialize_face_encoding(encoded_bytes: bytes) -> np.ndarray:
     return pickle.loads(encoded_bytes)
 
 
+# Bins in the coarse signature used to shortlist identification candidates
+FACE_SIGNATURE_BINS = 16
+
+
+def compute_face_signature(face_encoding: np.ndarray) -> np.ndarray:
+    """
+    Cheap low-dimensional summary of a face encoding for candidate shortlisting.
+    A 16-bin grayscale histogram, L1-normalised and square-rooted, so the
+    Euclidean distance between two signatures is the Hellinger distance and
+    tracks the Bhattacharyya distance used by get_face_distance.
+    """
+    gray = face_encoding
+    if len(gray.shape) == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+    hist = cv2.calcHist([gray], [0], None, [FACE_SIGNATURE_BINS], [0, 256]).flatten()
+    total = hist.sum()
+    if total > 0:
+        hist /= total
+    return np.sqrt(hist).astype(np.float32)
+
+
+def serialize_face_signature(signature: np.ndarray) -> bytes:
+    return np.asarray(signature, dtype=np.float32).tobytes()
+
+
+def deserialize_face_signature(signature_bytes: bytes) -> np.ndarray:
+    return np.frombuffer(signature_bytes, dtype=np.float32)
+
+
 def compare_faces(face_encoding_1: np.ndarray, face_encoding_2: np.ndarray, tolerance: float = 0.6) -> bool:
     """
     Compare two face encodings using histogram comparison.
@@ -143,49 +281,180 @@ def detect_faces_in_image(image_data: bytes) -> list:
     Returns: list of face locations
     """
     try:
-        face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
-        
         image = Image.open(BytesIO(image_data))
         image_array = np.array(image)
-        
-        if len(image_array.shape) == 3:
-            gray = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = image_array
-        
+
         # Use same lenient parameters as encode_face_from_image
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.01, minNeighbors=2, minSize=(15, 15))
-        
-        # Try more lenient detection if first attempt fails
-        if len(faces) == 0:
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=1, minSize=(10, 10))
-        
-        return list(faces)
-        
+        return list(_detect_full_frame(_to_gray(image_array)))
+
     except Exception as e:
         logger.error(f"Error detecting faces: {str(e)}")
         return []
 
 
-def verify_face_from_stored_encoding(image_data: bytes, stored_encoding: np.ndarray) -> tuple:
+def compare_face_encodings(stored_encoding: np.ndarray, face_encoding: np.ndarray) -> tuple:
+    """
+    Compare an already encoded probe face with a stored encoding.
+    Returns: (is_match, confidence_distance)
+    """
+    is_match = compare_faces(stored_encoding, face_encoding, tolerance=0.5)
+    distance = get_face_distance(stored_encoding, face_encoding)
+    return is_match, distance
+
+
+def verify_face_from_stored_encoding(image_data: bytes, stored_encoding: np.ndarray, face_box=None, pre_cropped: bool = False, encoder=None) -> tuple:
     """
     Verify if face in image matches stored encoding.
+    ``encoder`` is the one that produced ``stored_encoding`` (default: histogram).
     Returns: (is_match, confidence_distance)
     """
     try:
-        face_encoding, confidence, success = encode_face_from_image(image_data)
-        
+        encoder = encoder or get_encoder("histogram")
+        face_encoding, confidence, success = encode_face_from_image(
+            image_data, face_box=face_box, pre_cropped=pre_cropped, encoder=encoder
+        )
+
         if not success:
             return False, 1.0
-        
-        # Compare faces
-        is_match = compare_faces(stored_encoding, face_encoding, tolerance=0.5)
-        distance = get_face_distance(stored_encoding, face_encoding)
-        
-        return is_match, distance
-        
+
+        return encoder.compare(stored_encoding, face_encoding)
+
     except Exception as e:
         logger.error(f"Error verifying face: {str(e)}")
         return False, 1.0
+
+
+class FaceEncoder(ABC):
+    """
+    Turns a 100x100 face crop into a stored template and compares templates.
+    Distances run from 0.0 (identical) to 1.0 (completely different).
+    """
+
+    name = None
+
+    @abstractmethod
+    def encode(self, face_crop: np.ndarray) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def serialize(self, encoding: np.ndarray) -> bytes:
+        ...
+
+    @abstractmethod
+    def deserialize(self, encoded_bytes: bytes) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def compare(self, stored_encoding: np.ndarray, face_encoding: np.ndarray) -> tuple:
+        """Returns: (is_match, distance)"""
+
+    def compare_many(self, stored_encodings: list, face_encoding: np.ndarray) -> list:
+        """compare() against each stored encoding"""
+        return [self.compare(stored, face_encoding) for stored in stored_encodings]
+
+
+class HistogramEncoder(FaceEncoder):
+    """The original scheme: store the pickled crop, compare grayscale histograms"""
+
+    name = "histogram"
+
+    def encode(self, face_crop):
+        return face_crop
+
+    def serialize(self, encoding):
+        return serialize_face_encoding(encoding)
+
+    def deserialize(self, encoded_bytes):
+        return deserialize_face_encoding(encoded_bytes)
+
+    def compare(self, stored_encoding, face_encoding):
+        return compare_face_encodings(stored_encoding, face_encoding)
+
+
+# LBP descriptor: face resized to LBP_SIZE, split into LBP_GRID x LBP_GRID cells
+LBP_SIZE = 64
+LBP_GRID = 8
+# A neighbour counts as brighter only by this margin, so sensor noise on flat
+# skin does not flip codes
+LBP_NOISE_MARGIN = 4
+# Calibrated only on benchmarks/face_pipeline.py synthetic captures; tune it
+# on real photos (watching the false reject rate) before making LBP the default
+LBP_MATCH_THRESHOLD = 0.18
+_LBP_NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+
+def _uniform_lbp_table() -> np.ndarray:
+    """Map the 256 LBP codes to the 58 uniform patterns plus one catch-all bin"""
+    table = np.full(256, 58, np.uint8)
+    uniform = 0
+    for code in range(256):
+        bits = [(code >> bit) & 1 for bit in range(8)]
+        if sum(bits[bit] != bits[(bit + 1) % 8] for bit in range(8)) <= 2:
+            table[code] = uniform
+            uniform += 1
+    return table
+
+
+_UNIFORM_LBP = _uniform_lbp_table()
+LBP_BINS = 59
+
+
+class LBPEncoder(FaceEncoder):
+    """
+    Uniform local binary pattern histograms per cell, concatenated,
+    square-rooted and L2-normalised into one fixed-length float16 vector.
+    Computed once at enrollment; comparing is a single vector distance.
+    """
+
+    name = "lbp"
+    dim = LBP_GRID * LBP_GRID * LBP_BINS
+
+    def encode(self, face_crop):
+        gray = _to_gray(face_crop)
+        size = LBP_SIZE
+        gray = cv2.resize(gray, (size + 2, size + 2), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(gray, (3, 3), 0).astype(np.int16)
+
+        center = gray[1:-1, 1:-1] + LBP_NOISE_MARGIN
+        codes = np.zeros(center.shape, np.uint8)
+        for bit, (dy, dx) in enumerate(_LBP_NEIGHBOURS):
+            neighbour = gray[1 + dy:size + 1 + dy, 1 + dx:size + 1 + dx]
+            codes |= (neighbour >= center).astype(np.uint8) << bit
+
+        cell = size // LBP_GRID
+        patterns = _UNIFORM_LBP[codes].reshape(LBP_GRID, cell, LBP_GRID, cell).transpose(0, 2, 1, 3)
+        patterns = patterns.reshape(LBP_GRID * LBP_GRID, cell * cell)
+        # One bincount over (cell, pattern) pairs builds every cell histogram
+        offsets = np.arange(LBP_GRID * LBP_GRID)[:, None] * LBP_BINS
+        histograms = np.bincount((patterns + offsets).ravel(), minlength=self.dim).astype(np.float32)
+
+        descriptor = np.sqrt(histograms / (cell * cell))
+        return (descriptor / np.linalg.norm(descriptor)).astype(np.float16)
+
+    def serialize(self, encoding):
+        return np.asarray(encoding, dtype=np.float16).tobytes()
+
+    def deserialize(self, encoded_bytes):
+        return np.frombuffer(encoded_bytes, dtype=np.float16)
+
+    def compare(self, stored_encoding, face_encoding):
+        return self.compare_many([stored_encoding], face_encoding)[0]
+
+    def compare_many(self, stored_encodings, face_encoding):
+        stored = np.asarray(stored_encodings, dtype=np.float32)
+        difference = stored - np.asarray(face_encoding, dtype=np.float32)
+        # Both vectors are non-negative and unit length, so the Euclidean
+        # distance is at most sqrt(2)
+        distances = np.sqrt(np.einsum("ij,ij->i", difference, difference) / 2)
+        return [(bool(distance < LBP_MATCH_THRESHOLD), float(distance)) for distance in distances]
+
+
+ENCODERS = {encoder.name: encoder for encoder in (HistogramEncoder(), LBPEncoder())}
+
+
+def get_encoder(name: str) -> FaceEncoder:
+    """The encoder registered as ``name`` (the value of FaceEncoding.encoder)"""
+    try:
+        return ENCODERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown face encoder: {name}")
@@ -0,0 +1,58 @@
+"""JSON encoding for payloads the app builds itself.
+
+FastAPI validates a route's return value against its response model and runs
+plain dicts through ``jsonable_encoder`` before encoding them. For payloads
+assembled here from query rows (listings, tallies, statistics, catalog
+bodies) that work is redundant: routes return ``json_response(payload)``
+instead, which encodes the payload directly. Encoding uses the optional
+``orjson`` package when installed and falls back to the standard library
+with output identical to FastAPI's JSONResponse.
+
+Routes that return ORM objects through a response model are left to FastAPI,
+which serializes those straight to JSON bytes with pydantic-core.
+"""
+
+import json
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+def _default(value):
+    # Types neither encoder handles natively (Decimal, pydantic models, ...)
+    return jsonable_encoder(value)
+
+
+if orjson is not None:
+
+    def dumps(value) -> bytes:
+        """Compact UTF-8 JSON for ``value``"""
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+else:
+
+    def dumps(value) -> bytes:
+        """Compact UTF-8 JSON for ``value``"""
+        return json.dumps(
+            value, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def json_response(content, response: Response = None, status_code: int = 200) -> FastJSONResponse:
+    """Send an internally built payload without response-model validation.
+
+    ``response`` is the route's injected Response; headers set on it (such as
+    validators from ``conditional()``) are carried over.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
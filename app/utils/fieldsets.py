@@ -0,0 +1,61 @@
+"""Sparse fieldsets for list endpoints (``?fields=id,name,symbol_number``).
+
+A fieldset names the response fields a client wants. It decides both which
+columns the ORM loads (via ``load_only``, so large text columns are never
+read when not asked for) and which response model serializes the rows; a
+model is generated once per distinct fieldset.
+"""
+
+from functools import lru_cache
+from typing import Optional
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy.orm import load_only
+
+
+def parse_fields(value: Optional[str], available) -> Optional[tuple]:
+    """Requested field names in ``available`` order, or None for all fields.
+
+    Raises ValueError for unknown names.
+    """
+    if value is None or not value.strip():
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested.difference(available)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(sorted(unknown))}. Available: {', '.join(available)}"
+        )
+    return tuple(name for name in available if name in requested)
+
+
+def requested_fields(value: Optional[str], available) -> Optional[tuple]:
+    """parse_fields() for a ``fields`` query parameter, answering 400 for unknown names"""
+    try:
+        return parse_fields(value, available)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def column_loader(model, fields: tuple, derived: dict = None):
+    """``load_only`` option loading the primary key plus the columns behind ``fields``.
+
+    ``derived`` maps response fields computed from other columns (properties)
+    to those columns.
+    """
+    derived = derived or {}
+    names = {"id"}
+    for field in fields:
+        names.update(derived.get(field, (field,)))
+    return load_only(*(getattr(model, name) for name in sorted(names)))
+
+
+@lru_cache(maxsize=256)
+def sparse_model(model: type[BaseModel], fields: tuple) -> type[BaseModel]:
+    """Response model with only the ``fields`` of ``model``"""
+    definitions = {name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    return create_model(
+        f"{model.__name__}_{'_'.join(fields)}",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
@@ -0,0 +1,114 @@
+"""HTTP caching: validators, conditional requests and per-route cache policy.
+
+Routes declare their Cache-Control with ``@cache_policy(...)``; the
+ConditionalRequestMiddleware applies it and answers If-None-Match /
+If-Modified-Since for every response that carries a validator. Routes that
+can tell cheaply whether anything changed (an ``updated_at`` stamp, a vote
+count) call ``conditional()`` before doing the expensive work, which raises a
+304 straight away when the client's copy is current.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import HTTPException, Request, Response, status
+
+
+def cache_policy(cache_control: str):
+    """Declare the Cache-Control header of a route's successful responses"""
+
+    def decorate(endpoint):
+        endpoint.cache_control = cache_control
+        return endpoint
+
+    return decorate
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def stamp_etag(*parts) -> str:
+    """ETag for a representation identified by version stamps (ids, counts, timestamps)"""
+    return etag_for(repr(parts).encode())
+
+
+def http_date(moment: datetime) -> str:
+    """Last-Modified value for a naive UTC datetime"""
+    return format_datetime(moment.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value matches ``etag`` (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in candidates)
+
+
+def not_modified(headers, etag: str = None, last_modified: str = None) -> bool:
+    """Whether request ``headers`` show the client already holds this representation.
+
+    If-Modified-Since only counts when the request has no If-None-Match.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def conditional(request: Request, response: Response, etag: str = None, last_modified: datetime = None):
+    """Attach validators to ``response``, or raise 304 if the client's copy is current"""
+    headers = {}
+    if etag is not None:
+        headers["ETag"] = etag
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    if not_modified(request.headers, headers.get("ETag"), headers.get("Last-Modified")):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+def cached_json_response(body: bytes, etag: str) -> Response:
+    """Pre-serialized JSON ``body``; the middleware turns it into a 304 when current"""
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def byte_range(request: Request, size: int, etag: str):
+    """(start, end) of a satisfiable single ``Range: bytes=`` request, else None.
+
+    ``end`` is exclusive. Multi-range requests, a Range whose If-Range no
+    longer matches ``etag`` and malformed headers get the whole
+    representation; a well-formed range outside it raises 416.
+    """
+    header = request.headers.get("range")
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last) + 1, size) if last else size
+        else:
+            start, end = max(size - int(last), 0), size
+    except ValueError:
+        return None
+    if start < 0 or start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
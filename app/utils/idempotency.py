@@ -0,0 +1,115 @@
+"""Idempotency keys: safe retries of non-idempotent POSTs.
+
+A route decorated with ``idempotent`` accepts an ``Idempotency-Key`` header.
+The first request with a key runs the handler and its response is stored in
+``idempotency_keys`` for IDEMPOTENCY_KEY_TTL_SECONDS; retries with the same
+key get that response back (marked ``Idempotent-Replayed: true``) without
+the handler running again, so no second vote attempt, email or database
+write. Keys are scoped to the route and the caller's credentials, and a key
+reused with a different body is rejected rather than replayed.
+
+The table is shared by every worker, so a retry that lands on another
+process is still recognised. The request/response plumbing lives in
+``app.middleware.idempotency``.
+"""
+
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# A claim left in flight this long belongs to a request that died mid-way
+IN_FLIGHT_SECONDS = 60
+# Expired keys are deleted at most this often per process
+PURGE_INTERVAL_SECONDS = 300
+
+_last_purge = 0.0
+
+
+def idempotent(endpoint):
+    """Let clients retry a route safely by sending an Idempotency-Key header"""
+    endpoint.idempotent = True
+    return endpoint
+
+
+def scoped_key(method: str, path: str, credentials: str, client_key: str) -> str:
+    """The stored key: the client's key, bound to the route and the caller"""
+    return hashlib.sha256("\n".join((method, path, credentials, client_key)).encode()).hexdigest()
+
+
+def fingerprint(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def claim(db: Session, key: str, request_fingerprint: str):
+    """Reserve ``key`` for this request.
+
+    Returns None when the caller should run the handler (and later
+    ``complete`` or ``release`` the key), otherwise the existing
+    IdempotencyKey row: finished (status_code set) or still in flight.
+    """
+    now = datetime.utcnow()
+    _purge_expired(db, now)
+    db.add(IdempotencyKey(
+        key=key,
+        fingerprint=request_fingerprint,
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+    ))
+    try:
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    existing = db.get(IdempotencyKey, key)
+    if existing is None:
+        return claim(db, key, request_fingerprint)  # Released in the meantime
+    abandoned = existing.status_code is None and existing.created_at < now - timedelta(seconds=IN_FLIGHT_SECONDS)
+    if existing.expires_at < now or abandoned:
+        # Take the key over; the conditional update lets only one retry win
+        taken = db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key, IdempotencyKey.created_at == existing.created_at)
+            .values(
+                fingerprint=request_fingerprint, status_code=None, content_type=None, body=None,
+                created_at=now, expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+            )
+        ).rowcount
+        db.commit()
+        if taken:
+            return None
+    return existing
+
+
+def complete(db: Session, key: str, status_code: int, content_type: str, body: bytes):
+    """Store the response the handler produced for ``key``"""
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(status_code=status_code, content_type=content_type, body=body)
+    )
+    db.commit()
+
+
+def release(db: Session, key: str):
+    """Forget ``key`` so a retry runs the handler again (after a server error)"""
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+    db.commit()
+
+
+def _purge_expired(db: Session, now: datetime):
+    global _last_purge
+    if time.monotonic() - _last_purge < PURGE_INTERVAL_SECONDS:
+        return
+    _last_purge = time.monotonic()
+    removed = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now)).rowcount
+    if removed:
+        logger.debug("Purged %d expired idempotency key(s)", removed)
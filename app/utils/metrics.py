@@ -0,0 +1,226 @@
+"""In-process metrics in the Prometheus text format.
+
+Two kinds of timing are collected:
+
+- per route: request latency, and the number and total time of the database
+  queries each request ran (``MetricsMiddleware`` plus the SQLAlchemy cursor
+  hooks installed by ``instrument_queries()``);
+- per stage: sections of work that are slow for reasons other than the
+  database (face detection and encoding, SMTP), wrapped in ``timed()``.
+
+Values are kept per process. Under ``app.launcher`` each worker serves its
+own ``/metrics``, so scrape every worker (or add a ``pid`` relabel) when
+running several.
+"""
+
+import math
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _bound(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}_total{_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (not cumulative), then sum
+                series = self._series[key] = [0] * len(self.buckets) + [0.0]
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[position] += 1
+                    break
+            series[-1] += value
+
+    def snapshot(self, **labels) -> dict:
+        """{"count": n, "sum": s} for one label set (zeros if never observed)"""
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return {"count": 0, "sum": 0.0}
+            return {"count": sum(series[:-1]), "sum": series[-1]}
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = 'le="' + _bound(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {values[-1]!r}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+REGISTRY = []
+
+
+def _register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+request_duration = _register(Histogram(
+    "http_request_duration_seconds", "Time to serve a request", ("method", "route", "status")
+))
+request_db_queries = _register(Histogram(
+    "http_request_db_queries", "Database queries run by a request", ("route",), QUERY_COUNT_BUCKETS
+))
+request_db_duration = _register(Histogram(
+    "http_request_db_duration_seconds", "Time a request spent in database queries", ("route",)
+))
+stage_duration = _register(Histogram(
+    "stage_duration_seconds", "Time spent in an instrumented stage of work", ("stage",)
+))
+stage_failures = _register(Counter(
+    "stage_failures", "Instrumented stages that raised", ("stage",)
+))
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# Frames under the project (app code, main.py, tests) are kept in query origins
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+
+
+def _origin() -> list:
+    """The project frames of the current stack, outermost first, as 'file:line in function'"""
+    return [
+        f"{frame.filename}:{frame.lineno} in {frame.name}"
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(_PROJECT_ROOT)
+        and frame.filename != __file__
+        and "site-packages" not in frame.filename
+    ]
+
+
+class RequestStats:
+    """Database work done on behalf of the current request
+
+    With ``trace`` each distinct statement is counted, and the stack that
+    first ran it kept, so repeated statements (N+1 loops) can be reported.
+    """
+
+    __slots__ = ("queries", "query_seconds", "statements")
+
+    def __init__(self, trace: bool = False):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.statements = {} if trace else None
+
+    def repeated(self, threshold: int) -> list:
+        """(statement, count, origin) for statements run at least ``threshold`` times"""
+        return [
+            (statement, count, origin)
+            for statement, (count, origin) in (self.statements or {}).items()
+            if count >= threshold
+        ]
+
+
+# Set by MetricsMiddleware; copied into the threadpool that runs sync routes
+current_request = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_request.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is not None and started is not None:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+        if stats.statements is not None:
+            seen = stats.statements.get(statement)
+            if seen is None:
+                stats.statements[statement] = [1, _origin()]
+            else:
+                seen[0] += 1
+
+
+def instrument_queries():
+    """Count and time the queries of every engine against the current request"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the duration of the enclosed block as ``stage``"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_failures.inc(stage=stage)
+        raise
+    finally:
+        stage_duration.observe(time.perf_counter() - started, stage=stage)
@@ -0,0 +1,57 @@
+"""Background queue for outgoing notifications.
+
+SMTP round trips take hundreds of milliseconds each, so bulk paths enqueue
+their emails here and a single daemon thread sends them in order.
+"""
+
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _run():
+    while True:
+        func, args = _queue.get()
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Notification %s failed", getattr(func, "__name__", func))
+        finally:
+            _queue.task_done()
+
+
+def enqueue(func, *args):
+    """Schedule ``func(*args)`` on the notification thread"""
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_run, name="notifications", daemon=True)
+                _worker.start()
+    _queue.put((func, args))
+
+
+def pending() -> int:
+    """Number of notifications not yet sent"""
+    return _queue.unfinished_tasks
+
+
+def drain(timeout: float = None) -> bool:
+    """Wait until the queue is empty; returns False if ``timeout`` expired first"""
+    if timeout is None:
+        _queue.join()
+        return True
+    done = threading.Event()
+
+    def wait():
+        _queue.join()
+        done.set()
+
+    threading.Thread(target=wait, daemon=True).start()
+    return done.wait(timeout)
@@ -26,7 +26,6 @@ def create_otp_for_user(db: Session, user_id: int, expiry_minutes: int = 10) ->
     )
     db.add(otp)
     db.commit()
-    db.refresh(otp)
     
     return otp_code
 
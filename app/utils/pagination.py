@@ -0,0 +1,57 @@
+"""Keyset (cursor) pagination helpers"""
+
+import base64
+import json
+import sys
+from typing import Optional
+from fastapi import HTTPException, status
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the last seen primary key as an opaque cursor"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Decode a cursor produced by encode_cursor, or None for the first page"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def check_prefix(prefix: str) -> str:
+    """``prefix`` if it can be compared in the database, else 400"""
+    if "\x00" in prefix or any(0xD800 <= ord(char) <= 0xDFFF for char in prefix):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid prefix"
+        )
+    return prefix
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest string greater than every string starting with ``prefix``.
+
+    ``col >= prefix AND col < prefix_upper_bound(prefix)`` is an index range
+    scan on any backend, unlike ``LIKE 'prefix%'`` which SQLite only indexes
+    under case-sensitive collation. None when there is no such string (the
+    prefix is all U+10FFFF), so only the lower bound applies.
+    """
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    code = ord(stripped[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        code = 0xE000  # Surrogates are not characters
+    return stripped[:-1] + chr(code)
@@ -0,0 +1,124 @@
+"""Campaign poster uploads: decoding, resized variants and cleanup.
+
+A poster arrives as a data URL (or bare base64) on the candidate profile
+update. It is decoded once and stored with every rendition the site serves:
+the original bytes plus ``large`` (display) and ``thumb`` (list) sizes, each
+as JPEG and WebP. Renditions are content-addressed blobs (see
+``app.utils.blob_store``), so re-uploading the same image stores nothing new
+and the original's key versions the poster URLs.
+"""
+
+import base64
+import binascii
+import io
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.poster import Blob, CandidatePoster
+from app.utils import blob_store
+
+SIZES = {"large": 1200, "thumb": 320}
+FORMATS = {"jpeg": "image/jpeg", "webp": "image/webp"}
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF", "BMP"}
+MAX_PIXELS = 40_000_000
+
+
+def is_upload(value: str) -> bool:
+    """Whether a poster field holds new image data rather than the current URL"""
+    return bool(value) and not value.startswith("/api/")
+
+
+def decode_upload(value: str) -> bytes:
+    """Image bytes from a data URL or bare base64; raises ValueError if invalid"""
+    if value.startswith("data:"):
+        header, _, value = value.partition(",")
+        if ";base64" not in header:
+            raise ValueError("Poster data URL must be base64 encoded")
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Poster is not valid base64 image data")
+    if not data:
+        raise ValueError("Poster is empty")
+    if len(data) > settings.POSTER_MAX_BYTES:
+        raise ValueError(f"Poster exceeds {settings.POSTER_MAX_BYTES // (1024 * 1024)} MB")
+    return data
+
+
+def render_variants(data: bytes) -> dict:
+    """{variant: (bytes, content_type, width, height)} for an uploaded image"""
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise ValueError(f"Unsupported poster format {image.format}")
+            if image.width * image.height > MAX_PIXELS:
+                raise ValueError("Poster dimensions are too large")
+            original = (data, Image.MIME[image.format], image.width, image.height)
+            image = ImageOps.exif_transpose(image).convert("RGB")
+    except (OSError, Image.DecompressionBombError):
+        raise ValueError("Poster is not a readable image")
+
+    variants = {"original": original}
+    for size, bound in SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((bound, bound), Image.Resampling.LANCZOS)
+        for name, content_type in FORMATS.items():
+            buffer = io.BytesIO()
+            if name == "jpeg":
+                resized.save(buffer, "JPEG", quality=85, progressive=True, optimize=True)
+            else:
+                resized.save(buffer, "WEBP", quality=80, method=4)
+            variants[f"{size}.{name}"] = (buffer.getvalue(), content_type, resized.width, resized.height)
+    return variants
+
+
+def store_poster(db: Session, candidate_id: int, data: bytes) -> str:
+    """Store every rendition of ``data`` as the candidate's poster; returns the original's key.
+
+    Flushes but does not commit. Blobs the previous poster no longer needs
+    are left for collect_garbage().
+    """
+    variants = render_variants(data)
+    db.query(CandidatePoster).filter(CandidatePoster.candidate_id == candidate_id).delete()
+    keys = {}
+    for variant, (content, content_type, width, height) in variants.items():
+        keys[variant] = blob_store.put(db, content, content_type).key
+        db.add(CandidatePoster(
+            candidate_id=candidate_id, variant=variant, blob_key=keys[variant], width=width, height=height
+        ))
+    db.flush()
+    return keys["original"]
+
+
+def collect_garbage(db: Session) -> int:
+    """Delete blobs no poster refers to and commit; returns how many were removed"""
+    referenced = select(CandidatePoster.blob_key)
+    keys = db.execute(select(Blob.key).where(Blob.key.not_in(referenced))).scalars().all()
+    if not keys:
+        return 0
+    blob_store.delete(db, keys)
+    db.commit()
+    blob_store.remove_files(keys)
+    return len(keys)
+
+
+def negotiate_format(accept: str) -> str:
+    """'webp' when the Accept header allows it, otherwise 'jpeg'"""
+    for item in (accept or "").split(","):
+        media_type, *parameters = item.split(";")
+        if media_type.strip().lower() == "image/webp":
+            return "webp" if _quality(parameters) > 0 else "jpeg"
+    return "jpeg"
+
+
+def _quality(parameters: list) -> float:
+    for parameter in parameters:
+        name, _, value = parameter.strip().partition("=")
+        if name == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
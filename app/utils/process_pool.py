@@ -0,0 +1,33 @@
+"""Shared process pool for CPU-bound work (bcrypt hashing, image decoding)"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from app.config import settings
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def process_pool_size() -> int:
+    """Number of processes the shared pool runs"""
+    return settings.PROCESS_POOL_WORKERS or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=process_pool_size())
+    return _pool
+
+
+def shutdown_process_pool(wait: bool = True):
+    """Shut the shared pool down; the next get_process_pool() starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait)
+            _pool = None
@@ -0,0 +1,85 @@
+"""Admin dashboard statistics computed in a single round trip"""
+
+from datetime import datetime
+from sqlalchemy import func, literal, select, true
+from sqlalchemy.orm import Session, sessionmaker
+from app.config import settings
+from app.models.candidate import Candidate
+from app.models.election import Election
+from app.models.user import User
+from app.models.vote import Vote
+from app.utils.cache import TTLCache
+
+dashboard_cache = TTLCache(
+    ttl=settings.DASHBOARD_CACHE_TTL_SECONDS,
+    stale_ttl=settings.DASHBOARD_CACHE_STALE_SECONDS,
+)
+
+
+def _dashboard_statement():
+    """One row per election (or a single row with NULL election when there are none).
+
+    Global counts ride along as scalar subqueries; per-election vote counts
+    come from one GROUP BY over the votes(election_id, candidate_id) index,
+    and the vote total is their sum, so no table is scanned twice.
+    """
+    totals = select(
+        select(func.count()).select_from(User).scalar_subquery().label("total_users"),
+        select(func.count()).select_from(Candidate).scalar_subquery().label("total_candidates"),
+    ).subquery("totals")
+    vote_counts = (
+        select(Vote.election_id, func.count().label("votes"))
+        .group_by(Vote.election_id)
+        .subquery("vote_counts")
+    )
+    return (
+        select(
+            totals.c.total_users,
+            totals.c.total_candidates,
+            Election.id,
+            Election.title,
+            Election.is_active,
+            func.coalesce(vote_counts.c.votes, literal(0)).label("votes"),
+        )
+        .select_from(totals)
+        .outerjoin(Election, true())
+        .outerjoin(vote_counts, vote_counts.c.election_id == Election.id)
+        .order_by(Election.id)
+    )
+
+
+def compute_dashboard_statistics(db: Session) -> dict:
+    rows = db.execute(_dashboard_statement()).all()
+    total_users = rows[0].total_users
+    elections = [
+        {
+            "election_id": row.id,
+            "title": row.title,
+            "is_active": row.is_active,
+            "votes": row.votes,
+            "turnout_percent": round(100.0 * row.votes / total_users, 2) if total_users else 0.0,
+        }
+        for row in rows
+        if row.id is not None
+    ]
+    return {
+        "total_users": total_users,
+        "total_elections": len(elections),
+        "total_candidates": rows[0].total_candidates,
+        "total_votes": sum(election["votes"] for election in elections),
+        "elections": elections,
+        "generated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def get_dashboard_statistics(db: Session) -> dict:
+    """Cached dashboard statistics for the database ``db`` is bound to"""
+    bind = db.get_bind()
+    # Background refreshes outlive the request, so they open their own session
+    session_factory = sessionmaker(bind=bind)
+
+    def load():
+        with session_factory() as session:
+            return compute_dashboard_statistics(session)
+
+    return dashboard_cache.get(str(bind.url), load)
@@ -0,0 +1,20 @@
+"""Helpers for large request bodies"""
+
+import tempfile
+from fastapi import Request
+
+# Bodies up to this size stay in memory; larger ones roll over to a temp file
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+async def spool_request_body(request: Request) -> tempfile.SpooledTemporaryFile:
+    """Copy the streamed request body into a rewound spooled temporary file.
+
+    Memory use is bounded by SPOOL_MAX_MEMORY regardless of upload size, and
+    the result can be read synchronously from a worker thread.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
@@ -0,0 +1,201 @@
+"""Bulk voter roll import from CSV or NDJSON.
+
+Rows are validated and inserted in chunks: duplicates are found with one
+``IN`` query per chunk, passwords are hashed across the shared process pool,
+and users plus their login tokens are written with executemany inserts. A bad
+row is reported in the result and never aborts the rest of the import.
+"""
+
+import csv
+import io
+import json
+import secrets
+from datetime import datetime, timedelta
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.login_token import LoginToken
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.utils import notifications
+from app.utils.email import send_login_link_email
+from app.utils.process_pool import get_process_pool
+from app.utils.security import get_password_hash
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+REQUIRED_FIELDS = ("roll_number", "email", "full_name")
+
+
+def iter_rows(stream, fmt: str):
+    """Yield ``(row_number, record_or_None, error_or_None)`` from a binary stream"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        missing = [field for field in REQUIRED_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+        # Row numbers count the header line so they match what a spreadsheet shows
+        for row_number, record in enumerate(reader, start=2):
+            yield row_number, record, None
+    else:
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Expected a JSON object"
+                continue
+            yield row_number, record, None
+
+
+def _validate(record: dict):
+    """Return (UserCreate, None) or (None, error message)"""
+    values = {key: (value.strip() if isinstance(value, str) else value) for key, value in record.items()}
+    if not values.get("password"):
+        # Imported students sign in through the emailed login link
+        values["password"] = secrets.token_urlsafe(12)
+    try:
+        return UserCreate(**values), None
+    except ValidationError as e:
+        first = e.errors()[0]
+        field = ".".join(str(part) for part in first["loc"])
+        return None, f"{field}: {first['msg']}"
+
+
+class VoterImport:
+    """Accumulates state for one import run"""
+
+    def __init__(self, db: Session, notify: bool = True):
+        self.db = db
+        self.notify = notify
+        self.total_rows = 0
+        self.imported = 0
+        self.errors = []
+        self.error_count = 0
+        # Keys already accepted in this file, so later duplicates are caught
+        # without another database round trip
+        self.seen_emails = set()
+        self.seen_rolls = set()
+
+    def error(self, row_number: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def run(self, rows) -> dict:
+        chunk = []
+        for row_number, record, error in rows:
+            self.total_rows += 1
+            if error:
+                self.error(row_number, error)
+                continue
+            chunk.append((row_number, record))
+            if len(chunk) >= CHUNK_SIZE:
+                self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+        return self.report()
+
+    def report(self) -> dict:
+        return {
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "failed": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+    def import_chunk(self, chunk: list):
+        valid = []
+        for row_number, record in chunk:
+            user, error = _validate(record)
+            if error:
+                self.error(row_number, error)
+            elif user.email in self.seen_emails:
+                self.error(row_number, "Duplicate email in upload")
+            elif user.roll_number in self.seen_rolls:
+                self.error(row_number, "Duplicate roll number in upload")
+            else:
+                self.seen_emails.add(user.email)
+                self.seen_rolls.add(user.roll_number)
+                valid.append((row_number, user))
+        if not valid:
+            return
+
+        existing_emails = set(self.db.execute(
+            select(User.email).where(User.email.in_([user.email for _, user in valid]))
+        ).scalars())
+        existing_rolls = set(self.db.execute(
+            select(User.roll_number).where(User.roll_number.in_([user.roll_number for _, user in valid]))
+        ).scalars())
+
+        new_users = []
+        for row_number, user in valid:
+            if user.email in existing_emails:
+                self.error(row_number, "Email already registered")
+            elif user.roll_number in existing_rolls:
+                self.error(row_number, "Roll number already registered")
+            else:
+                new_users.append((row_number, user))
+        if not new_users:
+            return
+
+        hashes = get_process_pool().map(
+            get_password_hash,
+            [user.password for _, user in new_users],
+            chunksize=max(1, len(new_users) // 32),
+        )
+        rows = [
+            {
+                "roll_number": user.roll_number,
+                "email": user.email,
+                "full_name": user.full_name,
+                "hashed_password": hashed,
+            }
+            for (_, user), hashed in zip(new_users, hashes)
+        ]
+
+        try:
+            self._insert(rows)
+        except IntegrityError:
+            # A concurrent registration claimed one of the keys; insert row by
+            # row so only the conflicting rows are reported
+            self.db.rollback()
+            for (row_number, _), row in zip(new_users, rows):
+                try:
+                    self._insert([row])
+                except IntegrityError:
+                    self.db.rollback()
+                    self.error(row_number, "Email or roll number already registered")
+
+    def _insert(self, rows: list):
+        created = self.db.execute(
+            insert(User).returning(User.id, User.email, User.full_name), rows
+        ).all()
+
+        expires_at = datetime.utcnow() + timedelta(hours=24)
+        tokens = [
+            {"user_id": user.id, "token": secrets.token_urlsafe(32), "expires_at": expires_at}
+            for user in created
+        ]
+        self.db.execute(insert(LoginToken), tokens)
+        self.db.commit()
+        self.imported += len(created)
+
+        if self.notify:
+            for user, token in zip(created, tokens):
+                login_url = f"{settings.FRONTEND_URL}/login?token={token['token']}"
+                notifications.enqueue(send_login_link_email, user.email, user.full_name, login_url)
+
+
+def import_voter_roll(db: Session, stream, fmt: str, notify: bool = True) -> dict:
+    """Import users from a binary CSV/NDJSON stream and return the report"""
+    return VoterImport(db, notify=notify).run(iter_rows(stream, fmt))
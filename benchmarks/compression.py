@@ -0,0 +1,185 @@
+"""Response compression benchmark: bytes saved and CPU added per request.
+
+Seeds a temporary SQLite database with a campus-sized data set, fetches the
+typical JSON payloads uncompressed through the app, then compresses each body
+with the CompressionMiddleware settings in use (gzip, and Brotli when the
+``brotli`` package is installed) and reports the compressed size and the CPU
+time each compression costs:
+
+    python -m benchmarks.compression --users 2000 --candidates 12 --output compression.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import Base
+from app.middleware import compression
+from app.middleware.compression import CompressionMiddleware
+from benchmarks.face_pipeline import git_commit
+
+PAYLOADS = {
+    "users_page_100": "/api/admin/users?limit=100",
+    "users_page_1000": "/api/admin/users?limit=1000",
+    "election_candidates": "/api/elections/{election_id}/candidates",
+    "all_candidates": "/api/candidates/all",
+    "results": "/api/votes/election/{election_id}",
+    "elections": "/api/elections/",
+    "dashboard": "/api/admin/statistics/dashboard",
+}
+
+
+def seed(db, users: int, candidates: int) -> int:
+    from app.models.admin import Admin
+    from app.models.candidate import Candidate
+    from app.models.election import Election
+    from app.models.user import User
+    from app.models.vote import Vote
+    from app.utils.security import get_password_hash
+
+    db.add(Admin(email="bench@college.edu", full_name="Bench", hashed_password=get_password_hash("bench")))
+    elections = [
+        Election(
+            title=f"Student Council {2021 + index}",
+            description="Annual council election " * 4,
+            start_time=datetime(2021 + index, 3, 1),
+            end_time=datetime(2021 + index, 3, 2),
+        )
+        for index in range(5)
+    ]
+    db.add_all(elections)
+    db.flush()
+    election_id = elections[-1].id
+    user_ids = db.execute(insert(User).returning(User.id), [
+        {
+            "roll_number": f"CS{index:05d}",
+            "email": f"student{index}@college.edu",
+            "full_name": f"Student Number {index}",
+            "hashed_password": "!",
+        }
+        for index in range(users)
+    ]).scalars().all()
+    candidate_ids = db.execute(insert(Candidate).returning(Candidate.id), [
+        {
+            "election_id": election_id,
+            "name": f"Candidate {index}",
+            "symbol_number": index + 1,
+            "description": "Final year, computer science. " * 3,
+            "campaign_message": "Better hostels, longer library hours and a fair canteen. " * 6,
+            "about": "Class representative for two years and organiser of the coding club. " * 8,
+        }
+        for index in range(candidates)
+    ]).scalars().all()
+    db.execute(insert(Vote), [
+        {"user_id": user_id, "election_id": election_id, "candidate_id": candidate_ids[index % len(candidate_ids)]}
+        for index, user_id in enumerate(user_ids[: users // 2])
+    ])
+    db.commit()
+    return election_id
+
+
+def fetch_payloads(database_url: str, users: int, candidates: int) -> dict:
+    from fastapi.testclient import TestClient
+    from app.database import get_db
+    from main import app
+
+    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(bind=engine)
+    with sessions() as db:
+        election_id = seed(db, users, candidates)
+
+    def override_get_db():
+        with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        token = client.post("/api/admin/login", json={"email": "bench@college.edu", "password": "bench"})
+        headers = {"Authorization": f"Bearer {token.json()['access_token']}", "Accept-Encoding": "identity"}
+        bodies = {}
+        for name, path in PAYLOADS.items():
+            response = client.get(path.format(election_id=election_id), headers=headers)
+            response.raise_for_status()
+            bodies[name] = response.content
+        return bodies
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
+
+
+def cpu_ms(compress, body: bytes, encoding: str, runs: int) -> float:
+    started = time.process_time()
+    for _ in range(runs):
+        compress(body, encoding)
+    return (time.process_time() - started) * 1000 / runs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000, help="Students to seed")
+    parser.add_argument("--candidates", type=int, default=12, help="Candidates in the benchmark election")
+    parser.add_argument("--runs", type=int, default=50, help="Compressions timed per payload")
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    middleware = CompressionMiddleware(
+        None, gzip_level=settings.GZIP_LEVEL, brotli_quality=settings.BROTLI_QUALITY
+    )
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+
+    with tempfile.TemporaryDirectory() as directory:
+        bodies = fetch_payloads(f"sqlite:///{Path(directory) / 'compression.db'}", args.users, args.candidates)
+
+    results = []
+    for name, body in bodies.items():
+        for encoding in encodings:
+            compressed = middleware.compress(body, encoding)
+            result = {
+                "payload": name,
+                "encoding": encoding,
+                "bytes": len(body),
+                "compressed_bytes": len(compressed),
+                "saved_percent": round(100 * (1 - len(compressed) / len(body)), 1),
+                "compressed": len(body) >= settings.COMPRESSION_MINIMUM_SIZE,
+                "cpu_ms": round(cpu_ms(middleware.compress, body, encoding, args.runs), 3),
+            }
+            results.append(result)
+            print(
+                f"{name:<20} {encoding:<4} {result['bytes']:>9} -> {result['compressed_bytes']:>8} bytes "
+                f"({result['saved_percent']:5.1f}% saved) cpu={result['cpu_ms']:7.3f}ms"
+                f"{'' if result['compressed'] else '  [below minimum size, sent as is]'}",
+                file=sys.stderr,
+            )
+
+    report = {
+        "benchmark": "compression",
+        "git_commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {key: str(value) for key, value in vars(args).items()},
+        "settings": {
+            "minimum_size": settings.COMPRESSION_MINIMUM_SIZE,
+            "gzip_level": settings.GZIP_LEVEL,
+            "brotli_quality": settings.BROTLI_QUALITY,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
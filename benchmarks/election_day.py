@@ -0,0 +1,396 @@
+"""Election-day load test: the whole voter journey under concurrent arrivals.
+
+Each simulated voter arrives at a time drawn from an arrival curve and walks
+the real flow: register, log in, confirm the emailed OTP, enroll and verify
+their face, cast a vote and poll the results. Arrivals do not wait for
+earlier voters to finish, so a saturated server shows up as growing latency
+and errors rather than as a slower arrival rate. Throughput, latency
+percentiles and error rates are reported per step:
+
+    python -m benchmarks.election_day --voters 500 --duration 120 --arrival election-day --output load.json
+
+By default ``main:app`` runs in this process behind httpx's ASGI transport,
+on a temporary SQLite database, with outgoing email discarded. ``--url``
+drives a running server instead (``python -m app.launcher``); it needs
+``--database-url`` set to that server's database, where the election is
+seeded and the OTP codes are read back.
+
+Voters verify their face with the capture they enrolled with
+(``--face-probe same``): the server still detects, encodes and compares it,
+but the match cannot fail, so every voter reaches the vote. ``fresh`` sends a
+new jittered capture instead, which the encoders may reject on these drawn
+faces (benchmarks.face_pipeline measures match rates). A warning is printed
+whenever face-step failures thin out the load on the later steps.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+import httpx
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import get_db
+from app.migrations import run_migrations
+from app.models.candidate import Candidate
+from app.models.election import Election
+from app.models.otp import OTP
+from app.models.user import User
+from benchmarks.face_pipeline import git_commit, summarize
+
+STEPS = ("register", "login", "otp-verify", "face-register", "face-verify", "vote", "results")
+PASSWORD = "Election@Day1"
+
+# Relative arrival rate across the voting window, for t in [0, 1]
+ARRIVALS = {
+    "constant": lambda t: np.ones_like(t),
+    "ramp": lambda t: t,
+    # Morning rush, a lunch-time wave and a surge before polls close
+    "election-day": lambda t: (
+        np.exp(-((t - 0.15) / 0.08) ** 2)
+        + 0.6 * np.exp(-((t - 0.5) / 0.1) ** 2)
+        + 0.8 * np.exp(-((t - 0.93) / 0.05) ** 2)
+        + 0.1
+    ),
+    # Everyone within the first twentieth of the window
+    "burst": lambda t: (t < 0.05).astype(float),
+}
+
+
+def arrival_times(curve: str, voters: int, duration: float, rng: random.Random) -> list:
+    """Sorted arrival offsets in seconds, distributed like ``curve``"""
+    grid = np.linspace(0.0, 1.0, 1001)
+    rates = ARRIVALS[curve](grid) + 1e-9
+    cumulative = np.concatenate(([0.0], np.cumsum((rates[1:] + rates[:-1]) / 2)))
+    cumulative /= cumulative[-1]
+    quantiles = sorted(rng.random() for _ in range(voters))
+    return list(np.interp(quantiles, cumulative, grid) * duration)
+
+
+def seed_election(sessions, candidates: int, duration: float) -> tuple:
+    """An active election open for the whole run; returns (election id, candidate ids)"""
+    now = datetime.utcnow()
+    with sessions() as db:
+        election = Election(
+            title=f"Load test {now:%Y-%m-%d %H:%M:%S}",
+            description="Seeded by benchmarks.election_day",
+            start_time=now - timedelta(minutes=5),
+            end_time=now + timedelta(seconds=duration) + timedelta(hours=1),
+            is_active=True,
+        )
+        db.add(election)
+        db.flush()
+        rows = [
+            Candidate(election_id=election.id, name=f"Candidate {index + 1}", symbol_number=index + 1)
+            for index in range(candidates)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return election.id, [row.id for row in rows]
+
+
+def latest_otp(sessions, email: str):
+    with sessions() as db:
+        return db.query(OTP.otp_code).join(User, User.id == OTP.user_id).filter(
+            User.email == email, OTP.is_verified.is_(False)
+        ).order_by(OTP.id.desc()).limit(1).scalar()
+
+
+def face_bodies(voters: int, seed: int, probe: str = "same") -> list:
+    """(enrollment, verification) request bodies per voter, drawn ahead of the run.
+
+    Identities whose capture the server would turn away (no face found, or
+    below the register route's quality bar) are skipped, so a voter only
+    fails a face step because of the load.
+    """
+    # Loads OpenCV; only needed when the face steps run
+    from app.utils.face_recognition_util import extract_face
+    from benchmarks.face_pipeline import DETECTORS
+    from benchmarks.synthetic_faces import SyntheticPopulation, to_jpeg
+
+    population = SyntheticPopulation(seed=seed)
+    capture = DETECTORS["client-box"]
+    bodies, index = [], 0
+    while len(bodies) < voters:
+        identity = population.identity(index)
+        _, confidence, success = extract_face(to_jpeg(identity.frame), face_box=identity.box)
+        if success and confidence >= 0.4:
+            enrollment = capture(identity)
+            bodies.append((enrollment, enrollment if probe == "same" else capture(population.probe(index))))
+        index += 1
+    return bodies
+
+
+class Recorder:
+    """Outcome of every request, by step"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+
+    def add(self, step: str, status, seconds: float, ok: bool):
+        self.latencies[step].append(seconds)
+        self.statuses[step][str(status)] += 1
+        if not ok:
+            self.errors[step] += 1
+
+    def results(self, wall_seconds: float) -> list:
+        results = []
+        for step in STEPS:
+            latencies = self.latencies.get(step)
+            if not latencies:
+                continue
+            requests = len(latencies)
+            result = summarize(latencies)
+            result.update({
+                "step": step,
+                "max_ms": round(max(latencies) * 1000, 3),
+                "errors": self.errors[step],
+                "error_rate": round(self.errors[step] / requests, 4),
+                "throughput_rps": round((requests - self.errors[step]) / wall_seconds, 2),
+                "statuses": dict(self.statuses[step]),
+            })
+            results.append(result)
+        return results
+
+
+class Voter:
+    """One simulated student going through election day"""
+
+    def __init__(self, index: int, run):
+        self.index = index
+        self.run = run
+        self.email = f"{run.prefix}{index}@loadtest.college.edu"
+        self.headers = {}
+
+    async def call(self, step: str, method: str, path: str, expect=(200,), headers=None, **kwargs):
+        """The response if its status is expected, else None (the voter gives up)"""
+        started = time.perf_counter()
+        try:
+            response = await self.run.client.request(
+                method, path, headers={**self.headers, **(headers or {})}, **kwargs
+            )
+        except httpx.HTTPError as error:
+            self.run.recorder.add(step, type(error).__name__, time.perf_counter() - started, False)
+            return None
+        ok = response.status_code in expect
+        self.run.recorder.add(step, response.status_code, time.perf_counter() - started, ok)
+        return response if ok else None
+
+    async def journey(self) -> bool:
+        run = self.run
+        response = await self.call("register", "POST", "/api/auth/register", json={
+            "roll_number": f"{run.prefix.upper()}{self.index:06d}",
+            "email": self.email,
+            "full_name": f"Voter {self.index}",
+            "password": PASSWORD,
+        })
+        if response is None:
+            return False
+
+        response = await self.call("login", "POST", "/api/auth/login", json={"email": self.email, "password": PASSWORD})
+        if response is None:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        code = await asyncio.to_thread(latest_otp, run.sessions, self.email)
+        if await self.call("otp-verify", "POST", "/api/otp/verify", json={"otp_code": code or ""}) is None:
+            return False
+
+        if run.faces:
+            enrollment, probe = run.faces[self.index]
+            if await self.call("face-register", "POST", "/api/face/register", json=enrollment) is None:
+                return False
+            if await self.call("face-verify", "POST", "/api/face/verify-for-voting", json=probe) is None:
+                return False
+
+        vote = {"election_id": run.election_id, "candidate_id": run.rng.choice(run.candidate_ids)}
+        if await self.call("vote", "POST", "/api/votes/", json=vote) is None:
+            return False
+
+        # Watch the results like the frontend does, revalidating with the ETag
+        etag = None
+        for poll in range(run.polls):
+            if poll:
+                await asyncio.sleep(run.poll_interval)
+            headers = {"If-None-Match": etag} if etag else {}
+            response = await self.call(
+                "results", "GET", f"/api/votes/election/{run.election_id}", expect=(200, 304), headers=headers
+            )
+            if response is None:
+                return False
+            etag = response.headers.get("etag", etag)
+        return True
+
+
+class LoadRun:
+    def __init__(self, client, sessions, args, election_id: int, candidate_ids: list, faces: list):
+        self.client = client
+        self.sessions = sessions
+        self.prefix = f"ld{int(time.time()):x}v"
+        self.election_id = election_id
+        self.candidate_ids = candidate_ids
+        self.faces = faces
+        self.polls = args.polls
+        self.poll_interval = args.poll_interval
+        self.rng = random.Random(args.seed)
+        self.recorder = Recorder()
+
+    async def arrive(self, index: int, at: float, started: float) -> bool:
+        await asyncio.sleep(max(0.0, at - (time.perf_counter() - started)))
+        return await Voter(index, self).journey()
+
+    async def play(self, arrivals: list) -> list:
+        started = time.perf_counter()
+        return await asyncio.gather(*(self.arrive(index, at, started) for index, at in enumerate(arrivals)))
+
+
+async def drive(args, sessions, election_id: int, candidate_ids: list, faces: list) -> tuple:
+    arrivals = arrival_times(args.arrival, args.voters, args.duration, random.Random(args.seed))
+    limits = httpx.Limits(max_connections=args.max_connections)
+    timeout = httpx.Timeout(args.timeout)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout)
+    else:
+        from main import app
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://election-day", timeout=timeout
+        )
+    async with client:
+        run = LoadRun(client, sessions, args, election_id, candidate_ids, faces)
+        started = time.perf_counter()
+        completed = await run.play(arrivals)
+        wall_seconds = time.perf_counter() - started
+    return run.recorder, sum(completed), wall_seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voters", type=int, default=200, help="Students arriving over the window")
+    parser.add_argument("--duration", type=float, default=60.0, help="Length of the arrival window in seconds")
+    parser.add_argument("--arrival", choices=sorted(ARRIVALS), default="election-day", help="Arrival curve")
+    parser.add_argument("--candidates", type=int, default=8, help="Candidates in the seeded election")
+    parser.add_argument("--polls", type=int, default=3, help="Result polls per voter after voting")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between result polls")
+    parser.add_argument("--skip-face", action="store_true", help="Leave out face enrollment and verification")
+    parser.add_argument(
+        "--face-probe", choices=("same", "fresh"), default="same",
+        help="Verify with the enrollment capture (always matches) or a new jittered one",
+    )
+    parser.add_argument("--url", help="Base URL of a running server (default: main:app in process)")
+    parser.add_argument("--database-url", help="The server's database (required with --url)")
+    parser.add_argument("--max-connections", type=int, default=100, help="Client connection limit with --url")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.url and not args.database_url:
+        parser.error("--url needs --database-url to seed the election and read OTP codes")
+
+    # settings.DEBUG turns on SQL echo, which would dominate the timings
+    logging.getLogger("sqlalchemy.engine.Engine").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{Path(directory) / 'election_day.db'}"
+        engine = create_engine(
+            database_url, connect_args={"check_same_thread": False} if "sqlite" in database_url else {}
+        )
+        run_migrations(engine)
+        sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        election_id, candidate_ids = seed_election(sessions, args.candidates, args.duration)
+
+        faces = []
+        if not args.skip_face:
+            started = time.perf_counter()
+            faces = face_bodies(args.voters, args.seed, args.face_probe)
+            print(f"drew {len(faces)} face captures in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        restore = []
+        if not args.url:
+            from main import app
+            from app.utils import email
+
+            # Per-voter INFO lines, and slow-request warnings once the app is
+            # saturated, would bury the report (importing main set the level)
+            logging.getLogger("app").setLevel(logging.WARNING)
+            logging.getLogger("app.requests").setLevel(logging.ERROR)
+
+            def override_get_db():
+                db = sessions()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+            app.dependency_overrides[get_db] = override_get_db
+            # Messages are built as usual but never reach an SMTP server
+            restore.append((email, "_send", email._send))
+            email._send = lambda message: None
+        try:
+            recorder, completed, wall_seconds = asyncio.run(drive(args, sessions, election_id, candidate_ids, faces))
+        finally:
+            if not args.url:
+                app.dependency_overrides.pop(get_db, None)
+            for module, name, value in restore:
+                setattr(module, name, value)
+            engine.dispose()
+
+    results = recorder.results(wall_seconds)
+    for result in results:
+        print(
+            f"{result['step']:<14} n={result['count']:<6} {result['throughput_rps']:8.2f} ok/s "
+            f"p50={result['p50_ms']:9.2f}ms p95={result['p95_ms']:9.2f}ms p99={result['p99_ms']:9.2f}ms "
+            f"max={result['max_ms']:9.2f}ms errors={result['error_rate']:.2%}",
+            file=sys.stderr,
+        )
+    print(
+        f"{completed}/{args.voters} voters finished in {wall_seconds:.1f}s "
+        f"({completed / wall_seconds:.2f} voters/s)",
+        file=sys.stderr,
+    )
+    # A voter stops at their first failed step, so these voters never voted
+    face_dropouts = recorder.errors["face-register"] + recorder.errors["face-verify"]
+    if face_dropouts:
+        print(
+            f"WARNING: {face_dropouts}/{args.voters} voters ({face_dropouts / args.voters:.0%}) failed a face step "
+            f"(statuses: face-register {dict(recorder.statuses['face-register'])}, "
+            f"face-verify {dict(recorder.statuses['face-verify'])}) and never voted; vote and results "
+            "throughput and latency cover only the remaining voters",
+            file=sys.stderr,
+        )
+
+    report = {
+        "benchmark": "election_day",
+        "git_commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {key: str(value) for key, value in vars(args).items()},
+        "summary": {
+            "voters": args.voters,
+            "completed": completed,
+            "wall_seconds": round(wall_seconds, 2),
+            "voters_per_second": round(completed / wall_seconds, 2),
+            "face_dropouts": face_dropouts,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Face gallery startup benchmark.
+
+Compares what a newly started worker pays to get a usable shortlist index:
+building it from the face_encodings table versus mapping the shared snapshot
+and replaying its delta log. Signatures are random (no images are drawn), so
+large galleries populate quickly:
+
+    python -m benchmarks.face_gallery --sizes 10000,100000 --workers 4 --output gallery.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.migrations import run_migrations
+from app.models.face import FaceEncoding
+from app.models.user import User
+from app.utils import face_identification
+from app.utils.face_recognition_util import FACE_SIGNATURE_BINS
+from benchmarks.face_pipeline import git_commit, rss_mb
+
+
+def populate_signatures(db, count: int, seed: int, batch_size: int = 5000):
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, batch_size):
+        indexes = range(start, min(count, start + batch_size))
+        created = db.execute(insert(User).returning(User.id), [
+            {"roll_number": f"GAL{index:07d}", "email": f"g{index}@bench.local", "full_name": "G", "hashed_password": "!"}
+            for index in indexes
+        ]).scalars().all()
+        signatures = np.sqrt(rng.dirichlet(np.full(FACE_SIGNATURE_BINS, 2.0), len(created))).astype(np.float32)
+        db.execute(insert(FaceEncoding), [
+            {"user_id": user_id, "face_encoding": b"", "face_signature": signature.tobytes(), "is_verified": "verified"}
+            for user_id, signature in zip(created, signatures)
+        ])
+        db.commit()
+
+
+def start_worker(database_url: str, gallery_dir: str, results):
+    """One simulated worker: time to a usable index, and the RSS it added"""
+    settings.FACE_INDEX_DIR = gallery_dir
+    engine = create_engine(database_url)
+    baseline = rss_mb()
+    started = time.perf_counter()
+    with sessionmaker(bind=engine)() as db:
+        index = face_identification.get_face_index(db)
+        index.search(np.zeros(FACE_SIGNATURE_BINS, np.float32), 10)
+    results.put({
+        "startup_ms": round((time.perf_counter() - started) * 1000, 2),
+        "rss_added_mb": round(rss_mb() - baseline, 1),
+        "index": index.kind,
+    })
+    engine.dispose()
+
+
+def measure(database_url: str, gallery_dir: str, workers: int) -> list:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=start_worker, args=(database_url, gallery_dir, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    measurements = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return measurements
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated gallery sizes")
+    parser.add_argument("--workers", type=int, default=4, help="Workers started per mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(value) for value in args.sizes.split(",")):
+            database_url = f"sqlite:///{Path(directory) / f'gallery-{size}.db'}"
+            engine = create_engine(database_url)
+            run_migrations(engine)
+            with sessionmaker(bind=engine)() as db:
+                populate_signatures(db, size, args.seed)
+            engine.dispose()
+
+            gallery_dir = str(Path(directory) / f"gallery-{size}")
+            # The first shared-mode worker publishes the snapshot; time the rest
+            measure(database_url, gallery_dir, 1)
+            for mode, target in (("database", ""), ("snapshot", gallery_dir)):
+                for worker in measure(database_url, target, args.workers):
+                    worker.update({"population": size, "mode": mode})
+                    results.append(worker)
+                    print(
+                        f"{size:>8} {mode:<9} {worker['index']:<6} startup={worker['startup_ms']:9.2f}ms "
+                        f"rss+={worker['rss_added_mb']}MB",
+                        file=sys.stderr,
+                    )
+
+    report = {
+        "benchmark": "face_gallery",
+        "git_commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {key: str(value) for key, value in vars(args).items()},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
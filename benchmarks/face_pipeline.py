@@ -0,0 +1,353 @@
+"""Face pipeline benchmark.
+
+Measures latency percentiles, match accuracy, false match and false reject
+rates and memory of /api/face/register, /api/face/verify and
+/api/face/verify-for-voting against synthetic enrolled populations, for
+every detector and compare backend, plus the recall of the
+identification shortlist at several K. Results are JSON so runs on different
+commits can be diffed:
+
+    python -m benchmarks.face_pipeline --sizes 1000,10000,50000 --output face.json
+"""
+
+import argparse
+import base64
+import json
+import logging
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import get_db
+from app.migrations import run_migrations
+from app.models.face import FaceEncoding
+from app.models.user import User
+from app.utils.face_identification import get_face_index, identify_face, load_gallery
+from app.utils.face_index import ExactIndex, recall
+from app.utils.face_recognition_util import compute_face_signature, extract_face, get_encoder
+from app.utils.security import create_access_token
+from benchmarks.synthetic_faces import SyntheticPopulation, crop_jpeg, populate, template_for, to_jpeg
+
+# impostor-for-voting presents another person's face for a voter's account
+OPERATIONS = ("register", "verify", "verify-for-voting", "impostor-for-voting")
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+# How the client presents a capture: the request body for an Identity
+DETECTORS = {
+    "full-frame": lambda identity: {"image_data": _b64(to_jpeg(identity.frame))},
+    "client-box": lambda identity: {
+        "image_data": _b64(to_jpeg(identity.frame)),
+        "face_box": dict(zip(("x", "y", "width", "height"), identity.box)),
+    },
+    "pre-cropped": lambda identity: {"face_image_data": _b64(crop_jpeg(identity)[0])},
+}
+
+# Compare backends: settings overrides applied for the run, plus the encoder
+# the synthetic population is enrolled with
+COMPARE_BACKENDS = {
+    "histogram": {"settings": {"FACE_ENCODER": "histogram"}, "encoder": "histogram"},
+    "histogram-exact": {"settings": {"FACE_ENCODER": "histogram", "FACE_SHORTLIST_K": 0}, "encoder": "histogram"},
+    "histogram-ivf": {"settings": {"FACE_ENCODER": "histogram", "FACE_INDEX_EXACT_BELOW": 0}, "encoder": "histogram"},
+    "lbp": {"settings": {"FACE_ENCODER": "lbp"}, "encoder": "lbp"},
+    "lbp-exact": {"settings": {"FACE_ENCODER": "lbp", "FACE_SHORTLIST_K": 0}, "encoder": "lbp"},
+}
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(latencies: list) -> dict:
+    values = np.array(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+class Run:
+    """One populated database served through the app"""
+
+    def __init__(self, app, directory: Path, size: int, backend: str, population: SyntheticPopulation):
+        self.engine = create_engine(
+            f"sqlite:///{directory / f'faces-{size}-{backend}.db'}",
+            connect_args={"check_same_thread": False},
+        )
+        run_migrations(self.engine)
+        self.sessions = sessionmaker(bind=self.engine)
+        self.size = size
+        self.population = population
+
+        with self.sessions() as db:
+            self.emails = populate(db, population, size, encoder=COMPARE_BACKENDS[backend]["encoder"])
+            self.user_ids = {email: user_id for user_id, email in db.query(User.id, User.email)}
+
+        def override_get_db():
+            db = self.sessions()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        self.client = TestClient(app)
+        self.next_new_user = size
+
+    def headers(self, email: str) -> dict:
+        return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+    def new_user(self) -> tuple:
+        index = self.next_new_user
+        self.next_new_user += 1
+        email = f"synthetic{index}@bench.local"
+        with self.sessions() as db:
+            db.add(User(roll_number=f"SYN{index:06d}", email=email, full_name="New", hashed_password="!"))
+            db.commit()
+        return index, email
+
+    def close(self):
+        self.client.close()
+        self.engine.dispose()
+
+
+def timed_operation(run: Run, operation: str, detector: str, iterations: int, rng: random.Random, trace: bool) -> dict:
+    latencies, errors, correct, false_matches, false_rejects = [], 0, 0, 0, 0
+    if trace:
+        tracemalloc.start()
+    for attempt in range(iterations):
+        if operation == "register":
+            index, email = run.new_user()
+            body = DETECTORS[detector](run.population.identity(index))
+            path, headers = "/api/face/register", run.headers(email)
+        else:
+            index = rng.randrange(run.size)
+            email = run.emails[index]
+            if operation == "impostor-for-voting":
+                index = (index + rng.randrange(1, run.size)) % run.size
+            body = DETECTORS[detector](run.population.probe(index, attempt))
+            if operation == "verify":
+                path, headers = "/api/face/verify", {}
+            else:
+                path, headers = "/api/face/verify-for-voting", run.headers(email)
+
+        started = time.perf_counter()
+        response = run.client.post(path, json=body, headers=headers)
+        latencies.append(time.perf_counter() - started)
+
+        if operation == "impostor-for-voting":
+            if response.status_code == 200:
+                false_matches += 1
+            elif response.status_code == 401:
+                correct += 1
+            else:
+                errors += 1
+        elif response.status_code == 401 and operation != "register":
+            # A genuine probe that matched nobody
+            false_rejects += 1
+        elif response.status_code != 200:
+            errors += 1
+        elif operation != "verify" or response.json().get("user_id") == run.user_ids[email]:
+            correct += 1
+        else:
+            false_matches += 1
+
+    result = summarize(latencies)
+    result.update({
+        "errors": errors,
+        "accuracy": round(correct / iterations, 4),
+        "false_match_rate": round(false_matches / iterations, 4),
+        "false_reject_rate": round(false_rejects / iterations, 4),
+        "rss_mb": round(rss_mb(), 1),
+    })
+    if trace:
+        result["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        tracemalloc.stop()
+    return result
+
+
+def encoder_throughput(run: Run, encoder_name: str, iterations: int) -> dict:
+    """Encode time per probe, templates compared per second and template size"""
+    encoder = get_encoder(encoder_name)
+    with run.sessions() as db:
+        stored = [
+            encoder.deserialize(data)
+            for data, in db.query(FaceEncoding.face_encoding).filter(FaceEncoding.encoder == encoder_name).limit(1000)
+        ]
+    crops = [template_for(run.population.probe(index, 0)) for index in range(iterations)]
+
+    started = time.perf_counter()
+    probes = [encoder.encode(crop) for crop in crops]
+    encode_seconds = (time.perf_counter() - started) / iterations
+
+    started = time.perf_counter()
+    for probe in probes:
+        encoder.compare_many(stored, probe)
+    compare_seconds = time.perf_counter() - started
+
+    return {
+        "encode_ms": round(encode_seconds * 1000, 3),
+        "compares_per_second": round(len(stored) * iterations / compare_seconds),
+        "template_bytes": len(encoder.serialize(probes[0])),
+    }
+
+
+def shortlist_recall(run: Run, ks: list, iterations: int, rng: random.Random) -> list:
+    """Share of probes whose enrolled template survives a top-K shortlist,
+    the latency of identification at that K and, for approximate indexes,
+    the share of the exact top K that the index returns.
+    """
+    hits = {k: 0 for k in ks}
+    latencies = {k: [] for k in ks}
+    signatures = []
+    with run.sessions() as db:
+        face_ids = dict(db.query(FaceEncoding.user_id, FaceEncoding.id))
+        face_index = get_face_index(db)
+        exact = ExactIndex.build(*load_gallery(db))
+        for attempt in range(iterations):
+            index = rng.randrange(run.size)
+            capture = run.population.probe(index, attempt)
+            probe, _, success = extract_face(to_jpeg(capture.frame), face_box=capture.box)
+            if not success:
+                continue
+            expected = face_ids[run.user_ids[run.emails[index]]]
+            signature = compute_face_signature(probe)
+            signatures.append(signature)
+            for k in ks:
+                hits[k] += expected in face_index.search(signature, k)
+                started = time.perf_counter()
+                identify_face(db, probe, k=k)
+                latencies[k].append(time.perf_counter() - started)
+
+    probes = len(signatures)
+    results = []
+    for k in ks:
+        result = summarize(latencies[k]) if latencies[k] else {"count": 0}
+        result.update({
+            "k": k,
+            "index": face_index.kind,
+            "probes": probes,
+            "recall": round(hits[k] / probes, 4) if probes else None,
+            "index_recall": round(recall(face_index, exact, signatures, k), 4),
+        })
+        results.append(result)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma-separated enrolled population sizes")
+    parser.add_argument("--iterations", type=int, default=20, help="Requests per operation")
+    parser.add_argument("--detectors", default=",".join(DETECTORS))
+    parser.add_argument("--backends", default=",".join(COMPARE_BACKENDS))
+    parser.add_argument("--operations", default=",".join(OPERATIONS))
+    parser.add_argument("--fixtures", type=Path, help="Directory of face photos to augment instead of drawn faces")
+    parser.add_argument("--recall-k", default="10,50,200", help="Shortlist sizes to measure recall at (empty to skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="Record tracemalloc peaks (slower)")
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from main import app
+    # settings.DEBUG turns on SQL echo, which would dominate the timings
+    logging.getLogger("sqlalchemy.engine.Engine").setLevel(logging.WARNING)
+
+    population = SyntheticPopulation(seed=args.seed, fixtures=args.fixtures)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(value) for value in args.sizes.split(",")):
+            for backend in args.backends.split(","):
+                originals = {key: getattr(settings, key) for key in COMPARE_BACKENDS[backend]["settings"]}
+                for key, value in COMPARE_BACKENDS[backend]["settings"].items():
+                    setattr(settings, key, value)
+                started = time.perf_counter()
+                run = Run(app, Path(directory), size, backend, population)
+                print(f"populated {size} ({backend}) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+                try:
+                    for detector in args.detectors.split(","):
+                        for operation in args.operations.split(","):
+                            rng = random.Random(f"{args.seed}:{size}:{operation}")
+                            result = timed_operation(run, operation, detector, args.iterations, rng, args.trace_memory)
+                            result.update({"population": size, "backend": backend, "detector": detector, "operation": operation})
+                            results.append(result)
+                            print(
+                                f"{size:>7} {backend:<12} {detector:<12} {operation:<18} "
+                                f"p50={result['p50_ms']:9.2f}ms p95={result['p95_ms']:9.2f}ms "
+                                f"p99={result['p99_ms']:9.2f}ms acc={result['accuracy']:.2f} "
+                                f"fmr={result['false_match_rate']:.2f} frr={result['false_reject_rate']:.2f} "
+                                f"rss={result['rss_mb']}MB",
+                                file=sys.stderr,
+                            )
+                    result = encoder_throughput(run, COMPARE_BACKENDS[backend]["encoder"], args.iterations)
+                    result.update({"population": size, "backend": backend, "operation": "encoder-throughput"})
+                    results.append(result)
+                    print(
+                        f"{size:>7} {backend:<12} encode={result['encode_ms']}ms "
+                        f"compare={result['compares_per_second']}/s template={result['template_bytes']}B",
+                        file=sys.stderr,
+                    )
+                    if args.recall_k:
+                        ks = [int(value) for value in args.recall_k.split(",")]
+                        rng = random.Random(f"{args.seed}:{size}:recall")
+                        for result in shortlist_recall(run, ks, args.iterations, rng):
+                            result.update({"population": size, "backend": backend, "operation": "shortlist-recall"})
+                            results.append(result)
+                            print(
+                                f"{size:>7} {backend:<12} shortlist k={result['k']:<6} "
+                                f"recall={result['recall']} {result['index']}-vs-exact={result['index_recall']} "
+                                f"over {result['probes']} probes p50={result.get('p50_ms')}ms",
+                                file=sys.stderr,
+                            )
+                finally:
+                    run.close()
+                    app.dependency_overrides.pop(get_db, None)
+                    for key, value in originals.items():
+                        setattr(settings, key, value)
+
+    report = {
+        "benchmark": "face_pipeline",
+        "git_commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {key: str(value) for key, value in vars(args).items()},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
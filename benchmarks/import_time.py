@@ -0,0 +1,113 @@
+"""Cold-start benchmark for ``main:app``.
+
+Imports the app in fresh interpreters, once per APP_ROLE, and records the
+wall time of ``import main``, the resident memory it leaves behind and
+whether the face stack (OpenCV, NumPy, PIL) was loaded. The slowest modules
+of the first run are listed from ``python -X importtime``:
+
+    python -m benchmarks.import_time --runs 5 --output import.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from benchmarks.face_pipeline import git_commit
+
+HEAVY_MODULES = ("cv2", "numpy", "PIL", "scipy")
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_ms": round(elapsed * 1000, 1),
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "heavy_modules": [name for name in %r if name in sys.modules],
+    "modules": len(sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_probe(env: dict, importtime: bool = False) -> tuple:
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_modules(importtime_log: str, count: int) -> list:
+    """Top ``count`` modules by cumulative import time (ms) from -X importtime output"""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, name.strip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(ms, 1)} for ms, name in rows[:count]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--roles", default="all,api,face", help="Comma-separated APP_ROLE values")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per role")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to report")
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        base_env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{Path(directory) / 'import.db'}",
+            DEBUG="false",
+            PYTHONDONTWRITEBYTECODE="",
+        )
+        # Create the schema once so the timed imports only check migrations
+        run_probe(base_env)
+        for role in args.roles.split(","):
+            env = dict(base_env, APP_ROLE=role)
+            first, importtime_log = run_probe(env, importtime=True)
+            runs = [run_probe(env)[0] for _ in range(args.runs)]
+            timings = [run["import_ms"] for run in runs]
+            result = {
+                "role": role,
+                "import_ms_p50": round(statistics.median(timings), 1),
+                "import_ms_min": min(timings),
+                "max_rss_mb": statistics.median(run["max_rss_mb"] for run in runs),
+                "modules": runs[0]["modules"],
+                "heavy_modules": first["heavy_modules"],
+                "slowest_modules": slowest_modules(importtime_log, args.top),
+            }
+            results.append(result)
+            print(
+                f"{role:<5} import p50={result['import_ms_p50']:8.1f}ms min={result['import_ms_min']:8.1f}ms "
+                f"rss={result['max_rss_mb']}MB modules={result['modules']} heavy={','.join(result['heavy_modules']) or '-'}",
+                file=sys.stderr,
+            )
+
+    report = {
+        "benchmark": "import_time",
+        "git_commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {key: str(value) for key, value in vars(args).items()},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
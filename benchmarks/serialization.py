@@ -0,0 +1,122 @@
+"""Response serialization cost per 1,000 rows.
+
+Times, in process and without a server, the encoding paths a list response
+can take:
+
+- ``dicts``: rows built by a route (user listing, results tally). Before:
+  FastAPI's path for a returned list (``jsonable_encoder`` plus
+  JSONResponse). After: ``json_response`` (orjson when installed, and the
+  stdlib fallback for comparison).
+- ``orm``: Candidate rows through ``CandidateResponse``. FastAPI's
+  response-model path (validate, then pydantic-core straight to bytes)
+  against the same models encoded by an orjson response class, which is
+  what making orjson the app-wide default response class would do.
+
+    python -m benchmarks.serialization --rows 1000 --output serialization.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from benchmarks.face_pipeline import git_commit
+
+
+def user_rows(count: int) -> list:
+    created_at = datetime(2025, 1, 1).isoformat()
+    return [
+        {
+            "id": index,
+            "email": f"student{index}@college.edu",
+            "full_name": f"Student Number {index}",
+            "roll_number": f"CS{index:05d}",
+            "created_at": created_at,
+        }
+        for index in range(count)
+    ]
+
+
+def candidate_rows(count: int) -> list:
+    from app.models.candidate import Candidate
+
+    moment = datetime(2025, 1, 1)
+    return [
+        Candidate(
+            id=index, election_id=1, name=f"Candidate {index}", symbol_number=index,
+            description="d" * 200, email=f"candidate{index}@college.edu",
+            campaign_message="m" * 400, about="a" * 400, poster_key="f" * 64,
+            created_at=moment, updated_at=moment,
+        )
+        for index in range(count)
+    ]
+
+
+def cases(rows: int) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from app.schemas.candidate import CandidateResponse
+    from app.utils import fast_json
+
+    users = user_rows(rows)
+    candidates = candidate_rows(rows)
+    adapter = TypeAdapter(list[CandidateResponse])
+
+    def stdlib_dumps(value):
+        return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    def validated():
+        return adapter.validate_python(candidates, from_attributes=True)
+
+    return {
+        "dicts/jsonable_encoder+JSONResponse": lambda: JSONResponse(jsonable_encoder(users)).body,
+        "dicts/json_response": lambda: fast_json.json_response(users).body,
+        "dicts/stdlib_fallback": lambda: stdlib_dumps(users),
+        "orm/response_model": lambda: adapter.dump_json(validated()),
+        "orm/response_model+orjson_class": lambda: fast_json.dumps(adapter.dump_python(validated(), mode="json")),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per serialized list")
+    parser.add_argument("--repeat", type=int, default=7, help="Timing repeats (best is reported)")
+    parser.add_argument("--number", type=int, default=20, help="Encodings per repeat")
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from app.utils import fast_json
+
+    results = []
+    for name, encode in cases(args.rows).items():
+        best = min(timeit.repeat(encode, number=args.number, repeat=args.repeat)) / args.number
+        result = {
+            "case": name,
+            "ms_per_1k_rows": round(best * 1000 * 1000 / args.rows, 3),
+            "bytes": len(encode()),
+        }
+        results.append(result)
+        print(f"{name:<36} {result['ms_per_1k_rows']:8.3f} ms/1k rows  {result['bytes']:>9} bytes", file=sys.stderr)
+
+    report = {
+        "benchmark": "serialization",
+        "git_commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {key: str(value) for key, value in vars(args).items()},
+        "orjson": fast_json.orjson is not None,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -44,6 +44,11 @@ const fetchWithErrorHandling = async (url, options = {}) => {
   }
 };
 
+// Server paths such as poster URLs ("/api/...") need the API host prefixed;
+// data URLs from a fresh upload are used as they are
+export const mediaUrl = (path) =>
+  path && path.startsWith("/") ? `${API_BASE_URL}${path}` : path;
+
 export const api = {
   // Auth
   login: (email, password) =>
@@ -218,31 +223,41 @@ export const api = {
       return r.json();
     }),
 
-  getUsers: (token) =>
-    fetch(`${API_BASE_URL}/api/admin/users`, {
-      method: "GET",
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-    }).then((r) => {
+  // Follows the X-Next-Cursor header until every page has been fetched
+  getUsers: async (token) => {
+    const users = [];
+    let cursor = null;
+    do {
+      const params = new URLSearchParams({ limit: "1000" });
+      if (cursor) params.set("cursor", cursor);
+      const r = await fetch(`${API_BASE_URL}/api/admin/users?${params}`, {
+        method: "GET",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${token}`,
+        },
+      });
       if (!r.ok) {
-        return r.json().then(data => {
-          throw new Error(data.detail || `HTTP ${r.status}: Failed to fetch users`);
-        });
+        const data = await r.json();
+        throw new Error(data.detail || `HTTP ${r.status}: Failed to fetch users`);
       }
-      return r.json();
-    }),
+      users.push(...(await r.json()));
+      cursor = r.headers.get("X-Next-Cursor");
+    } while (cursor);
+    return users;
+  },
 
   // Face Recognition
-  registerFace: (imageData, token) =>
+  // faceBox ({x, y, width, height} in imageData pixels) lets the server skip
+  // its full-frame face search
+  registerFace: (imageData, token, faceBox = null) =>
     fetch(`${API_BASE_URL}/api/face/register`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
         Authorization: `Bearer ${token}`,
       },
-      body: JSON.stringify({ image_data: imageData }),
+      body: JSON.stringify({ image_data: imageData, face_box: faceBox }),
     }).then((r) => {
       if (!r.ok) {
         return r.json().then(data => {
@@ -269,14 +284,14 @@ export const api = {
       return r.json();
     }),
 
-  verifyFaceForVoting: (imageData, token) =>
+  verifyFaceForVoting: (imageData, token, faceBox = null) =>
     fetch(`${API_BASE_URL}/api/face/verify-for-voting`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
         Authorization: `Bearer ${token}`,
       },
-      body: JSON.stringify({ image_data: imageData }),
+      body: JSON.stringify({ image_data: imageData, face_box: faceBox }),
     }).then((r) => {
       if (!r.ok) {
         return r.json().then(data => {
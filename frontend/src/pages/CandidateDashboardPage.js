@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { api } from "../api";
+import { api, mediaUrl } from "../api";
 import "../styles/CandidateDashboardPage.css";
 
 function CandidateDashboardPage({ candidateToken, candidateId, candidateName, onLogout }) {
@@ -156,7 +156,7 @@ function CandidateDashboardPage({ candidateToken, candidateId, candidateName, on
               {poster && (
                 <div className="preview-section">
                   <h4>Campaign Poster</h4>
-                  <img src={poster} alt="Campaign Poster" className="poster-image" />
+                  <img src={mediaUrl(poster)} alt="Campaign Poster" className="poster-image" />
                 </div>
               )}
               
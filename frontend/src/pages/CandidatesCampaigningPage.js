@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from "react";
-import { api } from "../api";
+import { api, mediaUrl } from "../api";
 import "../styles/CandidatesCampaigningPage.css";
 
 function CandidatesCampaigningPage({ token, electionId, onBackClick }) {
@@ -67,7 +67,7 @@ function CandidatesCampaigningPage({ token, electionId, onBackClick }) {
               <div className="info-section">
                 <h3>Campaign Poster</h3>
                 <img 
-                  src={selectedCandidate.poster} 
+                  src={mediaUrl(selectedCandidate.poster)} 
                   alt={`${selectedCandidate.name}'s campaign poster`}
                   className="campaign-poster-image"
                 />
@@ -457,8 +457,17 @@ function FaceCapturePage({ onFaceSuccess, userEmail, token }) {
       console.log("Captured face image size:", base64Image.length, "bytes");
       console.log("Face region:", { x, y, width, height });
 
+      // Face box relative to the cropped image, so the server only has to
+      // confirm the face instead of searching the whole frame
+      const faceBox = {
+        x: box.x - x,
+        y: box.y - y,
+        width: box.width,
+        height: box.height,
+      };
+
       // Send to backend
-      const response = await api.registerFace(base64Image, token);
+      const response = await api.registerFace(base64Image, token, faceBox);
 
       if (response.message || response.status === "success") {
         setStatus("✓ Face successfully captured! Moving to OTP verification...");
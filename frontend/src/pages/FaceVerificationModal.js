@@ -187,7 +187,7 @@ function FaceVerificationModal({ onVerificationSuccess, onCancel, token }) {
     let lastBlinkTime = 0;
     const BLINK_COOLDOWN = 200;
 
-    const captureFaceImage = async () => {
+    const captureFaceImage = async (detection) => {
       try {
         setStatus("Capturing face...");
         const video = videoRef.current;
@@ -198,16 +198,31 @@ function FaceVerificationModal({ onVerificationSuccess, onCancel, token }) {
           return;
         }
 
+        // Upload only the detected face plus 20% padding, and tell the server
+        // where the face is so it can skip its full-frame search
+        const box = detection.detection.box;
+        const padding = 0.2;
+        const x = Math.max(0, box.x - box.width * padding);
+        const y = Math.max(0, box.y - box.height * padding);
+        const width = Math.min(video.videoWidth - x, box.width * (1 + padding * 2));
+        const height = Math.min(video.videoHeight - y, box.height * (1 + padding * 2));
+        const faceBox = {
+          x: box.x - x,
+          y: box.y - y,
+          width: box.width,
+          height: box.height,
+        };
+
         const tempCanvas = document.createElement("canvas");
-        tempCanvas.width = video.videoWidth;
-        tempCanvas.height = video.videoHeight;
+        tempCanvas.width = width;
+        tempCanvas.height = height;
         const ctx = tempCanvas.getContext("2d");
         
         if (!ctx) {
           throw new Error("Failed to get canvas context");
         }
         
-        ctx.drawImage(video, 0, 0, video.videoWidth, video.videoHeight);
+        ctx.drawImage(video, x, y, width, height, 0, 0, width, height);
         
         const imageData = tempCanvas.toDataURL("image/jpeg", 0.95);
         if (!imageData || !imageData.includes(",")) {
@@ -224,7 +239,7 @@ function FaceVerificationModal({ onVerificationSuccess, onCancel, token }) {
 
         // Call API to verify face
         try {
-          const response = await api.verifyFaceForVoting(base64Image, token);
+          const response = await api.verifyFaceForVoting(base64Image, token, faceBox);
           console.log("Verification response:", response);
 
           if (response.verified || response.is_match || response.message) {
@@ -347,7 +362,7 @@ function FaceVerificationModal({ onVerificationSuccess, onCancel, token }) {
           if (blinks === 1) {
             console.log("Initiating face capture...");
             isCapturing = true;
-            await captureFaceImage();
+            await captureFaceImage(detection);
             // Don't reset here, let the capture function handle it
           }
         } else if (eyeAspectRatio > 0.35) {
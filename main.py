@@ -1,15 +1,43 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import Base, engine
+from app.config import settings
+from app.lifespan import lifespan
+from app.logging_config import configure_logging
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.conditional import ConditionalRequestMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.utils import metrics
 from app.routes import auth, elections, candidates, votes, otp, face, admin, candidate
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+configure_logging()
 
+# Migrations, pool warm-up and cache priming run in the lifespan, once the
+# process is about to serve, not on import
 app = FastAPI(
     title="College Voting System API",
     description="Backend API for college voting system with face recognition",
     version="1.0.0",
+    lifespan=lifespan,
+)
+
+# Innermost, so stored responses are the uncompressed ones and replays get
+# the same compression, CORS and metrics as any other response
+app.add_middleware(IdempotencyMiddleware)
+
+# 304s for routes that declare a cache policy; added before CORS so that
+# CORS headers are applied to 304 responses too
+app.add_middleware(ConditionalRequestMiddleware)
+
+# Outside the conditional middleware, so validators are computed on (and
+# 304s decided for) the uncompressed representation
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    content_types=[media_type.strip() for media_type in settings.COMPRESSION_TYPES.split(",")],
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
 )
 
 # CORS middleware
@@ -19,17 +47,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag", "Last-Modified", "Idempotent-Replayed"],
 )
 
+# Outermost, so the recorded latency covers every other middleware
+if settings.METRICS_ENABLED:
+    metrics.instrument_queries()
+    app.add_middleware(
+        MetricsMiddleware,
+        slow_seconds=settings.SLOW_REQUEST_SECONDS,
+        trace_queries=settings.TRACE_QUERIES,
+        repeated_query_threshold=settings.REPEATED_QUERY_THRESHOLD,
+    )
+
 # Include routers
-app.include_router(auth.router)
-app.include_router(admin.router)
-app.include_router(elections.router)
-app.include_router(candidates.router)
-app.include_router(candidate.router)
-app.include_router(votes.router)
-app.include_router(otp.router)
-app.include_router(face.router)
+ROLES = {
+    "all": (auth, admin, elections, candidates, candidate, votes, otp, face),
+    "api": (auth, admin, elections, candidates, candidate, votes, otp),
+    "face": (face,),
+}
+if settings.APP_ROLE not in ROLES:
+    raise ValueError(f"APP_ROLE must be one of {', '.join(ROLES)}, not {settings.APP_ROLE!r}")
+for module in ROLES[settings.APP_ROLE]:
+    app.include_router(module.router)
 
 
 @app.get("/")
@@ -42,7 +82,15 @@ def health_check():
     return {"status": "ok"}
 
 
+if settings.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    def get_metrics():
+        """Prometheus scrape endpoint"""
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
-    import uvicorn
+    from app.launcher import run
 
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    run(bind="0.0.0.0:8001")
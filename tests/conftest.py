@@ -8,3 +8,196 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 @pytest.fixture(scope="session")
 def anyio_backend():
     return "asyncio"
+
+
+@pytest.fixture
+def db_sessionmaker(tmp_path):
+    """Session factory bound to a fresh per-test SQLite database"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.database import Base
+    import main  # noqa: F401  (registers every model on Base.metadata)
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def client(db_sessionmaker):
+    """TestClient whose get_db dependency uses db_sessionmaker"""
+    from fastapi.testclient import TestClient
+    from app.database import get_db
+    from main import app
+
+    def override_get_db():
+        db = db_sessionmaker()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture
+def admin_headers(client, db_sessionmaker):
+    """Authorization header for a freshly created admin"""
+    from app.models.admin import Admin
+    from app.utils.security import get_password_hash
+
+    db = db_sessionmaker()
+    db.add(Admin(email="admin@college.edu", full_name="Admin", hashed_password=get_password_hash("Admin@123")))
+    db.commit()
+    db.close()
+
+    response = client.post("/api/admin/login", json={"email": "admin@college.edu", "password": "Admin@123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def query_budget(db_sessionmaker):
+    """``with query_budget(n):`` fails if the block runs more than n statements
+
+    Counts what reaches the test database; the failure lists the statements
+    and marks the ones run more than once, the usual sign of an N+1 loop.
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    engine = db_sessionmaker.kw["bind"]
+
+    @contextmanager
+    def budget(limit):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(" ".join(statement.split()))
+
+        event.listen(engine, "after_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "after_cursor_execute", record)
+        listing = "\n".join(
+            ("  N+1? " if statements.count(statement) > 1 else "       ") + statement[:160]
+            for statement in statements
+        )
+        assert len(statements) <= limit, f"{len(statements)} queries for a budget of {limit}:\n{listing}"
+
+    return budget
+
+
+@pytest.fixture
+def add_users(db_sessionmaker):
+    """``add_users(n, prefix="CS")`` adds students CS000.. with emails cs0@college.edu.."""
+    from datetime import datetime
+    from app.models.user import User
+
+    def add(count, prefix="CS", created_at=None):
+        with db_sessionmaker() as db:
+            for i in range(count):
+                db.add(User(
+                    roll_number=f"{prefix}{i:03d}",
+                    email=f"{prefix.lower()}{i}@college.edu",
+                    full_name=f"Student {i}",
+                    hashed_password="x",
+                    created_at=created_at or datetime.utcnow(),
+                ))
+            db.commit()
+
+    return add
+
+
+@pytest.fixture
+def council_election(db_sessionmaker, add_users):
+    """Id of an election with candidates Alice and Bob and votes 2-1 from three students"""
+    from datetime import datetime, timedelta
+    from app.models.candidate import Candidate
+    from app.models.election import Election
+    from app.models.vote import Vote
+
+    add_users(3)
+    with db_sessionmaker() as db:
+        election = Election(title="Council", start_time=datetime.utcnow(), end_time=datetime.utcnow() + timedelta(days=1))
+        db.add(election)
+        db.flush()
+        alice = Candidate(election_id=election.id, name="Alice", symbol_number=1)
+        bob = Candidate(election_id=election.id, name="Bob", symbol_number=2)
+        db.add_all([alice, bob])
+        db.flush()
+        for user_id, candidate in zip((1, 2, 3), (alice, alice, bob)):
+            db.add(Vote(user_id=user_id, election_id=election.id, candidate_id=candidate.id))
+        db.commit()
+        return election.id
+
+
+@pytest.fixture
+def open_election(db_sessionmaker, add_users):
+    """``open_election(count=20)``: an active election with ``count`` students and
+    candidates, where every student but the first has voted; returns its id
+    """
+    from datetime import datetime, timedelta
+    from app.models.candidate import Candidate
+    from app.models.election import Election
+    from app.models.vote import Vote
+
+    def seed(count=20):
+        add_users(count)
+        with db_sessionmaker() as db:
+            election = Election(
+                title="Council", is_active=True,
+                start_time=datetime.utcnow() - timedelta(hours=1), end_time=datetime.utcnow() + timedelta(days=1),
+            )
+            db.add(election)
+            db.flush()
+            candidates = [Candidate(election_id=election.id, name=f"C{i}", symbol_number=i + 1) for i in range(count)]
+            db.add_all(candidates)
+            db.flush()
+            db.add_all(
+                Vote(user_id=user_id, election_id=election.id, candidate_id=candidates[user_id % count].id)
+                for user_id in range(2, count + 1)
+            )
+            db.commit()
+            return election.id
+
+    return seed
+
+
+@pytest.fixture
+def student_headers(db_sessionmaker):
+    """``student_headers(email)``: Authorization header for a new student with that email"""
+    from app.models.user import User
+    from app.utils.security import create_access_token
+
+    def headers(email):
+        with db_sessionmaker() as db:
+            db.add(User(roll_number=email.split("@")[0].upper(), email=email, full_name="S", hashed_password="x"))
+            db.commit()
+        return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+    return headers
+
+
+@pytest.fixture
+def poster_data_url():
+    """``poster_data_url(width=1600, height=900)``: a solid PNG poster as a data: URL"""
+    import base64
+    import io
+    from PIL import Image
+
+    def data_url(width=1600, height=900):
+        buffer = io.BytesIO()
+        Image.new("RGB", (width, height), (200, 30, 60)).save(buffer, "PNG")
+        return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+    return data_url
@@ -0,0 +1,214 @@
+import json
+from datetime import datetime
+from app.models.user import User
+
+
+class TestUserListing:
+
+    def test_requires_admin(self, client):
+        response = client.get("/api/admin/users")
+        assert response.status_code == 401
+
+    def test_keyset_pages_cover_every_user_once(self, client, admin_headers, add_users):
+        add_users(25)
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 10}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/admin/users", params=params, headers=admin_headers)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 10
+            seen.extend(user["id"] for user in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert seen == sorted(seen)
+        assert len(seen) == len(set(seen)) == 25
+
+    def test_filters_by_roll_prefix_and_creation_date(self, client, admin_headers, add_users):
+        add_users(3, prefix="CS", created_at=datetime(2025, 1, 1))
+        add_users(2, prefix="EE", created_at=datetime(2025, 6, 1))
+
+        response = client.get("/api/admin/users", params={"roll_prefix": "EE"}, headers=admin_headers)
+        assert [user["roll_number"] for user in response.json()] == ["EE000", "EE001"]
+
+        response = client.get(
+            "/api/admin/users",
+            params={"created_from": "2025-03-01T00:00:00"},
+            headers=admin_headers,
+        )
+        assert {user["roll_number"][:2] for user in response.json()} == {"EE"}
+
+    def test_prefix_edge_characters(self, client, admin_headers, add_users):
+        from app.utils.pagination import prefix_upper_bound
+
+        assert prefix_upper_bound("CS") == "CT"
+        assert prefix_upper_bound("C\U0010ffff\U0010ffff") == "D"
+        assert prefix_upper_bound("\U0010ffff") is None
+        assert prefix_upper_bound("\ud7ff") == "\ue000"
+
+        add_users(2)
+        response = client.get("/api/admin/users", params={"roll_prefix": "\U0010ffff"}, headers=admin_headers)
+        assert response.status_code == 200 and response.json() == []
+        response = client.get("/api/admin/users", params={"roll_prefix": "CS\U0010ffff"}, headers=admin_headers)
+        assert response.json() == []
+        response = client.get("/api/admin/users", params={"roll_prefix": "CS\x00"}, headers=admin_headers)
+        assert response.status_code == 400
+
+    def test_ndjson_stream(self, client, admin_headers, add_users):
+        add_users(5)
+
+        response = client.get("/api/admin/users", params={"format": "ndjson"}, headers=admin_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["roll_number"] for row in rows] == [f"CS{i:03d}" for i in range(5)]
+
+    def test_invalid_cursor(self, client, admin_headers):
+        response = client.get("/api/admin/users", params={"cursor": "!!"}, headers=admin_headers)
+        assert response.status_code == 400
+
+
+class TestVoterImport:
+
+    def test_csv_import_reports_bad_rows_without_aborting(self, client, admin_headers, db_sessionmaker, add_users):
+        add_users(1, prefix="OLD")
+        body = "\n".join([
+            "roll_number,email,full_name,password",
+            "CS100,a@college.edu,Alice,Secret@1",
+            "CS101,not-an-email,Bob,Secret@1",
+            "CS102,a@college.edu,Carol,Secret@1",
+            "OLD000,old@college.edu,Dave,Secret@1",
+            "CS103,d@college.edu,Erin,",
+        ])
+
+        response = client.post(
+            "/api/admin/users/import",
+            params={"notify": False},
+            content=body,
+            headers={**admin_headers, "Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 200
+        report = response.json()
+        assert report["total_rows"] == 5
+        assert report["imported"] == 2
+        assert [error["row"] for error in report["errors"]] == [3, 4, 5]
+
+        db = db_sessionmaker()
+        imported = db.query(User).filter(User.roll_number.in_(["CS100", "CS103"])).all()
+        assert len(imported) == 2
+        assert all(user.hashed_password.startswith("$2") for user in imported)
+        db.close()
+
+    def test_ndjson_import(self, client, admin_headers):
+        lines = [
+            json.dumps({"roll_number": "EE1", "email": "ee1@college.edu", "full_name": "One"}),
+            "{broken",
+            json.dumps({"roll_number": "EE2", "email": "ee2@college.edu", "full_name": "Two"}),
+        ]
+
+        response = client.post(
+            "/api/admin/users/import",
+            params={"notify": False},
+            content="\n".join(lines),
+            headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+        )
+
+        report = response.json()
+        assert report["imported"] == 2
+        assert report["errors"][0]["row"] == 2
+
+    def test_csv_missing_columns(self, client, admin_headers):
+        response = client.post(
+            "/api/admin/users/import",
+            params={"format": "csv"},
+            content="email\nx@college.edu",
+            headers=admin_headers,
+        )
+        assert response.status_code == 400
+
+
+class TestElectionExport:
+
+    def test_votes_csv(self, client, admin_headers, council_election):
+        election_id = council_election
+
+        response = client.get(f"/api/admin/elections/{election_id}/export", headers=admin_headers)
+
+        assert response.status_code == 200
+        assert "election-1-votes.csv" in response.headers["content-disposition"]
+        lines = response.text.splitlines()
+        assert lines[0] == "id,user_id,election_id,candidate_id,created_at"
+        assert len(lines) == 4
+
+    def test_tallies_ndjson_gzip(self, client, admin_headers, council_election):
+        import gzip
+
+        election_id = council_election
+
+        response = client.get(
+            f"/api/admin/elections/{election_id}/export",
+            params={"dataset": "tallies", "format": "ndjson", "gzip": True},
+            headers=admin_headers,
+        )
+
+        assert response.headers["content-type"] == "application/gzip"
+        rows = [json.loads(line) for line in gzip.decompress(response.content).splitlines()]
+        assert [(row["candidate_name"], row["vote_count"]) for row in rows] == [("Alice", 2), ("Bob", 1)]
+
+    def test_parquet(self, client, admin_headers, council_election):
+        election_id = council_election
+
+        response = client.get(
+            f"/api/admin/elections/{election_id}/export",
+            params={"format": "parquet"},
+            headers=admin_headers,
+        )
+
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            assert response.status_code == 501
+            return
+        import io
+        table = pq.read_table(io.BytesIO(response.content))
+        assert table.num_rows == 3
+        assert table.column_names[:2] == ["id", "user_id"]
+
+    def test_unknown_election(self, client, admin_headers):
+        response = client.get("/api/admin/elections/99/export", headers=admin_headers)
+        assert response.status_code == 404
+
+
+class TestDashboardStatistics:
+
+    def test_counts_and_turnout(self, client, admin_headers, council_election, add_users):
+        election_id = council_election
+        add_users(1, prefix="EE")
+
+        response = client.get("/api/admin/statistics/dashboard", headers=admin_headers)
+
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["total_users"] == 4
+        assert stats["total_elections"] == 1
+        assert stats["total_candidates"] == 2
+        assert stats["total_votes"] == 3
+        assert stats["elections"] == [{
+            "election_id": election_id,
+            "title": "Council",
+            "is_active": True,
+            "votes": 3,
+            "turnout_percent": 75.0,
+        }]
+
+    def test_empty_database(self, client, admin_headers):
+        stats = client.get("/api/admin/statistics/dashboard", headers=admin_headers).json()
+        assert (stats["total_users"], stats["total_elections"], stats["total_votes"]) == (0, 0, 0)
+        assert stats["elections"] == []
@@ -0,0 +1,48 @@
+import json
+
+
+class TestIdempotentRegistration:
+
+    def test_retry_sends_emails_once(self, client, monkeypatch):
+        from app.routes import auth
+
+        sent = []
+        monkeypatch.setattr(auth, "send_login_link_email", lambda *args: sent.append(args) or True)
+        monkeypatch.setattr(auth, "send_otp_email", lambda *args: True)
+        body = {"roll_number": "R1", "email": "r1@college.edu", "full_name": "R", "password": "Secret@123"}
+
+        responses = [
+            client.post("/api/auth/register", json=body, headers={"Idempotency-Key": "signup-r1"}) for _ in range(3)
+        ]
+        assert [response.status_code for response in responses] == [200, 200, 200]
+        assert len({response.text for response in responses}) == 1
+        assert len(sent) == 1
+
+        changed = {**body, "full_name": "Someone else"}
+        response = client.post("/api/auth/register", json=changed, headers={"Idempotency-Key": "signup-r1"})
+        assert response.status_code == 422
+
+    def test_in_flight_and_failed_requests(self, client, db_sessionmaker, monkeypatch):
+        from app.routes import auth
+        from app.utils import idempotency
+
+        body = {"roll_number": "R2", "email": "r2@college.edu", "full_name": "R", "password": "Secret@123"}
+        encoded = json.dumps(body, separators=(",", ":")).encode()
+        key = idempotency.scoped_key("POST", "/api/auth/register", "", "busy")
+        with db_sessionmaker() as db:
+            assert idempotency.claim(db, key, idempotency.fingerprint(encoded)) is None
+        response = client.post(
+            "/api/auth/register", content=encoded,
+            headers={"Idempotency-Key": "busy", "Content-Type": "application/json"},
+        )
+        assert response.status_code == 409
+
+        # A server error releases the key, so the retry runs the handler
+        monkeypatch.setattr(auth, "send_login_link_email", lambda *args: True)
+        monkeypatch.setattr(auth, "send_otp_email", lambda *args: True)
+        with monkeypatch.context() as patch:
+            patch.setattr(auth, "get_password_hash", lambda password: 1 / 0)
+            failed = client.post("/api/auth/register", json=body, headers={"Idempotency-Key": "flaky"})
+            assert failed.status_code == 500
+        retry = client.post("/api/auth/register", json=body, headers={"Idempotency-Key": "flaky"})
+        assert retry.status_code == 200 and "idempotent-replayed" not in retry.headers
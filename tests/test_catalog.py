@@ -0,0 +1,236 @@
+class TestCatalogCache:
+
+    def test_unchanged_catalog_is_not_modified(self, client, admin_headers):
+        first = client.get("/api/elections/")
+        etag = first.headers["etag"]
+        assert first.json() == []
+
+        again = client.get("/api/elections/", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.headers["etag"] == etag
+
+        client.post("/api/admin/elections", json={"name": "Council"}, headers=admin_headers)
+        changed = client.get("/api/elections/", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert [election["title"] for election in changed.json()] == ["Council"]
+
+    def test_admin_candidate_write_invalidates(self, client, admin_headers, council_election):
+        election_id = council_election
+        paths = (f"/api/elections/{election_id}/candidates", f"/api/candidates/election/{election_id}")
+        assert [len(client.get(path).json()) for path in paths] == [2, 2]
+        assert len(client.get("/api/candidates/all").json()) == 2
+
+        client.post("/api/admin/candidates", headers=admin_headers, json={
+            "election_id": election_id, "name": "Carol", "symbol_number": 3,
+        })
+
+        for path in paths:
+            candidates = client.get(path).json()
+            assert [candidate["name"] for candidate in candidates] == ["Alice", "Bob", "Carol"]
+            assert set(candidates[0]) >= {"id", "election_id", "symbol_number", "created_at", "poster"}
+        assert len(client.get("/api/candidates/all").json()) == 3
+
+    def test_direct_database_edit_seen_after_ttl(self, client, db_sessionmaker, monkeypatch, council_election):
+        import time
+        from app.models.candidate import Candidate
+        from app.utils.catalog import catalog_cache
+
+        monkeypatch.setattr(catalog_cache, "ttl", 0.5)
+        election_id = council_election
+        path = f"/api/elections/{election_id}/candidates"
+        etag = client.get(path).headers["etag"]
+
+        db = db_sessionmaker()
+        db.query(Candidate).filter(Candidate.name == "Bob").one().about = "Edited by a script"
+        db.commit()
+        db.close()
+        # Within the TTL the cached body is served without checking the database
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+        time.sleep(0.5)
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[1]["about"] == "Edited by a script"
+
+
+    def test_unknown_elections_are_not_cached(self, client, council_election, monkeypatch):
+        from app.utils.catalog import catalog_cache
+
+        monkeypatch.setattr(catalog_cache, "max_entries", 4)
+        catalog_cache.invalidate()
+        for election_id in range(100, 120):
+            assert client.get(f"/api/candidates/election/{election_id}").status_code == 404
+            assert client.get(f"/api/elections/{election_id}/candidates").status_code == 404
+        assert len(catalog_cache) == 0
+
+        for fields in ("id", "name", "id,name", "symbol_number", "about", "id,about"):
+            assert client.get(f"/api/candidates/election/{council_election}?fields={fields}").status_code == 200
+        assert len(catalog_cache) == 4
+        assert not catalog_cache._key_locks
+
+class TestSparseFieldsets:
+
+    def test_fields_limit_payload_and_loaded_columns(self, client, db_sessionmaker, council_election):
+        from sqlalchemy import event
+
+        election_id = council_election
+        statements = []
+        engine = db_sessionmaker.kw["bind"]
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        response = client.get(f"/api/candidates/election/{election_id}?fields=name,symbol_number,id")
+        assert response.status_code == 200
+        # Fields come back in the response model's order
+        assert [list(row) for row in response.json()] == [["id", "name", "symbol_number"]] * 2
+        select_candidates = [sql for sql in statements if "FROM candidates" in sql and "count(" not in sql]
+        assert select_candidates and all("about" not in sql for sql in select_candidates)
+
+        full = client.get(f"/api/elections/{election_id}/candidates").json()
+        assert {"about", "campaign_message", "poster", "poster_thumbnail"} <= set(full[0])
+
+    def test_summary_list_and_unknown_fields(self, client, council_election):
+        assert client.get("/api/candidates/all?fields=name").json() == [{"name": "Alice"}, {"name": "Bob"}]
+        assert set(client.get("/api/candidates/all").json()[0]) == {
+            "id", "name", "election_id", "symbol_number", "description"
+        }
+
+        response = client.get("/api/candidates/all?fields=name,hashed_password")
+        assert response.status_code == 400
+        assert "hashed_password" in response.json()["detail"]
+
+
+class TestCandidatePosters:
+
+    def upload(self, client, election_id, poster):
+        candidate_id = client.get(f"/api/candidates/election/{election_id}").json()[0]["id"]
+        response = client.put(f"/api/candidate/profile/{candidate_id}", json={
+            "campaign_message": "Vote for me", "about": "About", "poster": poster,
+        })
+        return election_id, candidate_id, response
+
+    def test_lists_carry_urls_not_image_data(self, client, council_election, poster_data_url):
+        election_id, candidate_id, response = self.upload(client, council_election, poster_data_url())
+        assert response.status_code == 200
+        url = response.json()["poster"]
+        assert url.startswith(f"/api/candidates/{candidate_id}/poster?size=large&v=")
+
+        listed = client.get(f"/api/candidates/election/{election_id}").json()[0]
+        assert listed["poster"] == url
+        assert listed["poster_thumbnail"] == url.replace("size=large", "size=thumb")
+        assert "base64" not in client.get(f"/api/elections/{election_id}/candidates").text
+
+        # Saving the profile again sends the URL back, which keeps the poster
+        client.put(f"/api/candidate/profile/{candidate_id}", json={
+            "campaign_message": "Still me", "about": "About", "poster": url,
+        })
+        assert client.get(f"/api/candidates/{candidate_id}").json()["poster"] == url
+
+    def test_variants_ranges_and_revalidation(self, client, council_election, poster_data_url):
+        import io
+        from PIL import Image
+
+        _, candidate_id, response = self.upload(client, council_election, poster_data_url())
+        url = response.json()["poster"]
+
+        large = client.get(url, headers={"Accept": "image/avif,image/webp,*/*"})
+        assert large.headers["content-type"] == "image/webp"
+        assert large.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert "Accept" in large.headers["vary"]
+        assert Image.open(io.BytesIO(large.content)).size == (1200, 675)
+
+        thumb = client.get(f"/api/candidates/{candidate_id}/poster?size=thumb&format=jpeg")
+        assert thumb.headers["content-type"] == "image/jpeg"
+        assert thumb.headers["cache-control"] == "public, no-cache"
+        assert Image.open(io.BytesIO(thumb.content)).size == (320, 180)
+
+        partial = client.get(url, headers={"Accept": "image/webp", "Range": "bytes=0-99"})
+        assert partial.status_code == 206
+        assert partial.headers["content-range"] == f"bytes 0-99/{len(large.content)}"
+        assert partial.content == large.content[:100]
+        assert client.get(url, headers={"Range": "bytes=999999999-"}).status_code == 416
+
+        repeat = client.get(url, headers={"Accept": "image/webp", "If-None-Match": large.headers["etag"]})
+        assert repeat.status_code == 304
+
+    def test_invalid_poster_is_rejected(self, client, council_election):
+        _, candidate_id, response = self.upload(client, council_election, "data:image/png;base64,bm90IGFuIGltYWdl")
+        assert response.status_code == 400
+        assert client.get(f"/api/candidates/{candidate_id}/poster").status_code == 404
+
+    def test_replaced_posters_are_garbage_collected(self, client, db_sessionmaker, council_election, poster_data_url):
+        from app.models.poster import Blob
+
+        _, candidate_id, _ = self.upload(client, council_election, poster_data_url())
+        client.put(f"/api/candidate/profile/{candidate_id}", json={
+            "campaign_message": "", "about": "", "poster": poster_data_url(800, 800),
+        })
+        db = db_sessionmaker()
+        # Original plus four renditions of the current poster only
+        assert db.query(Blob).count() == 5
+        db.close()
+
+
+def test_ttl_cache_serves_stale_while_revalidating():
+    import threading
+    import time
+    from app.utils.cache import TTLCache
+
+    cache = TTLCache(ttl=0.05, stale_ttl=10)
+    calls = []
+    reloaded = threading.Event()
+
+    def loader():
+        calls.append(1)
+        if len(calls) > 1:
+            reloaded.set()
+        return len(calls)
+
+    assert cache.get("k", loader) == 1
+    assert cache.get("k", loader) == 1
+    time.sleep(0.06)
+    # Stale: old value returned immediately, refresh happens in the background
+    assert cache.get("k", loader) == 1
+    assert reloaded.wait(2)
+    time.sleep(0.01)
+    assert cache.get("k", loader) == 2
+
+
+def test_ttl_cache_evicts_expired_then_least_recently_used():
+    import time
+    from app.utils.cache import TTLCache
+
+    cache = TTLCache(ttl=60, max_entries=3)
+    for key in "abc":
+        cache.get(key, lambda: key)
+    cache.get("a", lambda: "reloaded")
+    cache.get("d", lambda: "d")
+    assert [cache.peek(key) for key in "abcd"] == ["a", None, "c", "d"]
+
+    # An expired entry goes before older but live ones
+    cache = TTLCache(ttl=60, max_entries=3)
+    cache.get("x", lambda: "x")
+    cache.get("y", lambda: "y")
+    cache.ttl = 0.01
+    cache.get("expired", lambda: "expired")
+    time.sleep(0.02)
+    cache.ttl = 60
+    cache.get("z", lambda: "z")
+    assert [cache.peek(key) for key in ("x", "y", "expired", "z")] == ["x", "y", None, "z"]
+
+def test_json_response_matches_fastapi_encoding():
+    from datetime import datetime
+    from fastapi import Response
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from app.utils.fast_json import json_response
+
+    payload = [{"id": 1, "name": "Zoë", "created_at": datetime(2025, 1, 2, 3, 4, 5), "score": None}]
+    injected = Response()
+    del injected.headers["content-length"]
+    injected.headers["ETag"] = '"v1"'
+
+    response = json_response(payload, injected)
+    assert response.body == JSONResponse(jsonable_encoder(payload)).body
+    assert response.headers["etag"] == '"v1"'
+    assert response.headers["content-length"] == str(len(response.body))
@@ -0,0 +1,446 @@
+import base64
+import json
+import tarfile
+import zipfile
+from io import BytesIO
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+from app.models.face import FaceEncoding
+from app.models.user import User
+from app.utils import face_identification
+from app.utils import face_recognition_util as fru
+from app.utils.face_gallery import OP_ADD, OP_REMOVE, GalleryStore, open_snapshot, write_snapshot
+from app.utils.face_index import ExactIndex, FaceIndex, IVFIndex, recall
+from app.utils.security import create_access_token
+
+
+def cartoon_face_jpeg(width=640, height=480, center=(320, 240), scale=1.0) -> bytes:
+    """A drawn face the Haar cascade detects, as JPEG bytes"""
+    image = np.full((height, width, 3), 200, np.uint8)
+    cx, cy = center
+    cv2.ellipse(image, (cx, cy), (int(90 * scale), int(120 * scale)), 0, 0, 360, (180, 150, 130), -1)
+    for dx in (-35, 35):
+        cv2.ellipse(image, (cx + int(dx * scale), cy - int(30 * scale)), (int(18 * scale), int(9 * scale)), 0, 0, 360, (40, 40, 40), -1)
+    cv2.ellipse(image, (cx, cy + int(60 * scale)), (int(35 * scale), int(12 * scale)), 0, 0, 360, (60, 40, 120), -1)
+    cv2.line(image, (cx, cy - int(10 * scale)), (cx - 5, cy + int(30 * scale)), (120, 100, 90), 3)
+    buffer = BytesIO()
+    Image.fromarray(image).save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def no_full_frame_scan(monkeypatch):
+    def fail(gray):
+        raise AssertionError("full-frame scan should not run")
+    monkeypatch.setattr(fru, "_detect_full_frame", fail)
+
+
+class TestFaceBox:
+
+    def test_full_frame_detection(self):
+        encoding, confidence, success = fru.encode_face_from_image(cartoon_face_jpeg())
+        assert success
+        assert encoding.shape[:2] == (100, 100)
+
+    def test_client_box_is_refined_locally(self, no_full_frame_scan):
+        encoding, confidence, success = fru.encode_face_from_image(
+            cartoon_face_jpeg(), face_box=(220, 130, 200, 220)
+        )
+        assert success
+
+    def test_pre_cropped_face(self, no_full_frame_scan):
+        image = Image.open(BytesIO(cartoon_face_jpeg()))
+        crop = BytesIO()
+        image.crop((170, 80, 470, 400)).save(crop, format="JPEG")
+        encoding, confidence, success = fru.encode_face_from_image(crop.getvalue(), pre_cropped=True)
+        assert success
+
+    @pytest.mark.parametrize("box", [(0, 0, 5, 5), (100, 100, 400, 50), (float("nan"), 0, 10, 10), (900, 900, 50, 50)])
+    def test_implausible_boxes_are_rejected(self, box):
+        assert fru._sanitize_face_box(box, (480, 640)) is None
+
+    def test_wrong_box_falls_back_to_full_frame(self):
+        location = fru.locate_face(np.array(Image.open(BytesIO(cartoon_face_jpeg()))), face_box=(0, 0, 120, 120))
+        x, y, w, h = location
+        assert 150 < x + w / 2 < 490
+
+    def test_register_accepts_face_box(self, client, db_sessionmaker, no_full_frame_scan):
+        from app.models.user import User
+        from app.utils.security import create_access_token
+
+        db = db_sessionmaker()
+        db.add(User(roll_number="CS1", email="s@college.edu", full_name="S", hashed_password="x"))
+        db.commit()
+        db.close()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 's@college.edu'})}"}
+
+        response = client.post("/api/face/register", headers=headers, json={
+            "image_data": base64.b64encode(cartoon_face_jpeg()).decode(),
+            "face_box": {"x": 220, "y": 130, "width": 200, "height": 220},
+        })
+        assert response.status_code == 200, response.text
+
+        response = client.post("/api/face/verify-for-voting", headers=headers, json={
+            "image_data": base64.b64encode(cartoon_face_jpeg()).decode(),
+            "face_box": {"x": 220, "y": 130, "width": 200, "height": 220},
+        })
+        assert response.status_code == 200, response.text
+        assert response.json()["verified"] is True
+
+    def test_request_requires_an_image(self, client):
+        response = client.post("/api/face/verify", json={"face_box": {"x": 0, "y": 0, "width": 1, "height": 1}})
+        assert response.status_code == 422
+
+
+class TestIdentification:
+
+    def test_exact_index_orders_nearest_first(self):
+        signatures = np.array([[0.0, 1.0], [0.9, 0.1], [0.5, 0.5], [1.0, 0.0]], np.float32)
+        index = ExactIndex.build([10, 11, 12, 13], signatures)
+        probe = np.array([1.0, 0.0], np.float32)
+        assert index.search(probe, 2) == [13, 11]
+        assert index.search(probe, 10) == [13, 11, 12, 10]
+
+    def test_index_without_probe_lists_cannot_be_created(self):
+        class Untrained(FaceIndex):
+            @classmethod
+            def train(cls, vectors, **options):
+                return np.zeros((1, vectors.shape[1]), dtype=np.float32)
+
+        with pytest.raises(TypeError, match="probe_lists"):
+            Untrained.build([1], np.ones((1, 2), np.float32))
+
+    def test_identify_compares_only_the_shortlist(self, db_sessionmaker, monkeypatch):
+        rng = np.random.default_rng(1)
+        templates = [rng.integers(0, 256, (100, 100, 3), dtype=np.uint8) for _ in range(5)]
+        with db_sessionmaker() as db:
+            for index, template in enumerate(templates):
+                user = User(roll_number=f"F{index}", email=f"f{index}@x.y", full_name="F", hashed_password="!")
+                db.add(user)
+                db.flush()
+                db.add(FaceEncoding(
+                    user_id=user.id,
+                    face_encoding=fru.serialize_face_encoding(template),
+                    face_signature=fru.serialize_face_signature(fru.compute_face_signature(template)),
+                    is_verified="verified",
+                ))
+            db.commit()
+
+            compared = []
+            histogram = fru.get_encoder("histogram")
+            original = histogram.compare_many
+            monkeypatch.setattr(
+                histogram, "compare_many",
+                lambda stored, probe: compared.extend(stored) or original(stored, probe),
+            )
+            record, distance = face_identification.identify_face(db, templates[3], k=2)
+            assert len(compared) == 2
+            assert record.user.roll_number == "F3"
+            assert distance < 0.01
+
+            compared.clear()
+            face_identification.identify_face(db, templates[3], k=0)
+            assert len(compared) == 5
+
+    def test_templates_without_signature_are_always_shortlisted(self, db_sessionmaker):
+        rng = np.random.default_rng(3)
+        templates = [rng.integers(0, 256, (100, 100, 3), dtype=np.uint8) for _ in range(6)]
+        with db_sessionmaker() as db:
+            for index, template in enumerate(templates):
+                user = User(roll_number=f"U{index}", email=f"u{index}@x.y", full_name="U", hashed_password="!")
+                db.add(user)
+                db.flush()
+                signed = index < 4
+                db.add(FaceEncoding(
+                    user_id=user.id,
+                    face_encoding=fru.serialize_face_encoding(template),
+                    face_signature=fru.serialize_face_signature(fru.compute_face_signature(template)) if signed else None,
+                    # Enrolled before migration 0004 could sign it; the last one is not verified
+                    is_verified="verified" if index < 5 else "pending",
+                ))
+            db.commit()
+
+            probe = fru.compute_face_signature(templates[0])
+            assert face_identification.shortlist(db, probe, 1) == [1, 5]
+            record, distance = face_identification.identify_face(db, templates[4], k=1)
+            assert record.user.roll_number == "U4"
+            assert distance < 0.01
+
+
+    def test_face_route_query_budgets(self, client, db_sessionmaker, query_budget):
+        rng = np.random.default_rng(2)
+        with db_sessionmaker() as db:
+            # A gallery of other students, so per-template queries would show
+            for index in range(20):
+                user = User(roll_number=f"G{index}", email=f"g{index}@x.y", full_name="G", hashed_password="!")
+                db.add(user)
+                db.flush()
+                template = rng.integers(0, 256, (100, 100, 3), dtype=np.uint8)
+                db.add(FaceEncoding(
+                    user_id=user.id,
+                    face_encoding=fru.serialize_face_encoding(template),
+                    face_signature=fru.serialize_face_signature(fru.compute_face_signature(template)),
+                    is_verified="verified",
+                ))
+            db.add(User(roll_number="QB1", email="qb@x.y", full_name="Q", hashed_password="!"))
+            db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'qb@x.y'})}"}
+        body = {"image_data": base64.b64encode(cartoon_face_jpeg()).decode()}
+
+        with query_budget(3):
+            assert client.post("/api/face/register", json=body, headers=headers).status_code == 200
+        with query_budget(3):
+            assert client.post("/api/face/verify-for-voting", json=body, headers=headers).status_code == 200
+        client.post("/api/face/verify", json=body)  # builds the shortlist index
+        with query_budget(3):
+            response = client.post("/api/face/verify", json=body)
+            assert response.json()["user_email"] == "qb@x.y"
+
+
+class TestEncoders:
+
+    def test_lbp_descriptor_is_fixed_length(self):
+        encoder = fru.get_encoder("lbp")
+        crops = [np.random.default_rng(seed).integers(0, 256, (100, 100, 3), dtype=np.uint8) for seed in range(2)]
+        encodings = [encoder.encode(crop) for crop in crops]
+        assert all(encoding.shape == (encoder.dim,) for encoding in encodings)
+
+        stored = encoder.deserialize(encoder.serialize(encodings[0]))
+        assert encoder.compare(stored, encodings[0]) == (True, 0.0)
+        is_match, distance = encoder.compare(stored, encodings[1])
+        assert not is_match and 0 < distance <= 1
+
+    def test_unknown_encoder(self):
+        with pytest.raises(ValueError):
+            fru.get_encoder("eigenfaces")
+
+    def test_incomplete_encoder_cannot_be_created(self):
+        class NoCompare(fru.FaceEncoder):
+            name = "no-compare"
+
+            def encode(self, face_crop):
+                return face_crop
+
+            def serialize(self, encoding):
+                return b""
+
+            def deserialize(self, encoded_bytes):
+                return None
+
+        with pytest.raises(TypeError, match="compare"):
+            NoCompare()
+
+    def test_register_stores_configured_encoder(self, client, db_sessionmaker, monkeypatch):
+        monkeypatch.setattr(face_identification.settings, "FACE_ENCODER", "lbp")
+        with db_sessionmaker() as db:
+            db.add(User(roll_number="EN1", email="en@x.y", full_name="E", hashed_password="!"))
+            db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'en@x.y'})}"}
+        body = {"image_data": base64.b64encode(cartoon_face_jpeg()).decode()}
+        assert client.post("/api/face/register", json=body, headers=headers).status_code == 200
+
+        with db_sessionmaker() as db:
+            record = db.query(FaceEncoding).one()
+            assert record.encoder == "lbp"
+            assert len(record.face_encoding) == fru.LBPEncoder.dim * 2
+
+        response = client.post("/api/face/verify-for-voting", json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        response = client.post("/api/face/verify", json=body)
+        assert response.status_code == 200, response.text
+        assert response.json()["user_email"] == "en@x.y"
+
+    def test_mixed_encoder_gallery(self, db_sessionmaker):
+        face = np.array(Image.open(BytesIO(cartoon_face_jpeg())).resize((100, 100)))
+        with db_sessionmaker() as db:
+            for index, name in enumerate(("histogram", "lbp")):
+                encoder = fru.get_encoder(name)
+                user = User(roll_number=f"M{index}", email=f"m{index}@x.y", full_name="M", hashed_password="!")
+                db.add(user)
+                db.flush()
+                db.add(FaceEncoding(
+                    user_id=user.id,
+                    encoder=name,
+                    face_encoding=encoder.serialize(encoder.encode(face if name == "lbp" else 255 - face)),
+                    face_signature=fru.serialize_face_signature(fru.compute_face_signature(face)),
+                    is_verified="verified",
+                ))
+            db.commit()
+
+            record, distance = face_identification.identify_face(db, face)
+            assert record.encoder == "lbp"
+            assert distance == 0.0
+
+
+class TestFaceIndex:
+
+    @pytest.fixture
+    def gallery(self):
+        rng = np.random.default_rng(0)
+        vectors = np.sqrt(rng.dirichlet(np.full(16, 2.0), 5000)).astype(np.float32)
+        return np.arange(1, 5001), vectors
+
+    def test_ivf_recall_against_exact(self, gallery):
+        ids, vectors = gallery
+        probes = vectors[:50] + np.random.default_rng(1).normal(0, 0.01, (50, 16)).astype(np.float32)
+        ivf = IVFIndex.build(ids, vectors, nprobe=16)
+        assert recall(ivf, ExactIndex.build(ids, vectors), probes, 10) > 0.9
+
+    def test_incremental_insert_and_delete(self, gallery):
+        ids, vectors = gallery
+        index = IVFIndex.build(ids, vectors, nprobe=16)
+        index.add(9999, vectors[0])
+        index.remove(1)
+        assert index.search(vectors[0], 1) == [9999]
+        index.add(2, vectors[3])  # re-registration replaces the old descriptor
+        assert set(index.search(vectors[3], 2)) == {2, 4}
+        assert len(index) == 5000
+
+        compacted = index.compact()
+        assert compacted.pending == 0
+        assert compacted.search(vectors[0], 1) == [9999]
+        assert 1 not in compacted.ids
+
+    def test_snapshot_is_memory_mapped(self, gallery, tmp_path):
+        ids, vectors = gallery
+        index = IVFIndex.build(ids, vectors, nprobe=16)
+        index.add(9999, vectors[0])
+        write_snapshot(tmp_path / "snapshot.bin", index, epoch=7)
+
+        loaded, epoch = open_snapshot(tmp_path / "snapshot.bin")
+        assert epoch == 7
+        assert isinstance(loaded.vectors, np.memmap)
+        assert loaded.search(vectors[10], 5) == index.search(vectors[10], 5)
+
+    def test_workers_share_snapshot_and_delta_log(self, gallery, tmp_path):
+        ids, vectors = gallery
+        writer = GalleryStore(tmp_path, 16)
+        with writer.lock():
+            writer.publish(ExactIndex.build(ids, vectors))
+
+        reader = GalleryStore(tmp_path, 16)
+        index, epoch, offset = reader.open()
+        writer.append(epoch, OP_ADD, 9999, vectors[0])
+        writer.append(epoch, OP_REMOVE, 1)
+        offset = reader.replay(index, epoch, offset)
+        assert index.search(vectors[0], 1) == [9999]
+        assert len(index) == 5000
+        assert reader.replay(index, epoch, offset) == offset
+
+    def test_register_and_remove_update_the_index(self, client, db_sessionmaker, monkeypatch):
+        with db_sessionmaker() as db:
+            db.add(User(roll_number="IX1", email="ix@x.y", full_name="I", hashed_password="!"))
+            db.commit()
+            assert len(face_identification.get_face_index(db)) == 0
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'ix@x.y'})}"}
+        monkeypatch.setattr(face_identification, "load_gallery", lambda db: pytest.fail("index rebuilt"))
+
+        body = {"image_data": base64.b64encode(cartoon_face_jpeg()).decode()}
+        assert client.post("/api/face/register", json=body, headers=headers).status_code == 200
+        with db_sessionmaker() as db:
+            assert len(face_identification.get_face_index(db)) == 1
+
+        assert client.delete("/api/face/remove", headers=headers).status_code == 200
+        with db_sessionmaker() as db:
+            assert len(face_identification.get_face_index(db)) == 0
+
+    def test_new_worker_starts_from_shared_gallery(self, client, db_sessionmaker, monkeypatch, tmp_path):
+        monkeypatch.setattr(face_identification.settings, "FACE_INDEX_DIR", str(tmp_path))
+        monkeypatch.setattr(face_identification, "_galleries", {})
+        with db_sessionmaker() as db:
+            db.add(User(roll_number="IX2", email="ix2@x.y", full_name="I", hashed_password="!"))
+            db.commit()
+            assert len(face_identification.get_face_index(db)) == 0
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'ix2@x.y'})}"}
+        body = {"image_data": base64.b64encode(cartoon_face_jpeg()).decode()}
+        assert client.post("/api/face/register", json=body, headers=headers).status_code == 200
+
+        # A fresh process maps the snapshot and replays the log, without
+        # reading the gallery from the database
+        monkeypatch.setattr(face_identification, "_galleries", {})
+        monkeypatch.setattr(face_identification, "load_gallery", lambda db: pytest.fail("gallery reloaded"))
+        with db_sessionmaker() as db:
+            index = face_identification.get_face_index(db)
+        assert len(index) == 1
+        assert index.pending == 1  # the registration, replayed from the log
+
+
+class TestBulkEnrollment:
+
+    @staticmethod
+    def photos():
+        blank = BytesIO()
+        Image.new("RGB", (320, 240), (200, 200, 200)).save(blank, format="JPEG")
+        return {
+            "photos/CS000.jpg": cartoon_face_jpeg(),
+            "photos/CS001.jpg": blank.getvalue(),
+            "photos/NOPE1.jpg": cartoon_face_jpeg(center=(300, 250)),
+            "photos/notes.txt": b"not a photo",
+            "__MACOSX/photos/._CS000.jpg": b"resource fork",
+        }
+
+    @staticmethod
+    def add_students(db_sessionmaker):
+        with db_sessionmaker() as db:
+            for index in range(2):
+                db.add(User(roll_number=f"CS{index:03d}", email=f"b{index}@x.y", full_name="B", hashed_password="!"))
+            db.commit()
+
+    @staticmethod
+    def report(response) -> tuple:
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        return {line["file"]: line for line in lines[:-1]}, lines[-1]["summary"]
+
+    def test_zip_import_streams_per_image_status(self, client, admin_headers, db_sessionmaker):
+        self.add_students(db_sessionmaker)
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w") as handle:
+            for name, data in self.photos().items():
+                handle.writestr(name, data)
+
+        response = client.post("/api/admin/faces/import", content=archive.getvalue(), headers=admin_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines, summary = self.report(response)
+        assert lines["photos/CS000.jpg"]["status"] == "enrolled"
+        assert lines["photos/CS001.jpg"]["error"] == "No face detected in image"
+        assert lines["photos/NOPE1.jpg"]["error"] == "No student with this roll number"
+        assert summary == {"total": 3, "enrolled": 1, "updated": 0, "failed": 2}
+
+        with db_sessionmaker() as db:
+            record = db.query(FaceEncoding).one()
+            assert record.user.roll_number == "CS000"
+            assert record.is_verified == "verified"
+            assert len(face_identification.get_face_index(db)) == 1
+
+    def test_tar_import_updates_existing_faces(self, client, admin_headers, db_sessionmaker):
+        self.add_students(db_sessionmaker)
+        archive = BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as handle:
+            for name in ("CS000.jpg", "CS001.png"):
+                data = cartoon_face_jpeg()
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                handle.addfile(info, BytesIO(data))
+
+        for expected in ("enrolled", "updated"):
+            response = client.post(
+                "/api/admin/faces/import",
+                params={"format": "tar", "store_images": False},
+                content=archive.getvalue(),
+                headers=admin_headers,
+            )
+            lines, summary = self.report(response)
+            assert {line["status"] for line in lines.values()} == {expected}
+            assert summary[expected] == 2
+
+        with db_sessionmaker() as db:
+            assert db.query(FaceEncoding).count() == 2
+
+    def test_corrupt_archive(self, client, admin_headers):
+        response = client.post(
+            "/api/admin/faces/import", params={"format": "zip"}, content=b"PK\x03\x04garbage", headers=admin_headers
+        )
+        assert response.status_code == 400
@@ -0,0 +1,102 @@
+class TestConditionalRequests:
+
+    def test_results_polling_is_not_modified_until_a_vote(self, client, db_sessionmaker, council_election, add_users):
+        from app.models.vote import Vote
+
+        election_id = council_election
+        path = f"/api/votes/election/{election_id}"
+        first = client.get(path)
+        assert first.headers["cache-control"] == "public, no-cache"
+        etag = first.headers["etag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+        add_users(1, prefix="NV")
+        db = db_sessionmaker()
+        db.add(Vote(user_id=4, election_id=election_id, candidate_id=2))
+        db.commit()
+        db.close()
+
+        polled = client.get(path, headers={"If-None-Match": etag})
+        assert polled.status_code == 200
+        assert [row["vote_count"] for row in polled.json()] == [2, 2]
+
+    def test_candidate_if_modified_since(self, client, council_election):
+        election_id = council_election
+        candidate_id = client.get(f"/api/candidates/election/{election_id}").json()[0]["id"]
+
+        first = client.get(f"/api/candidates/{candidate_id}")
+        last_modified = first.headers["last-modified"]
+        repeat = client.get(f"/api/candidates/{candidate_id}", headers={"If-Modified-Since": last_modified})
+        assert repeat.status_code == 304
+        assert repeat.headers["etag"] == first.headers["etag"]
+        assert client.get(
+            f"/api/candidates/{candidate_id}", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}
+        ).status_code == 200
+
+    def test_body_etag_for_routes_without_validators(self, client, add_users):
+        from app.utils.security import create_access_token
+
+        add_users(1)
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'cs0@college.edu'})}"}
+        first = client.get("/api/votes/user/1", headers=headers)
+        assert first.json() == {"has_voted": False}
+        assert first.headers["cache-control"] == "private, no-cache"
+
+        repeat = client.get("/api/votes/user/1", headers={**headers, "If-None-Match": first.headers["etag"]})
+        assert repeat.status_code == 304
+        assert repeat.content == b""
+        # Routes without a policy are left alone
+        assert "etag" not in client.get("/health").headers
+
+
+class TestCompression:
+
+    def test_large_json_is_gzipped_small_and_streamed_are_not(self, client, admin_headers, add_users):
+        add_users(50)
+        gzip_only = {**admin_headers, "Accept-Encoding": "gzip"}
+
+        page = client.get("/api/admin/users", params={"limit": 50}, headers=gzip_only)
+        assert page.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in page.headers["vary"]
+        assert int(page.headers["content-length"]) < len(page.content) / 3
+        assert len(page.json()) == 50
+
+        identity = client.get(
+            "/api/admin/users", params={"limit": 50}, headers={**admin_headers, "Accept-Encoding": "identity"}
+        )
+        assert "content-encoding" not in identity.headers
+        assert "Accept-Encoding" in identity.headers["vary"]
+
+        assert "content-encoding" not in client.get("/health", headers={"Accept-Encoding": "gzip"}).headers
+        stream = client.get("/api/admin/users", params={"format": "ndjson"}, headers=gzip_only)
+        assert "content-encoding" not in stream.headers
+        assert len(stream.text.splitlines()) == 50
+
+    def test_compressed_etag_is_weak_and_revalidates(self, client, db_sessionmaker, council_election):
+        from app.models.candidate import Candidate
+
+        election_id = council_election
+        db = db_sessionmaker()
+        db.add_all(
+            Candidate(election_id=election_id, name=f"Extra {i}", symbol_number=10 + i, about="About " * 20)
+            for i in range(10)
+        )
+        db.commit()
+        db.close()
+        path = f"/api/elections/{election_id}/candidates"
+
+        first = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert first.headers["content-encoding"] == "gzip"
+        assert first.headers["etag"].startswith('W/"')
+        repeat = client.get(path, headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+        assert repeat.status_code == 304
+        assert client.get(path, headers={"Accept-Encoding": "identity"}).headers["etag"] == first.headers["etag"][2:]
+
+
+def test_choose_encoding():
+    from app.middleware.compression import choose_encoding
+
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+    assert choose_encoding(None) is None
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from app import launcher
+from app.config import settings
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_gunicorn_options_preload_and_recycle(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_WORKERS", 3)
+    options = launcher.gunicorn_options("127.0.0.1:9000")
+
+    assert options["bind"] == "127.0.0.1:9000"
+    assert options["workers"] == 3
+    assert options["preload_app"] is True
+    assert options["worker_class"].endswith("UvicornWorker")
+    assert options["max_requests"] == settings.MAX_REQUESTS
+    assert options["max_requests_jitter"] == settings.MAX_REQUESTS_JITTER
+
+
+def test_post_fork_resets_connections_and_splits_process_pool(monkeypatch):
+    from app.database import engine
+
+    disposed = []
+    monkeypatch.setattr(engine, "dispose", lambda close=True: disposed.append(close))
+    monkeypatch.setattr(launcher.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(settings, "WEB_WORKERS", 4)
+    monkeypatch.setattr(settings, "PROCESS_POOL_WORKERS", 0)
+
+    launcher.post_fork(SimpleNamespace(), SimpleNamespace(pid=123))
+
+    assert disposed == [False]
+    assert settings.PROCESS_POOL_WORKERS == 2
+
+
+def test_importing_app_does_not_load_face_stack(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'import.db'}", DEBUG="false")
+    probe = "import sys, main; print(sorted(m for m in ('cv2', 'numpy', 'PIL') if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", probe], env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_lifespan_migrates_primes_and_drains(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app import lifespan
+    from app.migrations import current_revision, discover_migrations
+    from app.utils import notifications
+    from main import app
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'lifespan.db'}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(lifespan, "engine", engine)
+    monkeypatch.setattr(lifespan, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(settings, "FACE_INDEX_DIR", "")
+    sent = []
+
+    with TestClient(app):
+        assert current_revision(engine) == discover_migrations()[-1].revision
+        notifications.enqueue(sent.append, "queued before shutdown")
+
+    assert sent == ["queued before shutdown"]
+    assert notifications.pending() == 0
@@ -0,0 +1,132 @@
+import json
+from app.models.user import User
+
+
+def test_metrics_record_route_latency_and_queries(client):
+    assert client.get("/api/candidates/all").status_code == 200
+
+    text = client.get("/metrics").text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/candidates/all",status="200",le="+Inf"}' in text
+    assert 'http_request_db_queries_count{route="/api/candidates/all"}' in text
+
+
+def test_timed_records_stage_duration_and_failures():
+    import pytest
+    from app.utils.metrics import stage_duration, stage_failures, timed
+
+    before = stage_duration.snapshot(stage="test_stage")["count"]
+    with timed("test_stage"):
+        pass
+    with pytest.raises(ValueError):
+        with timed("test_stage"):
+            raise ValueError
+    assert stage_duration.snapshot(stage="test_stage")["count"] == before + 2
+    assert 'stage_failures_total{stage="test_stage"}' in "\n".join(stage_failures.samples())
+
+
+def test_json_log_format_emits_extra_fields():
+    import logging
+    from app.logging_config import JSONFormatter
+
+    record = logging.makeLogRecord({
+        "name": "app.requests", "levelno": logging.WARNING, "levelname": "WARNING",
+        "msg": "GET %s slow", "args": ("/api/x",), "route": "/api/x", "duration_ms": 1500.0,
+    })
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["message"] == "GET /api/x slow"
+    assert entry["route"] == "/api/x" and entry["duration_ms"] == 1500.0
+    assert entry["level"] == "WARNING"
+
+
+def test_otp_email_log_omits_the_code(caplog, monkeypatch):
+    import logging
+    from app.utils import email
+
+    monkeypatch.setattr(email, "_send", lambda message: None)
+    with caplog.at_level(logging.DEBUG, logger=email.logger.name):
+        assert email.send_otp_email("cs001@college.edu", "482913")
+
+    assert "cs001@college.edu" in caplog.text
+    assert "482913" not in caplog.text
+
+
+class TestQueryBudgets:
+    """Queries per request on the hot paths, with enough rows that an N+1 would show"""
+
+    def test_read_endpoints(self, client, admin_headers, query_budget, open_election):
+        election_id = open_election()
+        budgets = {
+            "/api/candidates/all": 2,
+            f"/api/candidates/election/{election_id}": 2,
+            f"/api/elections/{election_id}/candidates": 2,
+            "/api/elections/": 2,
+            f"/api/elections/{election_id}": 1,
+            f"/api/votes/election/{election_id}": 4,
+            "/api/admin/users": 2,
+            "/api/admin/statistics/dashboard": 2,
+        }
+        for path, budget in budgets.items():
+            with query_budget(budget):
+                assert client.get(path, headers=admin_headers).status_code == 200, path
+
+    def test_election_day_flow(self, client, db_sessionmaker, query_budget, monkeypatch, open_election):
+        from app.models.login_token import LoginToken
+        from app.routes import auth, otp
+
+        election_id = open_election()
+        monkeypatch.setattr(auth, "send_login_link_email", lambda *args: True)
+        monkeypatch.setattr(auth, "send_otp_email", lambda *args: True)
+        monkeypatch.setattr(otp, "send_otp_email", lambda *args: True)
+
+        with query_budget(5):
+            response = client.post("/api/auth/register", json={
+                "roll_number": "NEW1", "email": "new@college.edu", "full_name": "New", "password": "Secret@123",
+            })
+            assert response.status_code == 200
+        with query_budget(3):
+            assert client.post("/api/otp/request", json={"email": "new@college.edu"}).status_code == 200
+
+        db = db_sessionmaker()
+        token = db.query(LoginToken.token).scalar()
+        db.close()
+        with query_budget(2):
+            response = client.post("/api/auth/login-with-token", params={"token": token})
+            assert response.json()["user"]["email"] == "new@college.edu"
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        vote = {"election_id": election_id, "candidate_id": 1}
+        with query_budget(4):
+            assert client.post("/api/votes/", json=vote, headers=headers).status_code == 200
+        with query_budget(4):
+            response = client.post("/api/votes/", json=vote, headers=headers)
+            assert response.status_code == 400
+            assert response.json()["detail"] == "User already voted in this election"
+
+
+def test_repeated_queries_are_logged_with_their_origin(db_sessionmaker, caplog, add_users):
+    import asyncio
+    import logging
+    from app.middleware.metrics import MetricsMiddleware
+    from app.utils import metrics
+
+    metrics.instrument_queries()
+    add_users(6)
+
+    async def n_plus_one(scope, receive, send):
+        with db_sessionmaker() as db:
+            for user_id in range(1, 7):
+                db.get(User, user_id)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def discard(message):
+        pass
+
+    middleware = MetricsMiddleware(n_plus_one, trace_queries=True, repeated_query_threshold=5)
+    with caplog.at_level(logging.WARNING, logger="app.requests"):
+        asyncio.run(middleware({"type": "http", "method": "GET", "path": "/n-plus-one"}, None, discard))
+
+    [record] = [record for record in caplog.records if getattr(record, "repeated_query", None)]
+    assert record.count == 6
+    assert "FROM users" in record.repeated_query
+    assert "in n_plus_one" in record.getMessage()
@@ -0,0 +1,235 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from app.migrations import current_revision, discover_migrations, run_migrations
+from app.models.face import FaceEncoding
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def migrated_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_migrations_are_ordered_and_recorded(migrated_engine):
+    revisions = [module.revision for module in discover_migrations()]
+    assert revisions == sorted(revisions)
+    assert current_revision(migrated_engine) == revisions[-1]
+    # Re-running is a no-op
+    assert run_migrations(migrated_engine) == []
+
+
+def test_migrate_takes_the_lock_only_when_behind(tmp_path, monkeypatch):
+    import app.migrations as migrations
+
+    locked = []
+    real_lock = migrations.file_lock
+
+    def recording_lock(path):
+        locked.append(path)
+        return real_lock(path)
+
+    monkeypatch.setattr(migrations, "file_lock", recording_lock)
+    engine = create_engine(f"sqlite:///{tmp_path / 'locked.db'}")
+    assert migrations.migrate(engine) == [module.revision for module in discover_migrations()]
+    assert locked == [migrations.migration_lock_path(engine)]
+
+    assert migrations.migrate(engine) == []
+    assert len(locked) == 1
+    engine.dispose()
+
+
+def test_concurrent_workers_migrate_a_fresh_database_once(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    env = dict(os.environ, DATABASE_URL=url, DEBUG="false")
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "app.migrations", "upgrade"],
+            env=env, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        for _ in range(4)
+    ]
+    results = [(worker.wait(timeout=120), *worker.communicate()) for worker in workers]
+
+    assert [code for code, _, stderr in results] == [0] * len(workers), [stderr for *_, stderr in results]
+    revisions = [module.revision for module in discover_migrations()]
+    applied = sorted(int(stdout.split()[1]) for _, stdout, _ in results)
+    # One worker did all the work; the rest found nothing to do
+    assert applied == [0] * (len(workers) - 1) + [len(revisions)]
+    engine = create_engine(url)
+    assert current_revision(engine) == revisions[-1]
+    engine.dispose()
+
+
+def test_migrations_upgrade_legacy_create_all_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE votes (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+            "election_id INTEGER NOT NULL, candidate_id INTEGER NOT NULL, created_at DATETIME)"
+        ))
+
+    run_migrations(engine)
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("votes")}
+    assert {"ix_votes_election_candidate", "ix_votes_user_id"} <= index_names
+    engine.dispose()
+
+
+def test_face_signatures_are_backfilled(tmp_path):
+    from app.utils.face_recognition_util import (
+        compute_face_signature,
+        deserialize_face_signature,
+        serialize_face_encoding,
+    )
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'faces.db'}")
+    run_migrations(engine, target=3)
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE face_encodings DROP COLUMN face_signature"))
+        template = np.random.default_rng(0).integers(0, 256, (100, 100, 3), dtype=np.uint8)
+        connection.execute(
+            text("INSERT INTO face_encodings (user_id, face_encoding, is_verified) VALUES (1, :encoding, 'verified')"),
+            {"encoding": serialize_face_encoding(template)},
+        )
+
+    run_migrations(engine)
+
+    with engine.connect() as connection:
+        stored = connection.execute(text("SELECT face_signature FROM face_encodings")).scalar_one()
+    np.testing.assert_allclose(deserialize_face_signature(stored), compute_face_signature(template))
+    with engine.connect() as connection:
+        # Templates enrolled before encoders were recorded are histogram crops
+        assert connection.execute(text("SELECT encoder FROM face_encodings")).scalar_one() == "histogram"
+    engine.dispose()
+
+
+def test_legacy_posters_move_to_blob_store(tmp_path, poster_data_url):
+    from app.models.poster import CandidatePoster
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'posters.db'}")
+    run_migrations(engine, target=5)
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE candidates ADD COLUMN poster TEXT"))
+        connection.execute(text(
+            "INSERT INTO candidates (election_id, name, symbol_number, poster) VALUES "
+            "(1, 'Alice', 1, :poster), (1, 'Bob', 2, 'not an image')"
+        ), {"poster": poster_data_url(400, 300)})
+
+    run_migrations(engine)
+
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT name, poster, poster_key FROM candidates ORDER BY id")).all()
+        variants = connection.execute(select(CandidatePoster.variant)).scalars().all()
+    assert rows[0].poster is None and len(rows[0].poster_key) == 64
+    # Undecodable values are left for someone to look at
+    assert (rows[1].poster, rows[1].poster_key) == ("not an image", None)
+    assert sorted(variants) == ["large.jpeg", "large.webp", "original", "thumb.jpeg", "thumb.webp"]
+    engine.dispose()
+
+
+@pytest.fixture
+def db_sessionmaker(tmp_path):
+    """Session factory on a migrated database, so plans see the real indexes"""
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'hot.db'}", connect_args={"check_same_thread": False})
+    run_migrations(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def hot_paths(client, db_sessionmaker, admin_headers, student_headers, open_election, monkeypatch):
+    """Requests on the hot paths, keyed by name, against a seeded election"""
+    from app.routes import auth, otp
+    from app.utils import face_identification
+    from app.utils import face_recognition_util as fru
+
+    election_id = open_election()
+    monkeypatch.setattr(auth, "send_otp_email", lambda *args: True)
+    monkeypatch.setattr(auth, "send_login_link_email", lambda *args: True)
+    monkeypatch.setattr(otp, "send_otp_email", lambda *args: True)
+    student = student_headers("voter@college.edu")
+    template = np.random.default_rng(0).integers(0, 256, (100, 100, 3), dtype=np.uint8)
+    with db_sessionmaker() as db:
+        db.add(FaceEncoding(
+            user_id=1, face_encoding=fru.serialize_face_encoding(template),
+            face_signature=fru.serialize_face_signature(fru.compute_face_signature(template)),
+            is_verified="verified",
+        ))
+        db.commit()
+
+    def identify():
+        with db_sessionmaker() as db:
+            face_identification.identify_face(db, template)
+
+    student_json = {"roll_number": "NEW1", "email": "new@college.edu", "full_name": "New", "password": "Secret@123"}
+    return {
+        "auth.register": lambda: client.post("/api/auth/register", json=student_json),
+        "auth.login": lambda: client.post("/api/auth/login", json={"email": "nobody@college.edu", "password": "x"}),
+        "auth.login_with_token": lambda: client.post("/api/auth/login-with-token", params={"token": "t"}),
+        "otp.request": lambda: client.post("/api/otp/request", json={"email": "cs0@college.edu"}),
+        "otp.verify": lambda: client.post("/api/otp/verify", json={"otp_code": "123456"}, headers=student),
+        "admin.get_all_users roll prefix": lambda: client.get(
+            "/api/admin/users", params={"roll_prefix": "CS"}, headers=admin_headers
+        ),
+        "admin.get_all_users created range": lambda: client.get(
+            "/api/admin/users", params={"created_from": "2025-01-01", "created_to": "2025-02-01"},
+            headers=admin_headers,
+        ),
+        "admin.admin_add_candidate": lambda: client.post(
+            "/api/admin/candidates", json={"election_id": election_id, "name": "C1", "symbol_number": 99},
+            headers=admin_headers,
+        ),
+        "votes.cast_vote": lambda: client.post(
+            "/api/votes/", json={"election_id": election_id, "candidate_id": 1}, headers=student
+        ),
+        "votes.check_user_voted": lambda: client.get(f"/api/votes/user/{election_id}", headers=student),
+        "votes.get_election_results": lambda: client.get(f"/api/votes/election/{election_id}"),
+        "face.identify_face": identify,
+        "face.verify_face_for_voting": lambda: client.post(
+            "/api/face/verify-for-voting", json={"image_data": "AAAA"}, headers=student
+        ),
+    }
+
+
+HOT_PATHS = [
+    "auth.register", "auth.login", "auth.login_with_token", "otp.request", "otp.verify",
+    "admin.get_all_users roll prefix", "admin.get_all_users created range", "admin.admin_add_candidate",
+    "votes.cast_vote", "votes.check_user_voted", "votes.get_election_results",
+    "face.identify_face", "face.verify_face_for_voting",
+]
+
+
+@pytest.mark.parametrize("name", HOT_PATHS)
+def test_hot_path_uses_indexes(db_sessionmaker, hot_paths, name):
+    from sqlalchemy import event
+
+    engine = db_sessionmaker.kw["bind"]
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append((statement, parameters))
+
+    event.listen(engine, "after_cursor_execute", record)
+    try:
+        hot_paths[name]()
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
+
+    assert selects, f"{name} ran no queries"
+    with engine.connect() as connection:
+        for statement, parameters in selects:
+            plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            full_scans = [step for step in plan if step.startswith("SCAN") and "USING" not in step]
+            assert not full_scans, f"{name} does a full table scan: {plan}\n{statement}"
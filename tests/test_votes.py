@@ -0,0 +1,26 @@
+class TestIdempotentVoting:
+
+    def test_retry_is_replayed(self, client, db_sessionmaker, open_election, student_headers):
+        from app.models.vote import Vote
+
+        election_id = open_election(count=2)
+        alice = student_headers("alice@college.edu")
+        vote = {"election_id": election_id, "candidate_id": 1}
+
+        first = client.post("/api/votes/", json=vote, headers={**alice, "Idempotency-Key": "k1"})
+        retry = client.post("/api/votes/", json=vote, headers={**alice, "Idempotency-Key": "k1"})
+        assert first.status_code == retry.status_code == 200
+        assert retry.json() == first.json()
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert "idempotent-replayed" not in first.headers
+
+        # Without a key the handler runs and sees the existing vote
+        assert client.post("/api/votes/", json=vote, headers=alice).status_code == 400
+        # Keys are per caller: another student's "k1" is a new request
+        bob = student_headers("bob@college.edu")
+        response = client.post("/api/votes/", json=vote, headers={**bob, "Idempotency-Key": "k1"})
+        assert response.status_code == 200 and "idempotent-replayed" not in response.headers
+
+        db = db_sessionmaker()
+        assert db.query(Vote).filter(Vote.election_id == election_id).count() == 3
+        db.close()